@@ -0,0 +1,58 @@
+"""add appointment composite indexes
+
+Revision ID: 20261017_appointment_idx
+Revises: 20261017_scheduled_jobs
+Create Date: 2026-10-17 18:00:00.000000
+
+Covers the hot appointment queries: booking conflict checks and availability
+(doctor, date, time, status), session queues (session, time), day lists and
+the super admin list (date, time), walk-in counts (date, walk-in) and status
+counts (status, date).  scripts/check_query_plans.py checks each plan.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_appointment_idx"
+down_revision: Union[str, Sequence[str], None] = "20261017_scheduled_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_appointment_doctor_date_time_status",
+        "appointment",
+        ["doctor_id", "appointment_date", "appointment_time", "status"],
+    )
+    op.create_index(
+        "ix_appointment_session_time",
+        "appointment",
+        ["schedule_session_id", "appointment_time"],
+    )
+    op.create_index(
+        "ix_appointment_date_time",
+        "appointment",
+        ["appointment_date", "appointment_time"],
+    )
+    op.create_index(
+        "ix_appointment_date_walk_in",
+        "appointment",
+        ["appointment_date", "is_walk_in"],
+    )
+    op.create_index(
+        "ix_appointment_status_date",
+        "appointment",
+        ["status", "appointment_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_appointment_status_date", table_name="appointment")
+    op.drop_index("ix_appointment_date_walk_in", table_name="appointment")
+    op.drop_index("ix_appointment_date_time", table_name="appointment")
+    op.drop_index("ix_appointment_session_time", table_name="appointment")
+    op.drop_index("ix_appointment_doctor_date_time_status", table_name="appointment")
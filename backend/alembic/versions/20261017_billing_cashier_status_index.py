@@ -0,0 +1,40 @@
+"""widen the billing_transaction cashier index with status
+
+Revision ID: 20261017_billing_cashier_idx
+Revises: 20261017_chat_feedback
+Create Date: 2026-10-18 09:00:00.000000
+
+The cashier stats query filters cashier_id, status and a created_at range.
+(cashier_id, created_at) and (status, created_at) both fit it partially, and
+which one the planner picked depended on index definition order;
+(cashier_id, status, created_at) serves all three predicates.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_billing_cashier_idx"
+down_revision: Union[str, Sequence[str], None] = "20261017_chat_feedback"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_billing_transaction_cashier_status_created",
+        "billing_transaction",
+        ["cashier_id", "status", "created_at"],
+    )
+    op.drop_index("ix_billing_transaction_cashier_created", table_name="billing_transaction")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_billing_transaction_cashier_created",
+        "billing_transaction",
+        ["cashier_id", "created_at"],
+    )
+    op.drop_index("ix_billing_transaction_cashier_status_created", table_name="billing_transaction")
@@ -0,0 +1,45 @@
+"""add billing_transaction date-range indexes
+
+Revision ID: 20261017_billing_txn_idx
+Revises: 20260213_merge_all_current_heads, 20260213_sched_id_optional
+Create Date: 2026-10-17 09:00:00.000000
+
+Dashboard and cashier queries now filter created_at with half-open ranges
+(see app/core/date_filters.py), which these composite indexes can serve.
+Also merges the two heads left by the 2026-02-13 migrations.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_billing_txn_idx"
+down_revision: Union[str, Sequence[str], None] = ("20260213_merge_all_current_heads", "20260213_sched_id_optional")
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_billing_transaction_branch_status_created",
+        "billing_transaction",
+        ["branch_id", "status", "created_at"],
+    )
+    op.create_index(
+        "ix_billing_transaction_cashier_created",
+        "billing_transaction",
+        ["cashier_id", "created_at"],
+    )
+    op.create_index(
+        "ix_billing_transaction_status_created",
+        "billing_transaction",
+        ["status", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_billing_transaction_status_created", table_name="billing_transaction")
+    op.drop_index("ix_billing_transaction_cashier_created", table_name="billing_transaction")
+    op.drop_index("ix_billing_transaction_branch_status_created", table_name="billing_transaction")
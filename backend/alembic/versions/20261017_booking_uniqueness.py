@@ -0,0 +1,77 @@
+"""enforce one active appointment and one lock per slot
+
+Revision ID: 20261017_booking_unique
+Revises: 20261017_appointment_idx
+Create Date: 2026-10-17 21:00:00.000000
+
+Booking now inserts and lets the database reject a taken slot instead of
+checking first.  ``appointment.active_slot`` is a stored generated column,
+1 for active appointments and NULL for cancelled ones, so the unique index
+over (doctor_id, appointment_date, appointment_time, active_slot) only
+constrains active appointments (MySQL has no partial indexes).  slot_lock
+gets a unique (doctor_id, slot_date, slot_time); locks are short-lived
+holds, so duplicates are dropped first, keeping the latest per slot.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_booking_unique"
+down_revision: Union[str, Sequence[str], None] = "20261017_appointment_idx"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    duplicates = conn.execute(sa.text(
+        "SELECT doctor_id, appointment_date, appointment_time, COUNT(*) FROM appointment "
+        "WHERE status <> 'cancelled' "
+        "GROUP BY doctor_id, appointment_date, appointment_time HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        listed = "; ".join(f"doctor {d} on {day} at {t} ({n} appointments)" for d, day, t, n in duplicates[:20])
+        raise RuntimeError(
+            f"{len(duplicates)} slots hold more than one active appointment; cancel or move the extras "
+            f"before upgrading: {listed}"
+        )
+
+    op.add_column(
+        "appointment",
+        sa.Column(
+            "active_slot",
+            sa.Integer(),
+            sa.Computed("CASE WHEN status = 'cancelled' THEN NULL ELSE 1 END", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_unique_constraint(
+        "uq_appointment_active_slot",
+        "appointment",
+        ["doctor_id", "appointment_date", "appointment_time", "active_slot"],
+    )
+
+    op.execute(
+        "DELETE FROM slot_lock WHERE id NOT IN ("
+        " SELECT id FROM ("
+        "  SELECT MAX(id) AS id FROM slot_lock s"
+        "  WHERE s.expires_at = (SELECT MAX(expires_at) FROM slot_lock l"
+        "   WHERE l.doctor_id = s.doctor_id AND l.slot_date = s.slot_date AND l.slot_time = s.slot_time)"
+        "  GROUP BY s.doctor_id, s.slot_date, s.slot_time"
+        " ) AS keep)"
+    )
+    op.create_unique_constraint(
+        "uq_slot_lock_doctor_date_time",
+        "slot_lock",
+        ["doctor_id", "slot_date", "slot_time"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_slot_lock_doctor_date_time", "slot_lock", type_="unique")
+    op.drop_constraint("uq_appointment_active_slot", "appointment", type_="unique")
+    op.drop_column("appointment", "active_slot")
@@ -0,0 +1,38 @@
+"""add chatbot_pending_feedback
+
+Revision ID: 20261017_chat_feedback
+Revises: 20261017_booking_unique
+Create Date: 2026-10-17 23:30:00.000000
+
+Feedback for a chatbot log row that another worker has not inserted yet is
+parked here and applied once the row is written.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_chat_feedback"
+down_revision: Union[str, Sequence[str], None] = "20261017_booking_unique"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chatbot_pending_feedback",
+        sa.Column("log_id", sa.String(36), primary_key=True),
+        sa.Column("was_helpful", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_chatbot_pending_feedback_created_at", "chatbot_pending_feedback", ["created_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chatbot_pending_feedback_created_at", table_name="chatbot_pending_feedback")
+    op.drop_table("chatbot_pending_feedback")
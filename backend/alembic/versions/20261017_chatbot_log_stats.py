@@ -0,0 +1,52 @@
+"""add chatbot_log_stats counters
+
+Revision ID: 20261017_chatbot_log_stats
+Revises: 20261017_disease_synonyms
+Create Date: 2026-10-17 14:00:00.000000
+
+Per-category interaction / feedback counters behind the chatbot analytics
+endpoint, seeded here from the existing chatbot_log rows.
+
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_chatbot_log_stats"
+down_revision: Union[str, Sequence[str], None] = "20261017_disease_synonyms"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    stats = op.create_table(
+        "chatbot_log_stats",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("helpful", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("not_helpful", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("category", name="uq_chatbot_log_stats_category"),
+    )
+    rows = op.get_bind().execute(sa.text(
+        "SELECT COALESCE(category_detected, '') AS category, COUNT(*) AS total,"
+        " SUM(CASE WHEN was_helpful = 1 THEN 1 ELSE 0 END) AS helpful,"
+        " SUM(CASE WHEN was_helpful = 0 THEN 1 ELSE 0 END) AS not_helpful"
+        " FROM chatbot_log GROUP BY COALESCE(category_detected, '')"
+    )).all()
+    now = datetime.utcnow()
+    op.bulk_insert(stats, [
+        {"id": str(uuid.uuid4()), "category": r.category, "total": r.total,
+         "helpful": r.helpful or 0, "not_helpful": r.not_helpful or 0, "updated_at": now}
+        for r in rows
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table("chatbot_log_stats")
@@ -0,0 +1,59 @@
+"""add daily_sales_rollup and daily_product_rollup
+
+Revision ID: 20261017_sales_rollups
+Revises: 20261017_billing_txn_idx
+Create Date: 2026-10-17 10:00:00.000000
+
+Pre-aggregated completed sales for POS analytics.  Populate existing history
+with `python scripts/backfill_sales_rollups.py` after upgrading.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_sales_rollups"
+down_revision: Union[str, Sequence[str], None] = "20261017_billing_txn_idx"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_sales_rollup",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("branch_id", sa.String(36), sa.ForeignKey("branch.id"), nullable=False),
+        sa.Column("sales_date", sa.Date(), nullable=False),
+        sa.Column("cashier_id", sa.String(36), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("payment_method", sa.String(30), nullable=False),
+        sa.Column("transaction_count", sa.Integer(), nullable=False),
+        sa.Column("total_sales", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint(
+            "branch_id", "sales_date", "cashier_id", "payment_method", name="uq_daily_sales_rollup_key"
+        ),
+    )
+    op.create_index("ix_daily_sales_rollup_date_branch", "daily_sales_rollup", ["sales_date", "branch_id"])
+
+    op.create_table(
+        "daily_product_rollup",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("branch_id", sa.String(36), sa.ForeignKey("branch.id"), nullable=False),
+        sa.Column("sales_date", sa.Date(), nullable=False),
+        sa.Column("description", sa.String(255), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("branch_id", "sales_date", "description", name="uq_daily_product_rollup_key"),
+    )
+    op.create_index("ix_daily_product_rollup_date_branch", "daily_product_rollup", ["sales_date", "branch_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_product_rollup_date_branch", table_name="daily_product_rollup")
+    op.drop_table("daily_product_rollup")
+    op.drop_index("ix_daily_sales_rollup_date_branch", table_name="daily_sales_rollup")
+    op.drop_table("daily_sales_rollup")
@@ -0,0 +1,34 @@
+"""add synonyms and priority to chatbot_disease_mapping
+
+Revision ID: 20261017_disease_synonyms
+Revises: 20261017_token_jti_unique
+Create Date: 2026-10-17 13:00:00.000000
+
+Synonyms (comma-separated) are matched like the disease name; priority decides
+between overlapping matches before match length does.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_disease_synonyms"
+down_revision: Union[str, Sequence[str], None] = "20261017_token_jti_unique"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chatbot_disease_mapping", sa.Column("synonyms", sa.Text(), nullable=True))
+    op.add_column(
+        "chatbot_disease_mapping",
+        sa.Column("priority", sa.Integer(), nullable=False, server_default="50"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chatbot_disease_mapping", "priority")
+    op.drop_column("chatbot_disease_mapping", "synonyms")
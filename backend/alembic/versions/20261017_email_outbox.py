@@ -0,0 +1,46 @@
+"""add email_outbox
+
+Revision ID: 20261017_email_outbox
+Revises: 20261017_sms_outbox
+Create Date: 2026-10-17 18:00:00.000000
+
+Queued emails, sent in the background over pooled SMTP sessions.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_email_outbox"
+down_revision: Union[str, Sequence[str], None] = "20261017_sms_outbox"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("to_email", sa.String(255), nullable=False),
+        sa.Column("subject", sa.String(255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("html", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("template_name", sa.String(50), nullable=True),
+        sa.Column("campaign_id", sa.String(36), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("last_error", sa.String(500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=True),
+        sa.Column("claim_token", sa.String(36), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_email_outbox_campaign_id", "email_outbox", ["campaign_id"])
+    op.create_index("ix_email_outbox_status_next_attempt", "email_outbox", ["status", "next_attempt_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("email_outbox")
@@ -0,0 +1,41 @@
+"""add notification_broadcast jobs
+
+Revision ID: 20261017_notif_broadcast
+Revises: 20261017_chatbot_log_stats
+Create Date: 2026-10-17 15:00:00.000000
+
+Tracks background broadcast jobs so any worker can report their progress.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_notif_broadcast"
+down_revision: Union[str, Sequence[str], None] = "20261017_chatbot_log_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_broadcast",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("role_as", sa.Integer(), nullable=True),
+        sa.Column("created_by", sa.String(36), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, server_default="queued"),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.String(500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_broadcast")
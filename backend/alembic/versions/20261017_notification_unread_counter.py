@@ -0,0 +1,51 @@
+"""add notification_unread_counter and the (user_id, is_read, created_at) index
+
+Revision ID: 20261017_unread_counter
+Revises: 20261017_notif_broadcast
+Create Date: 2026-10-17 16:00:00.000000
+
+Per-user unread counts behind the unread-count endpoints, seeded here from
+the existing notification rows.
+
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_unread_counter"
+down_revision: Union[str, Sequence[str], None] = "20261017_notif_broadcast"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_notification_user_read_created", "notification", ["user_id", "is_read", "created_at"]
+    )
+    counters = op.create_table(
+        "notification_unread_counter",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("user_id", sa.String(36), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("unread", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("user_id", name="uq_notification_unread_counter_user"),
+    )
+    rows = op.get_bind().execute(sa.text(
+        "SELECT user_id, COUNT(*) AS unread FROM notification"
+        " WHERE is_read = 0 GROUP BY user_id"
+    )).all()
+    now = datetime.utcnow()
+    op.bulk_insert(counters, [
+        {"id": str(uuid.uuid4()), "user_id": r.user_id, "unread": r.unread, "updated_at": now}
+        for r in rows
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table("notification_unread_counter")
+    op.drop_index("ix_notification_user_read_created", table_name="notification")
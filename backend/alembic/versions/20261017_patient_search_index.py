@@ -0,0 +1,47 @@
+"""add patient_search_index
+
+Revision ID: 20261017_patient_search
+Revises: 20261017_sales_rollups
+Create Date: 2026-10-17 11:00:00.000000
+
+Normalized copies of patient name / phone / NIC / email for prefix and soundex
+lookups.  Populate with `python scripts/backfill_patient_search.py` after
+upgrading; the application keeps it current from then on.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_patient_search"
+down_revision: Union[str, Sequence[str], None] = "20261017_sales_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXED = ["first_name", "last_name", "first_name_key", "last_name_key", "phone", "nic", "email"]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "patient_search_index",
+        sa.Column("user_id", sa.String(36), primary_key=True),
+        sa.Column("first_name", sa.String(255), nullable=False),
+        sa.Column("last_name", sa.String(255), nullable=False),
+        sa.Column("first_name_key", sa.String(8), nullable=False),
+        sa.Column("last_name_key", sa.String(8), nullable=False),
+        sa.Column("phone", sa.String(20), nullable=True),
+        sa.Column("nic", sa.String(20), nullable=True),
+        sa.Column("email", sa.String(255), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    for column in _INDEXED:
+        op.create_index(f"ix_patient_search_index_{column}", "patient_search_index", [column])
+
+
+def downgrade() -> None:
+    for column in reversed(_INDEXED):
+        op.drop_index(f"ix_patient_search_index_{column}", table_name="patient_search_index")
+    op.drop_table("patient_search_index")
@@ -0,0 +1,44 @@
+"""add scheduled_job and appointment.reminder_sent_at
+
+Revision ID: 20261017_scheduled_jobs
+Revises: 20261017_email_outbox
+Create Date: 2026-10-17 19:00:00.000000
+
+Lease / last-run rows for the in-process periodic scheduler, and the marker
+that keeps the appointment reminder job from queueing a reminder twice.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_scheduled_jobs"
+down_revision: Union[str, Sequence[str], None] = "20261017_email_outbox"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheduled_job",
+        sa.Column("name", sa.String(100), primary_key=True),
+        sa.Column("holder", sa.String(100), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("last_started_at", sa.DateTime(), nullable=True),
+        sa.Column("last_finished_at", sa.DateTime(), nullable=True),
+        sa.Column("last_duration_ms", sa.Float(), nullable=True),
+        sa.Column("last_status", sa.String(20), nullable=True),
+        sa.Column("last_error", sa.String(500), nullable=True),
+        sa.Column("last_result", sa.String(500), nullable=True),
+        sa.Column("run_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failure_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("appointment", sa.Column("reminder_sent_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("appointment", "reminder_sent_at")
+    op.drop_table("scheduled_job")
@@ -0,0 +1,38 @@
+"""turn sms_log into the SMS outbox
+
+Revision ID: 20261017_sms_outbox
+Revises: 20261017_unread_counter
+Create Date: 2026-10-17 17:00:00.000000
+
+Adds the retry / lease columns the outbox dispatcher needs and the
+(status, next_attempt_at) index it polls.  The old inline sender committed
+every row as sent or failed, so no existing row becomes due.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_sms_outbox"
+down_revision: Union[str, Sequence[str], None] = "20261017_unread_counter"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("sms_log", sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("sms_log", sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+    op.add_column("sms_log", sa.Column("claim_token", sa.String(36), nullable=True))
+    op.add_column("sms_log", sa.Column("sent_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_sms_log_status_next_attempt", "sms_log", ["status", "next_attempt_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sms_log_status_next_attempt", table_name="sms_log")
+    op.drop_column("sms_log", "sent_at")
+    op.drop_column("sms_log", "claim_token")
+    op.drop_column("sms_log", "next_attempt_at")
+    op.drop_column("sms_log", "attempts")
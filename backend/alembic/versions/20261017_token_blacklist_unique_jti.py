@@ -0,0 +1,44 @@
+"""make token_blacklist.token_jti unique and index expires_at
+
+Revision ID: 20261017_token_jti_unique
+Revises: 20261017_patient_search
+Create Date: 2026-10-17 12:00:00.000000
+
+Refresh-token rotation relies on the unique jti: of two concurrent refreshes
+with the same token only one insert succeeds.  Expired rows are deleted first
+(they are purged periodically from now on) and any remaining duplicates are
+collapsed to one row per jti.
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_token_jti_unique"
+down_revision: Union[str, Sequence[str], None] = "20261017_patient_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    op.execute(sa.text("DELETE FROM token_blacklist WHERE expires_at < :now").bindparams(now=now))
+    # The inner derived table lets MySQL select from the table it deletes from.
+    op.execute(sa.text(
+        "DELETE FROM token_blacklist WHERE id NOT IN ("
+        " SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM token_blacklist GROUP BY token_jti) AS keep"
+        ")"
+    ))
+    op.drop_index("ix_token_blacklist_token_jti", table_name="token_blacklist")
+    op.create_index("ix_token_blacklist_token_jti", "token_blacklist", ["token_jti"], unique=True)
+    op.create_index("ix_token_blacklist_expires_at", "token_blacklist", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_token_blacklist_expires_at", table_name="token_blacklist")
+    op.drop_index("ix_token_blacklist_token_jti", table_name="token_blacklist")
+    op.create_index("ix_token_blacklist_token_jti", "token_blacklist", ["token_jti"])
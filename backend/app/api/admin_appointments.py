@@ -192,7 +192,7 @@ async def create_with_patient(
     current_user: User = Depends(get_current_user),
 ):
     """Create appointment + patient in one go (walk-in flow)."""
-    from app.core.security import get_password_hash
+    from app.core.security import hash_password
     from uuid import uuid4
 
     email = (payload.email or "").strip().lower() or f"walkin_{uuid4().hex[:8]}@guest.local"
@@ -201,7 +201,7 @@ async def create_with_patient(
     if not user:
         user = User(
             email=email, username=email,
-            hashed_password=get_password_hash(uuid4().hex),
+            hashed_password=await hash_password(uuid4().hex),
             role_as=5, is_active=True, branch_id=payload.branch_id,
         )
         session.add(user)
@@ -13,7 +13,7 @@ from sqlmodel import col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.database import get_session
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 from app.models.appointment import Appointment
 from app.models.branch import Branch
 from app.models.doctor import Doctor
@@ -21,7 +21,8 @@ from app.models.doctor_availability import DoctorAvailability
 from app.models.doctor_schedule import DoctorSchedule
 from app.models.patient import Patient
 from app.models.user import User
-from app.services.appointment_service import AppointmentService
+from app.services.appointment_service import AppointmentService, is_slot_conflict
+from app.services.availability_index import availability_index
 from app.services.doctor_schedule_service import DoctorScheduleService
 
 
@@ -456,7 +457,7 @@ async def book_appointment(
         user = User(
             email=generated_email,
             username=generated_email,
-            hashed_password=get_password_hash(uuid4().hex),
+            hashed_password=await hash_password(uuid4().hex),
             role_as=5,  # Patient
             is_active=True,
         )
@@ -491,8 +492,12 @@ async def book_appointment(
             department=payload.specialisation,
             is_walk_in=False,
         )
-    except IntegrityError:
+    except HTTPException:
+        raise
+    except IntegrityError as exc:
         await session.rollback()
+        if not is_slot_conflict(exc):
+            raise HTTPException(status_code=500, detail=f"Failed to book appointment: {exc}")
         raise HTTPException(status_code=409, detail="Selected slot is no longer available")
     except Exception as e:
         await session.rollback()
@@ -640,22 +645,6 @@ async def book_slot(
 
     target_time = slots[payload.slot_index - 1]
     try:
-        lock_query = (
-            select(Appointment)
-            .where(
-                Appointment.doctor_id == payload.doctor_id,
-                Appointment.branch_id == payload.branch_id,
-                Appointment.appointment_date == payload.date,
-                Appointment.appointment_time == target_time,
-                Appointment.status != "cancelled",
-            )
-            .with_for_update()
-        )
-        lock_result = await session.exec(lock_query)
-        existing = lock_result.first()
-        if existing:
-            raise HTTPException(status_code=409, detail="Slot already booked")
-
         # If paying online, mark as pending_payment so PayHere webhook confirms later
         initial_status = "pending_payment" if payload.payment_method == "online" else "confirmed"
         appointment = Appointment(
@@ -671,11 +660,14 @@ async def book_slot(
             payment_amount=350.0,
         )
         session.add(appointment)
-        await session.commit()
+        await session.commit()  # uq_appointment_active_slot rejects a taken slot
         await session.refresh(appointment)
-    except HTTPException:
+        availability_index.invalidate(payload.doctor_id, payload.date)
+    except IntegrityError as exc:
         await session.rollback()
-        raise
+        if not is_slot_conflict(exc):
+            raise HTTPException(status_code=500, detail=f"Failed to book appointment: {exc}")
+        raise HTTPException(status_code=409, detail="Slot already booked")
     except Exception as exc:
         await session.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to book appointment: {exc}")
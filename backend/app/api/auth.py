@@ -17,12 +17,13 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 import jwt as pyjwt
 
 from app.core.database import get_session
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.security import create_access_token, check_password, check_password_and_update, hash_password
 from app.services.sms_service import SmsService
 from app.core.config import settings
 from app.models.user import User, UserCreate
 from app.models.patient import Patient
 from app.models.token_blacklist import TokenBlacklist
+from app.services.token_revocation import TokenRevokedError, commit_revocation, revocation_filter
 from app.api.deps import get_current_user
 
 router = APIRouter()
@@ -79,13 +80,6 @@ def _decode_token(token: str) -> dict:
     return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
 
 
-async def _is_token_blacklisted(session: AsyncSession, jti: str) -> bool:
-    result = await session.exec(
-        select(TokenBlacklist).where(TokenBlacklist.token_jti == jti)
-    )
-    return result.first() is not None
-
-
 def _create_token_pair(user_id: str) -> dict:
     """Return access + refresh token pair."""
     jti = _make_jti()
@@ -155,7 +149,10 @@ async def login_access_token(
     result = await session.exec(select(User).where(User.email == form_data.username))
     user = result.first()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await check_password_and_update(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password",
@@ -164,6 +161,12 @@ async def login_access_token(
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS / scheme; upgrade it transparently.
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
+
     tokens = _create_token_pair(user.id)
 
     return {
@@ -198,7 +201,7 @@ async def register(
         if nic_check.first():
             raise HTTPException(status_code=400, detail="NIC already registered")
 
-    hashed = get_password_hash(body.password)
+    hashed = await hash_password(body.password)
     new_user = User(
         email=body.email,
         username=body.email,
@@ -293,7 +296,7 @@ async def forgot_password(
         raise HTTPException(status_code=400, detail="No phone number on file for this account")
 
     otp = f"{random.randint(100000, 999999)}"
-    otp_hash = get_password_hash(otp)
+    otp_hash = await hash_password(otp)
     otp_token = _create_password_reset_otp_token(user.id, target_phone, otp_hash)
 
     log = await SmsService.send_sms(
@@ -328,7 +331,7 @@ async def verify_forgot_password_otp(
         raise HTTPException(status_code=400, detail="Invalid token type")
 
     otp_hash = payload.get("otp_hash", "")
-    if not verify_password(body.otp, otp_hash):
+    if not await check_password(body.otp, otp_hash):
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
     user = await session.get(User, payload.get("sub"))
@@ -364,7 +367,7 @@ async def reset_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.hashed_password = get_password_hash(body.new_password)
+    user.hashed_password = await hash_password(body.new_password)
     session.add(user)
 
     # Blacklist the reset token so it can't be reused
@@ -374,7 +377,10 @@ async def reset_password(
         expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
     )
     session.add(bl)
-    await session.commit()
+    try:
+        await commit_revocation(session)
+    except TokenRevokedError:
+        raise HTTPException(status_code=400, detail="Reset token has already been used")
 
     return {"message": "Password reset successful"}
 
@@ -398,7 +404,7 @@ async def refresh_token(
         raise HTTPException(status_code=400, detail="Not a refresh token")
 
     jti = payload.get("jti", "")
-    if await _is_token_blacklisted(session, jti):
+    if await revocation_filter.is_revoked(session, jti):
         raise HTTPException(status_code=401, detail="Token has been revoked")
 
     user = await session.get(User, payload["sub"])
@@ -412,7 +418,11 @@ async def refresh_token(
         expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
     )
     session.add(bl)
-    await session.commit()
+    try:
+        await commit_revocation(session)
+    except TokenRevokedError:
+        # Another request rotated this token first.
+        raise HTTPException(status_code=401, detail="Token has been revoked")
 
     tokens = _create_token_pair(user.id)
     return tokens
@@ -436,13 +446,13 @@ async def change_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if not verify_password(body.current_password, user.hashed_password):
+    if not await check_password(body.current_password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
 
     if body.new_password_confirmation and body.new_password != body.new_password_confirmation:
         raise HTTPException(status_code=400, detail="Password confirmation does not match")
 
-    user.hashed_password = get_password_hash(body.new_password)
+    user.hashed_password = await hash_password(body.new_password)
     session.add(user)
     await session.commit()
 
@@ -456,10 +466,10 @@ async def change_password_post(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await check_password(body.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
 
-    current_user.hashed_password = get_password_hash(body.new_password)
+    current_user.hashed_password = await hash_password(body.new_password)
     session.add(current_user)
     await session.commit()
 
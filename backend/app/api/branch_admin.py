@@ -14,6 +14,7 @@ from sqlmodel import select, func
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.database import get_session
+from app.core.date_filters import on_date
 from app.api.deps import get_current_user
 
 router = APIRouter()
@@ -56,7 +57,7 @@ async def branch_admin_dashboard(
         func.coalesce(func.sum(BillingTransaction.net_amount), 0)
     ).where(
         BillingTransaction.status == "completed",
-        func.date(BillingTransaction.created_at) == date.today(),
+        on_date(BillingTransaction.created_at, date.today()),
     )
     if branch_id:
         today_rev_q = today_rev_q.where(BillingTransaction.branch_id == branch_id)
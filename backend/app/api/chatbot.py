@@ -15,6 +15,8 @@ from app.models.chatbot import (
     faq_to_read, log_to_read,
 )
 from app.services.chatbot_service import ChatbotService
+from app.services.disease_matcher import disease_matcher  # noqa: F401  (registers the mapping change listeners)
+from app.services.faq_index import faq_index  # noqa: F401  (registers the FAQ change listeners)
 
 router = APIRouter()
 svc = ChatbotService
@@ -393,10 +395,15 @@ async def create_disease_mapping(
 ):
     if current_user.role_as != 1:
         raise HTTPException(status_code=403, detail="Admin only")
+    synonyms = payload.get("synonyms", "")
+    if isinstance(synonyms, list):
+        synonyms = ", ".join(synonyms)
     mapping = DiseaseMapping(
         disease_name=payload.get("disease_name", ""),
         specialization=payload.get("specialization", ""),
         safe_response=payload.get("safe_response", ""),
+        synonyms=synonyms or None,
+        priority=payload.get("priority", 50),
         is_active=payload.get("is_active", True),
     )
     session.add(mapping)
@@ -417,9 +424,14 @@ async def update_disease_mapping(
     mapping = await session.get(DiseaseMapping, mapping_id)
     if not mapping:
         raise HTTPException(status_code=404, detail="Mapping not found")
-    for key in ("disease_name", "specialization", "safe_response", "is_active"):
+    for key in ("disease_name", "specialization", "safe_response", "priority", "is_active"):
         if key in payload:
             setattr(mapping, key, payload[key])
+    if "synonyms" in payload:
+        synonyms = payload["synonyms"]
+        if isinstance(synonyms, list):
+            synonyms = ", ".join(synonyms)
+        mapping.synonyms = synonyms or None
     mapping.updated_at = datetime.now(timezone.utc)
     session.add(mapping)
     await session.commit()
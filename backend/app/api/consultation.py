@@ -9,7 +9,7 @@ from __future__ import annotations
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -34,6 +34,7 @@ from app.models.consultation import (
     IssuedMedicineRead,
     QuestionBankRead,
 )
+from app.api.websocket_alerts import broadcast_pharmacy_queue_update
 from app.services.consultation_service import ConsultationService
 
 router = APIRouter()
@@ -44,13 +45,32 @@ svc = ConsultationService
 # 1. Queue / Appointments for doctor (enhanced with nurse status)
 # ============================================================
 
+def _queue_not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a bare 304 if the client already holds this queue version, else tag *response*.
+
+    ``Cache-Control: no-cache`` makes browsers revalidate on every poll, so the
+    frontend gets the 304 handling for free.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 @router.get("/queue/{doctor_id}")
 async def patient_queue(
     doctor_id: str,
+    request: Request,
+    response: Response,
     appt_date: Optional[date] = None,
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
+    etag = f'W/"{await svc.get_queue_version(session, doctor_id, appt_date)}"'
+    not_modified = _queue_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
     queue = await svc.get_queue(session, doctor_id, appt_date)
     return {"queue": queue}
 
@@ -59,9 +79,15 @@ async def patient_queue(
 async def day_appointments(
     doctor_id: str,
     appt_date: date,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
+    etag = f'W/"{await svc.get_queue_version(session, doctor_id, appt_date)}"'
+    not_modified = _queue_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
     queue = await svc.get_queue(session, doctor_id, appt_date)
     return {"appointments": queue}
 
@@ -169,7 +195,7 @@ async def submit_consultation(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    return await svc.submit(
+    c = await svc.submit(
         session,
         consultation_id,
         payload.notes,
@@ -177,6 +203,8 @@ async def submit_consultation(
         payload.follow_up_instructions,
         payload.consultation_fee,
     )
+    await _push_pharmacy_queue(session, c, "added")
+    return c
 
 
 # ============================================================
@@ -446,15 +474,33 @@ async def add_investigation(
 # 11. Pharmacy – Issue Medicines
 # ============================================================
 
+async def _push_pharmacy_queue(session: AsyncSession, consultation, action: str) -> None:
+    """Notify pharmacists subscribed to the pharmacy-queue channel."""
+    entry = None
+    if action != "removed":
+        entry = await svc.get_pharmacy_queue_entry(session, consultation.id)
+        if entry is None:
+            return  # no prescriptions, nothing to dispense
+    await broadcast_pharmacy_queue_update(action, consultation.id, consultation.branch_id, entry)
+
+
 @router.get("/pharmacy/queue")
 async def pharmacy_queue(
     branch_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Get consultations ready for pharmacy dispensing."""
-    queue = await svc.get_pharmacy_queue(session, branch_id)
-    return {"queue": queue}
+    """Get consultations ready for pharmacy dispensing.
+
+    Returns the whole queue unless ``limit`` is given; pages then follow
+    ``next_cursor`` (a cursor without a limit gets pages of 100).  For live
+    updates instead of polling, subscribe to ``/ws/alerts?channel=pharmacy-queue``.
+    """
+    if cursor and limit is None:
+        limit = 100
+    return await svc.get_pharmacy_queue(session, branch_id, limit, cursor)
 
 
 @router.post("/{consultation_id}/issue-medicine", response_model=IssuedMedicineRead)
@@ -478,6 +524,7 @@ async def mark_medicines_issued(
 ):
     """Mark all medicines as issued for this consultation."""
     c = await svc.mark_medicines_issued(session, consultation_id, current_user.id)
+    await _push_pharmacy_queue(session, c, "removed")
     return {"consultation": c.model_dump()}
 
 
@@ -507,6 +554,7 @@ async def collect_payment(
     current_user: User = Depends(get_current_user),
 ):
     c = await svc.collect_payment(session, consultation_id, current_user.id, payload.fee)
+    await _push_pharmacy_queue(session, c, "updated")
     return {"consultation": c.model_dump()}
 
 
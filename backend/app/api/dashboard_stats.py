@@ -10,6 +10,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, datetime, timezone
 
 from app.core.database import get_session
+from app.core.date_filters import on_date
 from app.api.deps import get_current_user
 from app.models.user import User
 
@@ -120,7 +121,7 @@ async def pharmacist_dashboard_stats(
 
     # Today's transactions
     q = select(func.count()).select_from(PharmacyStockTransaction).where(
-        func.date(PharmacyStockTransaction.created_at) == today,
+        on_date(PharmacyStockTransaction.created_at, today),
     )
     today_transactions = (await session.exec(q)).one()
 
@@ -148,14 +149,14 @@ async def cashier_dashboard_stats(
 
     # Today's transactions
     q = select(func.count()).select_from(BillingTransaction).where(
-        func.date(BillingTransaction.created_at) == today,
+        on_date(BillingTransaction.created_at, today),
         BillingTransaction.cashier_id == current_user.id,
     )
     today_transactions = (await session.exec(q)).one()
 
     # Today's sales total
     q = select(func.coalesce(func.sum(BillingTransaction.net_amount), 0)).select_from(BillingTransaction).where(
-        func.date(BillingTransaction.created_at) == today,
+        on_date(BillingTransaction.created_at, today),
         BillingTransaction.cashier_id == current_user.id,
         BillingTransaction.status == "completed",
     )
@@ -194,14 +195,14 @@ async def receptionist_enhanced_stats(
 
     # Active queue
     q = select(func.count()).select_from(Queue).where(
-        func.date(Queue.created_at) == today,
+        on_date(Queue.created_at, today),
         Queue.status == "waiting",
     )
     active_queue = (await session.exec(q)).one()
 
     # Completed today
     q = select(func.count()).select_from(Queue).where(
-        func.date(Queue.created_at) == today,
+        on_date(Queue.created_at, today),
         Queue.status == "completed",
     )
     completed_today = (await session.exec(q)).one()
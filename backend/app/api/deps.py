@@ -10,16 +10,19 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
 from app.core.database import get_session
+from app.core import principal_cache
 from app.models.user import User
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token"
 )
 
-async def get_current_user(
-    token: Annotated[str, Depends(reusable_oauth2)],
-    session: Annotated[AsyncSession, Depends(get_session)],
-) -> User:
+async def user_from_token(session: AsyncSession, token: str) -> User:
+    """Resolve a bearer token to an active user; raises HTTPException otherwise.
+
+    Shared by the HTTP dependency below and the websocket endpoints, which
+    receive their token as a query parameter.
+    """
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -38,13 +41,25 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = await session.get(User, token_data)
+    user = principal_cache.get_cached_user(session, token_data)
+    if user is None:
+        await principal_cache.ensure_listening()
+        loaded_at = principal_cache.generation()
+        user = await session.get(User, token_data)
+        if user is not None:
+            principal_cache.cache_user(user, loaded_at)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
+async def get_current_user(
+    token: Annotated[str, Depends(reusable_oauth2)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> User:
+    return await user_from_token(session, token)
+
 async def get_current_active_superuser(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
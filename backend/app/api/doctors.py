@@ -12,7 +12,7 @@ from app.models.user import User
 from app.models.branch import Branch
 from app.models.doctor_branch_link import DoctorBranchLink
 from app.api.deps import get_current_active_superuser
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 
 import logging
 logger = logging.getLogger(__name__)
@@ -162,7 +162,7 @@ async def create_doctor(
         user = User(
             email=doctor_in.email,
             username=doctor_in.email,
-            hashed_password=get_password_hash(doctor_in.password),
+            hashed_password=await hash_password(doctor_in.password),
             role_as=3,
             is_active=True,
             first_name=doctor_in.first_name,
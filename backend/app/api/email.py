@@ -1,8 +1,14 @@
 """Email endpoints — Patch 5.7"""
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import get_session
 from app.api.deps import get_current_user
+from app.models.email_outbox import EmailOutbox
 from app.models.user import User
+from app.services.email_dispatcher import email_dispatcher
 from app.services.email_service import EmailService
 
 router = APIRouter()
@@ -11,10 +17,10 @@ router = APIRouter()
 @router.post("/send")
 async def send_email(
     payload: dict,
-    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Send an email. Runs in background task to avoid blocking."""
+    """Queue an email; the outbox dispatcher sends it in the background."""
     if current_user.role_as not in (1, 2):
         raise HTTPException(status_code=403, detail="Admin only")
 
@@ -28,23 +34,79 @@ async def send_email(
 
     if template_name:
         variables = payload.get("variables", {})
-        background_tasks.add_task(
-            EmailService.send_template_email_sync,
-            to_email,
-            template_name,
-            **variables,
-        )
+        try:
+            row = await EmailService.queue_template_email(session, to_email, template_name, **variables)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     else:
         if not subject or not body:
             raise HTTPException(status_code=400, detail="subject and body required for non-template emails")
-        background_tasks.add_task(
-            EmailService.send_email_sync,
-            to_email,
-            subject,
-            body,
+        row = await EmailService.queue_email(session, to_email, subject, body, html=bool(payload.get("html")))
+
+    return {"success": True, "message": "Email queued for delivery", "email_id": row.id}
+
+
+@router.post("/campaign")
+async def send_campaign(
+    payload: dict,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Queue the same template (or subject/body) for many recipients.
+
+    Payload: ``recipients`` (list of ``{"to_email", "variables"}``), either
+    ``template_name`` or ``subject`` + ``body``, and optional shared ``variables``.
+    """
+    if current_user.role_as not in (1, 2):
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    recipients = payload.get("recipients") or []
+    if not recipients:
+        raise HTTPException(status_code=400, detail="recipients is required")
+    template_name = payload.get("template_name")
+    if not template_name and not (payload.get("subject") and payload.get("body")):
+        raise HTTPException(status_code=400, detail="template_name or subject and body required")
+
+    try:
+        campaign_id, queued = await EmailService.queue_campaign(
+            session,
+            recipients,
+            template_name=template_name,
+            subject=payload.get("subject"),
+            body=payload.get("body"),
+            html=bool(payload.get("html")),
+            variables=payload.get("variables"),
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "campaign_id": campaign_id, "queued": queued}
+
+
+@router.get("/campaign/{campaign_id}")
+async def campaign_status(
+    campaign_id: str,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Delivery progress of a campaign, as rows per status."""
+    if current_user.role_as not in (1, 2):
+        raise HTTPException(status_code=403, detail="Admin only")
+    by_status = await EmailService.campaign_status(session, campaign_id)
+    if not by_status:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return {"campaign_id": campaign_id, "total": sum(by_status.values()), "by_status": by_status}
+
 
-    return {"success": True, "message": "Email queued for delivery"}
+@router.get("/outbox")
+async def email_outbox_status(
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Admin: outbox rows by status, and this worker's dispatcher counters."""
+    if current_user.role_as != 1:
+        raise HTTPException(status_code=403, detail="Admin only")
+    result = await session.exec(select(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status))
+    return {"by_status": dict(result.all()), "dispatcher": email_dispatcher.stats()}
 
 
 @router.get("/templates")
@@ -52,10 +114,14 @@ async def list_templates(
     current_user: User = Depends(get_current_user),
 ):
     """List available email templates."""
-    from app.services.email_service import EMAIL_TEMPLATES
+    from app.services.email_service import COMPILED_TEMPLATES, EMAIL_TEMPLATES
     return {
         "templates": [
-            {"name": k, "subject_pattern": v["subject"]}
+            {
+                "name": k,
+                "subject_pattern": v["subject"],
+                "variables": sorted(COMPILED_TEMPLATES[k][0].fields | COMPILED_TEMPLATES[k][1].fields),
+            }
             for k, v in EMAIL_TEMPLATES.items()
         ]
     }
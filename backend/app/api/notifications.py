@@ -6,12 +6,14 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import get_session
+from app.core.database import async_session_factory, get_session
+from app.core.permissions import ROLES, require_roles
 from app.api.deps import get_current_user
-from app.models.notification import NotificationCreate, NotificationRead
+from app.api.websocket_alerts import broadcast_notification as ws_broadcast_notification
+from app.models.notification import NotificationBroadcast, NotificationCreate, NotificationRead
 from app.services.notification_service import NotificationService
 
 router = APIRouter()
@@ -108,28 +110,53 @@ async def get_notification(
     return n
 
 
-@router.post("/broadcast")
+async def _run_broadcast(job_id: str) -> None:
+    async with async_session_factory() as session:
+        job = await svc.run_broadcast(session, job_id)
+    if job.status == "completed":
+        await ws_broadcast_notification(
+            job.title, job.message, role_as=job.role_as, data={"broadcast_id": job.id},
+        )
+
+
+@router.post("/broadcast", status_code=202)
 async def broadcast_notification(
+    background_tasks: BackgroundTasks,
     title: str = Query(...),
     message: Optional[str] = None,
     role: Optional[str] = None,
     session: AsyncSession = Depends(get_session),
-    user=Depends(get_current_user),
+    user=Depends(require_roles(1, 2)),
 ):
-    """Send notification to all users (or by role). Admin only."""
-    from sqlmodel import select
-    from app.models.user import User
-    q = select(User)
+    """Send notification to all active users (or one role, by name or id). Admin only.
+
+    Runs as a background job; poll GET /broadcast/{id} for progress.
+    """
+    role_as = None
     if role:
-        q = q.where(User.role == role)
-    result = await session.exec(q)
-    users = list(result.all())
-    count = 0
-    for u in users:
-        await svc.create(session, {
-            "user_id": u.id, "role": u.role,
-            "title": title, "message": message or "",
-            "type": "info",
-        })
-        count += 1
-    return {"sent": count}
+        role_as = int(role) if role.isdigit() else next((k for k, v in ROLES.items() if v == role), None)
+        if role_as not in ROLES:
+            raise HTTPException(400, f"Unknown role: {role}")
+    job = await svc.start_broadcast(session, user.id, title, message, role_as)
+    background_tasks.add_task(_run_broadcast, job.id)
+    return {"broadcast_id": job.id, "status": job.status, "total": job.total}
+
+
+@router.get("/broadcast/{broadcast_id}")
+async def broadcast_progress(
+    broadcast_id: str,
+    session: AsyncSession = Depends(get_session),
+    user=Depends(require_roles(1, 2)),
+):
+    job = await session.get(NotificationBroadcast, broadcast_id)
+    if not job:
+        raise HTTPException(404, "Broadcast not found")
+    return {
+        "broadcast_id": job.id,
+        "status": job.status,
+        "total": job.total,
+        "sent": job.sent,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
@@ -6,7 +6,7 @@ from sqlmodel import select, func
 from pydantic import BaseModel
 from app.core.database import get_session
 from app.models.user import User
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 from app.api.deps import get_current_active_staff, get_current_user
 from app.models.nurse_domain import (
     VitalSign, VitalSignCreate, VitalSignRead,
@@ -87,7 +87,7 @@ async def create_nurse(
             last_name=last_name,
             email=email,
             username=email,
-            hashed_password=get_password_hash(password),
+            hashed_password=await hash_password(password),
             role_as=4,  # Nurse role
             branch_id=branch_id,
             date_of_birth=date_of_birth,
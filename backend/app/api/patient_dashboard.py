@@ -28,6 +28,7 @@ from app.models.patient_dashboard import (
     FeedbackCreate,
     FeedbackRead,
 )
+from app.services.notification_service import NotificationService
 
 router = APIRouter()
 
@@ -74,7 +75,7 @@ async def dashboard_stats(
         "upcomingAppointments": upcoming.one() or 0,
         "recentVisits": recent_visits.one() or 0,
         "activeConditions": conditions.one() or 0,
-        "unreadNotifications": 0,  # placeholder until notification system
+        "unreadNotifications": await NotificationService.unread_count(session, current_user.id),
     }
 
 
@@ -97,7 +98,9 @@ async def unread_count(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    return {"count": 0}
+    if user_id != current_user.id:
+        raise HTTPException(403, "Cannot view another user's notifications")
+    return {"count": await NotificationService.unread_count(session, user_id)}
 
 
 @router.put("/notifications/{notification_id}/read")
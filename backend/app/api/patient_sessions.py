@@ -12,7 +12,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.deps import get_current_user
 from app.core.database import get_session
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 from app.models.user import User
 from app.models.branch import Branch
 from app.models.doctor import Doctor
@@ -29,8 +29,10 @@ from app.models.patient_session import (
     SessionQueue,
     SessionIntake,
 )
-from app.services.appointment_service import AppointmentService
+from app.services.appointment_service import AppointmentService, is_slot_conflict
+from app.services.availability_index import availability_index
 from app.services.doctor_schedule_service import DoctorScheduleService
+from app.services.patient_search_service import PatientSearchService
 
 router = APIRouter()
 
@@ -190,22 +192,54 @@ def _build_slot_times(start_time: time, end_time: time, slot_duration: int, max_
     return slots
 
 
-async def _get_session_slot_config(db: AsyncSession, schedule_session: ScheduleSession) -> tuple[int, int]:
+def _slot_count(start_time: time, end_time: time, slot_duration: int, max_patients: int) -> int:
+    """Same as len(_build_slot_times(...)) without materialising the list."""
+    if slot_duration <= 0:
+        slot_duration = 15
+    span = _time_to_minutes(end_time) - _time_to_minutes(start_time)
+    if span <= 0:
+        return 0
+    count = -(-span // slot_duration)  # ceil division
+    if max_patients > 0:
+        return min(count, max_patients)
+    return count
+
+
+def _slot_config(schedule_session: ScheduleSession, schedule: Optional[DoctorSchedule]) -> tuple[int, int]:
     slot_duration = 15
     max_patients = 0
-    if schedule_session.schedule_id:
-        schedule = await db.get(DoctorSchedule, schedule_session.schedule_id)
-        if schedule:
-            slot_duration = schedule.slot_duration_minutes or slot_duration
-            max_patients = schedule.max_patients or max_patients
+    if schedule:
+        slot_duration = schedule.slot_duration_minutes or slot_duration
+        max_patients = schedule.max_patients or max_patients
 
     if max_patients <= 0:
-        derived_slots = _build_slot_times(schedule_session.start_time, schedule_session.end_time, slot_duration, 0)
-        max_patients = len(derived_slots)
+        max_patients = _slot_count(schedule_session.start_time, schedule_session.end_time, slot_duration, 0)
 
     return slot_duration, max_patients
 
 
+async def _get_session_slot_config(db: AsyncSession, schedule_session: ScheduleSession) -> tuple[int, int]:
+    schedule = None
+    if schedule_session.schedule_id:
+        schedule = await db.get(DoctorSchedule, schedule_session.schedule_id)
+    return _slot_config(schedule_session, schedule)
+
+
+async def _prefetch_slot_configs(
+    db: AsyncSession, schedule_sessions: List[ScheduleSession]
+) -> Dict[str, tuple[int, int]]:
+    """Slot config for many sessions with a single IN query on doctor_schedule."""
+    schedule_ids = {s.schedule_id for s in schedule_sessions if s.schedule_id}
+    schedule_map: Dict[str, DoctorSchedule] = {}
+    if schedule_ids:
+        schedule_res = await db.exec(select(DoctorSchedule).where(col(DoctorSchedule.id).in_(schedule_ids)))
+        schedule_map = {sch.id: sch for sch in schedule_res.all()}
+    return {
+        s.id: _slot_config(s, schedule_map.get(s.schedule_id) if s.schedule_id else None)
+        for s in schedule_sessions
+    }
+
+
 async def _doctor_for_user(session: AsyncSession, user_id: str) -> Optional[Doctor]:
     result = await session.exec(select(Doctor).where(Doctor.user_id == user_id))
     return result.first()
@@ -330,6 +364,10 @@ async def list_sessions(
     branch_id: Optional[str] = None,
     doctor_id: Optional[str] = None,
     session_date: Optional[date] = Query(default=None),
+    from_date: Optional[date] = Query(default=None),
+    to_date: Optional[date] = Query(default=None),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
@@ -350,13 +388,21 @@ async def list_sessions(
             sessions_q = sessions_q.where(ScheduleSession.doctor_id == doctor_id)
         if session_date:
             sessions_q = sessions_q.where(ScheduleSession.session_date == session_date)
+        if from_date:
+            sessions_q = sessions_q.where(ScheduleSession.session_date >= from_date)
+        if to_date:
+            sessions_q = sessions_q.where(ScheduleSession.session_date <= to_date)
+
+        sessions_q = sessions_q.order_by(
+            col(ScheduleSession.session_date), col(ScheduleSession.start_time), col(ScheduleSession.id)
+        ).offset(skip)
+        if limit:
+            sessions_q = sessions_q.limit(limit)
 
         # DEBUG: Branch Admin Session Visibility
         print(f"DEBUG: list_sessions | User: {current_user.id} ({current_user.role_as}) | Branch: {branch_id} | Doctor: {doctor_id} | Date: {session_date}", flush=True)
         
-        sessions_res = await session.exec(
-            sessions_q.order_by(col(ScheduleSession.session_date), col(ScheduleSession.start_time))
-        )
+        sessions_res = await session.exec(sessions_q)
         sessions = sessions_res.all() or []
         if not sessions:
             return []
@@ -427,19 +473,14 @@ async def list_sessions(
                     contact_number=contact_number,
                 )
 
+        slot_configs = await _prefetch_slot_configs(session, sessions)
+
         items: List[SessionListItem] = []
         for s in sessions:
             doc = doctor_map.get(s.doctor_id)
             brn = branch_map.get(s.branch_id)
-            slot_duration, max_patients = await _get_session_slot_config(session, s)
-            total_slots = len(
-                _build_slot_times(
-                    s.start_time,
-                    s.end_time,
-                    slot_duration,
-                    max_patients,
-                )
-            )
+            slot_duration, max_patients = slot_configs[s.id]
+            total_slots = _slot_count(s.start_time, s.end_time, slot_duration, max_patients)
             # Build patients list for this session (deduplicated)
             seen_pids: set = set()
             sess_patients: List[SessionPatientBrief] = []
@@ -585,6 +626,7 @@ async def delete_session(
 
     await session.exec(delete(ScheduleSession).where(ScheduleSession.id == session_id))
     await session.commit()
+    availability_index.invalidate(schedule_session.doctor_id, schedule_session.session_date)
 
     return {"status": "success", "message": "Session deleted"}
 
@@ -1212,6 +1254,8 @@ async def get_my_sessions(
     # Let's do a simple count query per session or one aggregate if performance needed
     # For now, simple implementation logic from list_sessions
 
+    slot_configs = await _prefetch_slot_configs(session, sessions)
+
     items = []
     for s in sessions:
         doc = doctor_map.get(s.doctor_id)
@@ -1229,15 +1273,8 @@ async def get_my_sessions(
         )
         assigned_staff_count = len(staff_res.all() or [])
 
-        slot_duration, max_patients = await _get_session_slot_config(session, s)
-        total_slots = len(
-            _build_slot_times(
-                s.start_time,
-                s.end_time,
-                slot_duration,
-                max_patients,
-            )
-        )
+        slot_duration, max_patients = slot_configs[s.id]
+        total_slots = _slot_count(s.start_time, s.end_time, slot_duration, max_patients)
 
         items.append(
              SessionListItem(
@@ -1366,19 +1403,18 @@ async def session_patient_search(
         .where(User.role_as == 5)
     )
 
-    if phone:
-        query = query.where(User.contact_number_mobile.contains(phone))
-    if q:
-        query = query.where(
-            or_(
-                User.first_name.contains(q),
-                User.last_name.contains(q),
-                User.contact_number_mobile.contains(q),
-            )
-        )
-
-    query = query.order_by(User.first_name, User.last_name).limit(30)
-    rows = (await session.exec(query)).all() or []
+    if q or phone:
+        # Ranked lookup through the patient search index; phone narrows the name matches.
+        matches = await PatientSearchService.search(session, q or phone, limit=30, phone=phone if q else None)
+        ranked = [m.user_id for m in matches]
+        if not ranked:
+            return []
+        rank = {uid: i for i, uid in enumerate(ranked)}
+        rows = (await session.exec(query.where(col(User.id).in_(ranked)))).all()
+        rows = sorted(rows, key=lambda r: rank[r[1]])
+    else:
+        query = query.order_by(User.first_name, User.last_name).limit(30)
+        rows = (await session.exec(query)).all() or []
 
     out: List[PatientSearchItem] = []
     for patient_id, user_id, first_name, last_name, mobile, address in rows:
@@ -1427,7 +1463,7 @@ async def attach_patient_to_slot(
         new_user = User(
             email=generated_email,
             username=generated_email,
-            hashed_password=get_password_hash(generated_password),
+            hashed_password=await hash_password(generated_password),
             role_as=5,
             is_active=True,
             first_name=first_name,
@@ -1496,10 +1532,16 @@ async def attach_patient_to_slot(
             is_walk_in=True,
         )
         session.add(new_appt)
-        await session.flush()
         appointment_id = new_appt.id
 
-    await session.commit()
+    try:
+        await session.commit()  # uq_appointment_active_slot rejects a slot taken meanwhile
+    except IntegrityError as exc:
+        await session.rollback()
+        if not is_slot_conflict(exc):
+            raise
+        raise HTTPException(status_code=409, detail="Slot already has another patient")
+    availability_index.invalidate(schedule_session.doctor_id, schedule_session.session_date)
     return {
         "status": 200,
         "appointment_id": appointment_id,
@@ -1805,6 +1847,7 @@ async def update_appointment_status(
     appt.status = new_status
     session.add(appt)
     await session.commit()
+    availability_index.invalidate(appt.doctor_id, appt.appointment_date)
     
     return {"status": "success", "message": "Appointment status updated"}
 
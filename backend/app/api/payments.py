@@ -13,6 +13,7 @@ from app.core.database import get_session
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.appointment import Appointment
+from app.services.availability_index import availability_index
 from app.services.payment_service import PayHereService
 
 router = APIRouter()
@@ -189,6 +190,8 @@ async def payment_notify(
         session.add(appt)
 
     await session.commit()
+    for appt in appointments:
+        availability_index.invalidate(appt.doctor_id, appt.appointment_date)
     logger.info("PayHere notify: updated %d appointment(s) → %s", len(appointments), appt_status)
 
     return {"status": "ok", "payment_status": payment_status, "order_id": order_id}
@@ -5,7 +5,7 @@ from sqlmodel import select
 from app.core.database import get_session
 from app.models.user import User, UserCreate
 from app.models.staff_pharmacist import Pharmacist, PharmacistCreate
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 from app.api.deps import get_current_active_staff
 import shutil
 import os
@@ -77,7 +77,7 @@ async def create_pharmacist(
 
     try:
         # 2. Create User account (Role 7 = Pharmacist)
-        hashed_password = get_password_hash(password)
+        hashed_password = await hash_password(password)
         new_user = User(
             email=email,
             username=email, # Using email as username for simplicity
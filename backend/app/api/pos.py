@@ -12,6 +12,7 @@ from pydantic import BaseModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.database import get_session
+from app.core.date_filters import between_dates, day_start
 from app.api.deps import get_current_user
 from app.models.pos import (
     BillingTransactionCreate, BillingTransactionRead,
@@ -107,10 +108,7 @@ async def sales_report(
     ).where(BillingTransaction.status == "completed")
     if branch_id:
         q = q.where(BillingTransaction.branch_id == branch_id)
-    if from_date:
-        q = q.where(func.date(BillingTransaction.created_at) >= from_date)
-    if to_date:
-        q = q.where(func.date(BillingTransaction.created_at) <= to_date)
+    q = q.where(between_dates(BillingTransaction.created_at, from_date, to_date))
     q = q.group_by(func.date(BillingTransaction.created_at))
     result = await session.exec(q)
     return [{"date": str(r[0]), "count": r[1], "revenue": float(r[2])} for r in result.all()]
@@ -133,7 +131,7 @@ async def daily_trends(
         func.coalesce(func.sum(BillingTransaction.net_amount), 0).label("revenue"),
     ).where(
         BillingTransaction.status == "completed",
-        func.date(BillingTransaction.created_at) >= cutoff,
+        BillingTransaction.created_at >= day_start(cutoff),
     )
     if branch_id:
         q = q.where(BillingTransaction.branch_id == branch_id)
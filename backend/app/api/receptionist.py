@@ -2,7 +2,7 @@ from typing import List, Optional
 from datetime import date, datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlmodel import select, func, or_, col
+from sqlmodel import select, func, col
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.database import get_session
@@ -14,6 +14,7 @@ from app.models.branch import Branch, BranchRead
 from app.models.user import User
 from app.api.deps import get_current_user
 from app.services.appointment_service import AppointmentService
+from app.services.patient_search_service import PatientSearchService
 
 router = APIRouter()
 svc = AppointmentService
@@ -220,24 +221,8 @@ async def search_patients(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Search patients by name, email, phone, or NIC."""
-    query = (
-        select(User)
-        .where(
-            User.role_as == 5,
-            or_(
-                User.email.contains(q),
-                User.first_name.contains(q),
-                User.last_name.contains(q),
-                User.contact_number_mobile.contains(q),
-                User.nic_number.contains(q),
-            ),
-        )
-        .offset(skip)
-        .limit(limit)
-    )
-    result = await session.exec(query)
-    users = result.all()
+    """Search patients by name, email, phone, or NIC (ranked, typo tolerant for names)."""
+    users = await PatientSearchService.search_users(session, q, skip=skip, limit=limit)
     return [{"id": u.id, "email": u.email, "first_name": u.first_name, "last_name": u.last_name,
              "phone": u.contact_number_mobile, "nic": u.nic_number} for u in users]
 
@@ -249,7 +234,7 @@ async def register_patient(
     current_user: User = Depends(get_current_user),
 ):
     """Register a new patient from the receptionist desk."""
-    from app.core.security import get_password_hash
+    from app.core.security import hash_password
     from uuid import uuid4
 
     email = (payload.email or "").strip().lower() or f"patient_{uuid4().hex[:8]}@guest.local"
@@ -260,7 +245,7 @@ async def register_patient(
     user = User(
         email=email,
         username=email,
-        hashed_password=get_password_hash(uuid4().hex),
+        hashed_password=await hash_password(uuid4().hex),
         role_as=5,
         is_active=True,
         first_name=payload.first_name,
@@ -355,6 +340,19 @@ async def check_doctor_availability(
     return {"slots": await DoctorScheduleService.check_availability(session, doctor_id, check_date)}
 
 
+@router.get("/doctors/{doctor_id}/availability/range")
+async def check_doctor_availability_range(
+    doctor_id: str,
+    start_date: date,
+    end_date: date,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    from app.services.doctor_schedule_service import DoctorScheduleService
+    days = await DoctorScheduleService.check_availability_range(session, doctor_id, start_date, end_date)
+    return {"days": [{"date": d.isoformat(), "slots": slots} for d, slots in days.items()]}
+
+
 # --- Walk-in appointment ---
 
 class WalkInRequest(BaseModel):
@@ -577,10 +575,10 @@ async def change_password(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    from app.core.security import verify_password, get_password_hash
-    if not verify_password(current_password, current_user.hashed_password):
+    from app.core.security import check_password, hash_password
+    if not await check_password(current_password, current_user.hashed_password):
         raise HTTPException(400, "Current password is incorrect")
-    current_user.hashed_password = get_password_hash(new_password)
+    current_user.hashed_password = await hash_password(new_password)
     session.add(current_user)
     await session.commit()
     return {"message": "Password changed"}
@@ -420,6 +420,49 @@ async def check_availability(
     return {"slots": slots}
 
 
+class AvailabilityRangeRequest(BaseModel):
+    doctor_id: str
+    start_date: date
+    end_date: date
+    branch_id: Optional[str] = None
+
+
+@router.post("/check-availability-range")
+async def check_availability_range(
+    payload: AvailabilityRangeRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    """Public – returns available time-slots for a doctor on each date of a range (max 31 days)."""
+    days = await svc.check_availability_range(
+        session, payload.doctor_id, payload.start_date, payload.end_date, payload.branch_id
+    )
+    return {"days": [{"date": d.isoformat(), "slots": slots} for d, slots in days.items()]}
+
+
+class BranchAvailabilityRequest(BaseModel):
+    branch_id: str
+    start_date: date
+    end_date: date
+    specialization: Optional[str] = None
+
+
+@router.post("/branch-availability")
+async def branch_availability(
+    payload: BranchAvailabilityRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    """Public – slot matrix for every doctor at a branch over a date range (max 31 days)."""
+    doctors = await svc.branch_availability(
+        session, payload.branch_id, payload.start_date, payload.end_date, payload.specialization
+    )
+    return {
+        "branch_id": payload.branch_id,
+        "start_date": payload.start_date.isoformat(),
+        "end_date": payload.end_date.isoformat(),
+        "doctors": doctors,
+    }
+
+
 # ============================================================
 # 3. Cancellation Workflow
 # ============================================================
@@ -1,7 +1,7 @@
 """SMS endpoints — Patch 5.5"""
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import select, col
+from sqlmodel import select, col, func
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Optional
 
@@ -9,6 +9,7 @@ from app.core.database import get_session
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.sms_log import SmsLog, SmsLogRead
+from app.services.sms_dispatcher import sms_dispatcher
 from app.services.sms_service import SmsService
 
 router = APIRouter()
@@ -20,7 +21,11 @@ async def send_sms(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Send an SMS. Accepts either raw message or template_type + variables."""
+    """Queue an SMS. Accepts either raw message or template_type + variables.
+
+    ``success`` means the message was accepted for delivery; follow ``log_id``
+    in /sms/logs for the outcome.
+    """
     recipient = payload.get("recipient", payload.get("phone", ""))
     if not recipient:
         raise HTTPException(status_code=400, detail="recipient is required")
@@ -39,7 +44,7 @@ async def send_sms(
         log = await SmsService.send_sms(session, recipient, message)
 
     return {
-        "success": log.status == "sent",
+        "success": log.status != "failed",
         "log_id": log.id,
         "status": log.status,
         "provider_response": log.provider_response,
@@ -66,3 +71,15 @@ async def list_sms_logs(
     q = q.order_by(col(SmsLog.created_at).desc()).offset(skip).limit(limit)
     result = await session.exec(q)
     return list(result.all())
+
+
+@router.get("/outbox")
+async def sms_outbox_status(
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Admin: outbox rows by status, and this worker's dispatcher counters."""
+    if current_user.role_as != 1:
+        raise HTTPException(status_code=403, detail="Admin only")
+    result = await session.exec(select(SmsLog.status, func.count(SmsLog.id)).group_by(SmsLog.status))
+    return {"by_status": dict(result.all()), "dispatcher": sms_dispatcher.stats()}
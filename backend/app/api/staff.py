@@ -4,7 +4,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from app.core.database import get_session
 from app.models.user import User
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 from app.api.deps import get_current_active_staff
 from app.api.uploads import validate_file, save_file, PHOTO_ALLOWED_EXTENSIONS, PHOTO_MAX_SIZE, ID_ALLOWED_EXTENSIONS, ID_MAX_SIZE
 import logging
@@ -162,7 +162,7 @@ async def create_staff(
             last_name=last_name,
             email=email,
             username=email, # Using email as username
-            hashed_password=get_password_hash(password),
+            hashed_password=await hash_password(password),
             role_as=role_as,
             branch_id=branch_id,
             date_of_birth=date_of_birth,
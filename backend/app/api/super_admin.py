@@ -71,7 +71,7 @@ async def seed_defaults(
     # So we must leave this open or use a secret header.
     # For now, we'll check if ANY super admin exists. If so, return 400.
 ):
-    from app.core.security import get_password_hash
+    from app.core.security import hash_password
     
     # Check if super admin exists
     result = await session.exec(select(User).where(User.email == "admin@hospital.com"))
@@ -89,7 +89,7 @@ async def seed_defaults(
     new_admin = User(
         email=ADMIN_EMAIL,
         username=ADMIN_USERNAME,
-        hashed_password=get_password_hash(ADMIN_PASSWORD),
+        hashed_password=await hash_password(ADMIN_PASSWORD),
         role_as=ADMIN_ROLE,
         is_active=True,
     )
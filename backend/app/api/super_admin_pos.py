@@ -13,19 +13,26 @@ from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case
 from sqlmodel import func, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.deps import get_current_user
+from app.core.config import settings
 from app.core.database import get_session
+from app.core.date_filters import between_dates, on_date
+from app.core.ttl_cache import TTLCache
 from app.models.branch import Branch
 from app.models.pharmacy_inventory import Product, ProductStock
-from app.models.pos import BillingTransaction, TransactionItem
+from app.models.pos import BillingTransaction, DailyProductRollup, DailySalesRollup
 from app.models.user import User
 
 
 router = APIRouter()
 
+# Per (branch, date, latest completed transaction) cashier stats payloads.
+_cashier_stats_cache = TTLCache(ttl_seconds=settings.CASHIER_STATS_CACHE_TTL_SECONDS)
+
 
 def _date_range_from_param(range_value: str) -> tuple[date, date]:
     today = date.today()
@@ -41,6 +48,32 @@ def _date_range_from_param(range_value: str) -> tuple[date, date]:
     return today - timedelta(days=6), today
 
 
+def cashier_stats_query(cashier_ids: List[str], target_date: date, branch_id: Optional[str] = None):
+    """Per cashier: today's count and total, then the week's (ending *target_date*), in one grouped pass.
+
+    scripts/check_query_plans.py checks this statement's plan.
+    """
+    is_today = on_date(BillingTransaction.created_at, target_date)
+    filters = [
+        BillingTransaction.status == "completed",
+        BillingTransaction.cashier_id.in_(cashier_ids),
+        between_dates(BillingTransaction.created_at, target_date - timedelta(days=6), target_date),
+    ]
+    if branch_id:
+        filters.append(BillingTransaction.branch_id == branch_id)
+    return (
+        select(
+            BillingTransaction.cashier_id,
+            func.coalesce(func.sum(case((is_today, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((is_today, BillingTransaction.net_amount), else_=0)), 0),
+            func.count(BillingTransaction.id),
+            func.coalesce(func.sum(BillingTransaction.net_amount), 0),
+        )
+        .where(*filters)
+        .group_by(BillingTransaction.cashier_id)
+    )
+
+
 async def _list_branches(session: AsyncSession) -> List[Dict[str, Any]]:
     res = await session.exec(select(Branch).order_by(Branch.center_name))
     branches = list(res.all())
@@ -147,8 +180,8 @@ async def super_admin_pos_dashboard_stats(
     if branch_id:
         base_filters.append(BillingTransaction.branch_id == branch_id)
 
-    today_filters = base_filters + [func.date(BillingTransaction.created_at) == today]
-    yesterday_filters = base_filters + [func.date(BillingTransaction.created_at) == yesterday]
+    today_filters = base_filters + [on_date(BillingTransaction.created_at, today)]
+    yesterday_filters = base_filters + [on_date(BillingTransaction.created_at, yesterday)]
 
     today_sales_res = await session.exec(
         select(func.coalesce(func.sum(BillingTransaction.net_amount), 0)).where(*today_filters)
@@ -189,7 +222,7 @@ async def super_admin_pos_dashboard_stats(
             payment_breakdown["online"] += a
 
     # Branch performance (today)
-    perf_filters = [BillingTransaction.status == "completed", func.date(BillingTransaction.created_at) == today]
+    perf_filters = [BillingTransaction.status == "completed", on_date(BillingTransaction.created_at, today)]
     perf_rows = await session.exec(
         select(
             BillingTransaction.branch_id,
@@ -245,14 +278,6 @@ async def super_admin_pos_cashiers(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    # Cashier role_as is 6 in backend mapping.
-    cashier_role = 6
-    q = select(User).where(User.role_as == cashier_role)
-    if branch_id:
-        q = q.where(User.branch_id == branch_id)
-    res = await session.exec(q)
-    users = list(res.all())
-
     # Parse date; default today
     target_date = date.today()
     if date_str:
@@ -261,40 +286,40 @@ async def super_admin_pos_cashiers(
         except Exception:
             target_date = date.today()
 
-    week_start = target_date - timedelta(days=6)
+    # Any new completed sale changes the latest id and so misses the cache;
+    # refunds and roster edits show up once the short TTL runs out.
+    latest_q = select(BillingTransaction.id).where(BillingTransaction.status == "completed")
+    if branch_id:
+        latest_q = latest_q.where(BillingTransaction.branch_id == branch_id)
+    latest_res = await session.exec(
+        latest_q.order_by(BillingTransaction.created_at.desc(), BillingTransaction.id.desc()).limit(1)
+    )
+    cache_key = (branch_id or None, target_date, latest_res.first())
+    cached = _cashier_stats_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Cashier role_as is 6 in backend mapping.
+    cashier_role = 6
+    q = select(User).where(User.role_as == cashier_role)
+    if branch_id:
+        q = q.where(User.branch_id == branch_id)
+    res = await session.exec(q)
+    users = list(res.all())
 
     # Precompute branch names
     branches = await _list_branches(session)
     branch_name_by_id = {b["id"]: b["name"] for b in branches}
 
+    # One grouped pass over the week; today's figures are conditional sums.
+    stats_by_cashier: Dict[str, tuple] = {}
+    if users:
+        stats_res = await session.exec(cashier_stats_query([u.id for u in users], target_date, branch_id))
+        stats_by_cashier = {r[0]: tuple(r[1:]) for r in stats_res.all()}
+
     cashiers: List[Dict[str, Any]] = []
     for u in users:
-        today_filters = [
-            BillingTransaction.status == "completed",
-            BillingTransaction.cashier_id == u.id,
-            func.date(BillingTransaction.created_at) == target_date,
-        ]
-        if branch_id:
-            today_filters.append(BillingTransaction.branch_id == branch_id)
-
-        week_filters = [
-            BillingTransaction.status == "completed",
-            BillingTransaction.cashier_id == u.id,
-            func.date(BillingTransaction.created_at) >= week_start,
-            func.date(BillingTransaction.created_at) <= target_date,
-        ]
-        if branch_id:
-            week_filters.append(BillingTransaction.branch_id == branch_id)
-
-        today_count_res = await session.exec(select(func.count(BillingTransaction.id)).where(*today_filters))
-        today_sum_res = await session.exec(
-            select(func.coalesce(func.sum(BillingTransaction.net_amount), 0)).where(*today_filters)
-        )
-        week_count_res = await session.exec(select(func.count(BillingTransaction.id)).where(*week_filters))
-        week_sum_res = await session.exec(
-            select(func.coalesce(func.sum(BillingTransaction.net_amount), 0)).where(*week_filters)
-        )
-
+        today_count, today_total, week_count, week_total = stats_by_cashier.get(u.id, (0, 0, 0, 0))
         full_name = (f"{u.first_name or ''} {u.last_name or ''}").strip() or (u.username or u.email)
         cashiers.append(
             {
@@ -305,16 +330,18 @@ async def super_admin_pos_cashiers(
                 "branch_name": branch_name_by_id.get(u.branch_id or "", ""),
                 "is_active": bool(u.is_active),
                 "created_at": getattr(u, "created_at", None) and str(getattr(u, "created_at")),
-                "today_transactions": int(today_count_res.one() or 0),
-                "today_total": float(today_sum_res.one() or 0),
-                "week_transactions": int(week_count_res.one() or 0),
-                "week_total": float(week_sum_res.one() or 0),
+                "today_transactions": int(today_count or 0),
+                "today_total": float(today_total or 0),
+                "week_transactions": int(week_count or 0),
+                "week_total": float(week_total or 0),
                 "eod_completed": False,
                 "last_eod_date": None,
             }
         )
 
-    return {"cashiers": cashiers}
+    payload = {"cashiers": cashiers}
+    _cashier_stats_cache.set(cache_key, payload)
+    return payload
 
 
 @router.get("/analytics")
@@ -329,30 +356,26 @@ async def super_admin_pos_analytics(
     branches = await _list_branches(session)
     branch_name_by_id = {b["id"]: b["name"] for b in branches}
 
-    filters = [
-        BillingTransaction.status == "completed",
-        func.date(BillingTransaction.created_at) >= start_date,
-        func.date(BillingTransaction.created_at) <= end_date,
-    ]
+    # Served from the daily rollups maintained by POSService (see models/pos.py)
+    # rather than grouping raw transactions and line items for every request.
+    filters = [DailySalesRollup.sales_date >= start_date, DailySalesRollup.sales_date <= end_date]
     if branch_id:
-        filters.append(BillingTransaction.branch_id == branch_id)
+        filters.append(DailySalesRollup.branch_id == branch_id)
 
-    total_sales_res = await session.exec(
-        select(func.coalesce(func.sum(BillingTransaction.net_amount), 0)).where(*filters)
-    )
-    total_txn_res = await session.exec(select(func.count(BillingTransaction.id)).where(*filters))
-    total_sales = float(total_sales_res.one() or 0)
-    total_txns = int(total_txn_res.one() or 0)
+    sales_sum = func.coalesce(func.sum(DailySalesRollup.total_sales), 0)
+    txn_sum = func.coalesce(func.sum(DailySalesRollup.transaction_count), 0)
+
+    totals_res = await session.exec(select(sales_sum, txn_sum).where(*filters))
+    total_sales, total_txns = totals_res.one()
+    total_sales = float(total_sales or 0)
+    total_txns = int(total_txns or 0)
 
     daily_rows = await session.exec(
-        select(
-            func.date(BillingTransaction.created_at).label("day"),
-            func.coalesce(func.sum(BillingTransaction.net_amount), 0).label("sales"),
-            func.count(BillingTransaction.id).label("count"),
-        )
+        select(DailySalesRollup.sales_date, sales_sum, txn_sum)
         .where(*filters)
-        .group_by(func.date(BillingTransaction.created_at))
-        .order_by(func.date(BillingTransaction.created_at))
+        .group_by(DailySalesRollup.sales_date)
+        .having(txn_sum > 0)
+        .order_by(DailySalesRollup.sales_date)
     )
     daily_sales = [
         {"date": str(r[0]), "sales": float(r[1] or 0), "transactions": int(r[2] or 0)}
@@ -360,9 +383,9 @@ async def super_admin_pos_analytics(
     ]
 
     pay_rows = await session.exec(
-        select(BillingTransaction.payment_method, func.coalesce(func.sum(BillingTransaction.net_amount), 0))
+        select(DailySalesRollup.payment_method, sales_sum)
         .where(*filters)
-        .group_by(BillingTransaction.payment_method)
+        .group_by(DailySalesRollup.payment_method)
     )
     payment_trends = {"cash": 0.0, "card": 0.0, "online": 0.0, "qr": 0.0}
     for method, amount in pay_rows.all():
@@ -378,13 +401,10 @@ async def super_admin_pos_analytics(
             payment_trends["online"] += a
 
     bc_rows = await session.exec(
-        select(
-            BillingTransaction.branch_id,
-            func.coalesce(func.sum(BillingTransaction.net_amount), 0),
-            func.count(BillingTransaction.id),
-        )
+        select(DailySalesRollup.branch_id, sales_sum, txn_sum)
         .where(*filters)
-        .group_by(BillingTransaction.branch_id)
+        .group_by(DailySalesRollup.branch_id)
+        .having(txn_sum > 0)
     )
     branch_comparison = [
         {
@@ -396,25 +416,26 @@ async def super_admin_pos_analytics(
         for r in bc_rows.all()
     ]
 
-    tc_rows = await session.exec(
+    tc_rows = list((await session.exec(
         select(
-            BillingTransaction.cashier_id,
-            func.coalesce(func.sum(BillingTransaction.net_amount), 0),
-            func.count(BillingTransaction.id),
-            func.min(BillingTransaction.branch_id),
+            DailySalesRollup.cashier_id,
+            sales_sum,
+            txn_sum,
+            func.min(DailySalesRollup.branch_id),
         )
         .where(*filters)
-        .group_by(BillingTransaction.cashier_id)
-        .order_by(func.coalesce(func.sum(BillingTransaction.net_amount), 0).desc())
+        .group_by(DailySalesRollup.cashier_id)
+        .having(txn_sum > 0)
+        .order_by(sales_sum.desc())
         .limit(10)
-    )
-    cashier_ids = [str(r[0]) for r in tc_rows.all()]
+    )).all())
+    cashier_ids = [str(r[0]) for r in tc_rows]
     users = []
     if cashier_ids:
         users = list((await session.exec(select(User).where(User.id.in_(cashier_ids)))).all())
     user_by_id = {u.id: u for u in users}
     top_cashiers = []
-    for r in tc_rows.all():
+    for r in tc_rows:
         cashier_id = str(r[0])
         u = user_by_id.get(cashier_id)
         name = cashier_id
@@ -430,24 +451,18 @@ async def super_admin_pos_analytics(
             }
         )
 
-    tp_filters = [
-        BillingTransaction.status == "completed",
-        func.date(BillingTransaction.created_at) >= start_date,
-        func.date(BillingTransaction.created_at) <= end_date,
-    ]
+    tp_filters = [DailyProductRollup.sales_date >= start_date, DailyProductRollup.sales_date <= end_date]
     if branch_id:
-        tp_filters.append(BillingTransaction.branch_id == branch_id)
+        tp_filters.append(DailyProductRollup.branch_id == branch_id)
 
+    revenue_sum = func.coalesce(func.sum(DailyProductRollup.revenue), 0)
+    qty_sum = func.coalesce(func.sum(DailyProductRollup.quantity), 0)
     tp_rows = await session.exec(
-        select(
-            TransactionItem.description,
-            func.coalesce(func.sum(TransactionItem.quantity), 0),
-            func.coalesce(func.sum(TransactionItem.total), 0),
-        )
-        .join(BillingTransaction, BillingTransaction.id == TransactionItem.transaction_id)
+        select(DailyProductRollup.description, qty_sum, revenue_sum)
         .where(*tp_filters)
-        .group_by(TransactionItem.description)
-        .order_by(func.coalesce(func.sum(TransactionItem.total), 0).desc())
+        .group_by(DailyProductRollup.description)
+        .having(qty_sum > 0)
+        .order_by(revenue_sum.desc())
         .limit(10)
     )
     top_products = [
@@ -11,7 +11,7 @@ from app.core.database import get_session
 from app.models.user import User, UserCreate, UserRead, UserUpdate
 from app.models.patient import Patient
 from app.api.deps import get_current_active_superuser, get_current_user
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 from app.core.config import settings
 from app.services.sms_service import SmsService
 
@@ -107,7 +107,7 @@ async def create_user(
     branch_id = user_data.get("branch_id") if isinstance(user_data, dict) else None
     if getattr(user_in, "role_as", None) == 4 and not branch_id:
         raise HTTPException(status_code=400, detail="Nurse users must be assigned to a branch")
-    user = User(**user_data, hashed_password=get_password_hash(user_in.password))
+    user = User(**user_data, hashed_password=await hash_password(user_in.password))
 
     session.add(user)
     await session.commit()
@@ -221,7 +221,7 @@ async def register_patient_user(
     user = User(
         email=email,
         username=email,
-        hashed_password=get_password_hash(generated_password),
+        hashed_password=await hash_password(generated_password),
         role_as=5,
         is_active=True,
         first_name=payload.first_name,
@@ -336,7 +336,7 @@ async def update_user(
     if user_in.is_active is not None:
         user.is_active = user_in.is_active
     if user_in.password is not None:
-        user.hashed_password = get_password_hash(user_in.password)
+        user.hashed_password = await hash_password(user_in.password)
 
     if user_in.first_name is not None:
         user.first_name = user_in.first_name
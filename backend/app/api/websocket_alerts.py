@@ -3,53 +3,208 @@
 Channels:
   - low-stock-alerts: broadcast to branch-admin + super-admin when product stock < reorder_level
   - queue-updates: broadcast to receptionist when queue status changes
+  - pharmacy-queue: broadcast to pharmacists when a consultation enters or leaves the dispensing queue
+  - notifications: new in-app notifications, so clients need not poll /notifications/unread-count
 
-Native WebSocket replaces Pusher dependency.
+Native WebSocket replaces Pusher dependency.  With several uvicorn workers set
+WS_BROADCAST_BACKEND=unix so a broadcast raised in one worker reaches sockets
+held by the others (see app/core/broadcast.py).
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
+from collections import OrderedDict
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends, Query
+from fastapi.encoders import jsonable_encoder
 from typing import Optional
 import json
 import asyncio
+import logging
 from datetime import datetime, timezone
 
+from app.api.deps import user_from_token
+from app.core.broadcast import BroadcastBackend, get_broadcast_backend
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.user import User
+
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Pending messages with the same value for this field (and the same branch)
+# replace each other, so a slow client gets the latest state of each queue
+# entry / product, not every step.
+COALESCE_FIELDS = {
+    "queue-updates": "queue_number",
+    "pharmacy-queue": "consultation_id",
+    "low-stock-alerts": "product_name",
+}
+
+
+class Subscriber:
+    """One socket's subscription and its bounded queue of pending messages.
+
+    ``offer`` never awaits: a broadcast only queues, and each subscriber's
+    writer task does the actual sending, so a slow client delays nobody else.
+    """
+
+    def __init__(self, websocket: WebSocket, channel: str, branch_id: Optional[str], max_pending: int,
+                 user_id: Optional[str] = None, role_as: Optional[int] = None):
+        self.websocket = websocket
+        self.channel = channel
+        self.branch_id = branch_id
+        self.user_id = user_id
+        self.role_as = role_as
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.pending: OrderedDict = OrderedDict()
+        self.writer: Optional[asyncio.Task] = None
+        self.sending_since: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._seq = 0
+
+    def offer(self, data: dict, key=None):
+        if key is None:
+            self._seq += 1
+            key = ("seq", self._seq)
+        if key in self.pending:
+            self.pending[key] = data  # coalesce: newest data, original position
+        else:
+            if len(self.pending) >= self.max_pending:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+            self.pending[key] = data
+        self._wakeup.set()
+
+    async def run(self):
+        """Send queued messages until the socket fails (or the stall watchdog cancels us)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.pending:
+                _, data = self.pending.popitem(last=False)
+                self.sending_since = loop.time()
+                await self.websocket.send_json(data)
+                self.sending_since = None
 
 
 class ConnectionManager:
-    """Manages active WebSocket connections grouped by channel."""
+    """Manages this worker's WebSocket subscriptions keyed by (channel, branch_id).
+
+    Broadcasts go through the configured backend, which hands every message
+    (from this or any other worker) back to ``_deliver`` for local fan-out.
+    A message with a ``branch_id`` reaches that branch's subscribers and the
+    all-branch (``branch_id=None``) ones; a message without one reaches all.
+    A ``user_id`` narrows it to that user's sockets and a ``role_as`` to
+    sockets of users with that role.
+    """
 
-    def __init__(self):
-        self._connections: dict[str, list[WebSocket]] = {}  # channel -> [ws]
+    def __init__(self, backend: Optional[BroadcastBackend] = None):
+        self._channels: dict[str, dict[Optional[str], set[Subscriber]]] = {}  # channel -> branch -> subs
+        self._subscribers: dict[WebSocket, Subscriber] = {}
+        self._by_user: dict[str, set[Subscriber]] = {}
+        self._backend = backend or get_broadcast_backend()
+        self._started = False
 
-    async def connect(self, websocket: WebSocket, channel: str):
+    async def _ensure_started(self):
+        # Started lazily so each forked worker binds its own bus endpoint.
+        if not self._started:
+            self._started = True
+            self._watchdog = asyncio.create_task(self._drop_stalled())
+            self._backend.add_handler(self._deliver)
+            await self._backend.start()
+
+    async def connect(self, websocket: WebSocket, channel: str, branch_id: Optional[str] = None,
+                      user_id: Optional[str] = None, role_as: Optional[int] = None):
+        await self._ensure_started()
         await websocket.accept()
-        if channel not in self._connections:
-            self._connections[channel] = []
-        self._connections[channel].append(websocket)
+        sub = Subscriber(websocket, channel, branch_id, settings.WS_SEND_QUEUE_SIZE, user_id, role_as)
+        self._channels.setdefault(channel, {}).setdefault(branch_id, set()).add(sub)
+        self._subscribers[websocket] = sub
+        if user_id is not None:
+            self._by_user.setdefault(user_id, set()).add(sub)
+        sub.writer = asyncio.create_task(self._write(sub))
+
+    def disconnect(self, websocket: WebSocket, channel: Optional[str] = None):
+        sub = self._subscribers.pop(websocket, None)
+        if sub is None:
+            return
+        branches = self._channels.get(sub.channel, {})
+        subs = branches.get(sub.branch_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del branches[sub.branch_id]
+        user_subs = self._by_user.get(sub.user_id)
+        if user_subs is not None:
+            user_subs.discard(sub)
+            if not user_subs:
+                del self._by_user[sub.user_id]
+        if sub.writer and sub.writer is not asyncio.current_task():
+            sub.writer.cancel()
 
-    def disconnect(self, websocket: WebSocket, channel: str):
-        if channel in self._connections:
-            self._connections[channel] = [
-                ws for ws in self._connections[channel] if ws != websocket
-            ]
+    async def _close(self, sub: Subscriber):
+        # Dead or stalled client: drop it and close so its receive loop ends too.
+        self.disconnect(sub.websocket)
+        try:
+            await asyncio.wait_for(sub.websocket.close(code=1011), 1.0)
+        except Exception:
+            pass
+
+    async def _write(self, sub: Subscriber):
+        try:
+            await sub.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await self._close(sub)
+
+    async def _drop_stalled(self):
+        """Close sockets stuck in one send for longer than WS_SEND_TIMEOUT_SECONDS.
+
+        One sweep for all sockets instead of a timer per message keeps the
+        per-message cost of a large fan-out low.
+        """
+        timeout = settings.WS_SEND_TIMEOUT_SECONDS
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(max(timeout / 2, 0.1))
+            cutoff = loop.time() - timeout
+            stalled = [s for s in self._subscribers.values() if s.sending_since and s.sending_since < cutoff]
+            for sub in stalled:
+                logger.info("Closing websocket stalled for over %ss on %s", timeout, sub.channel)
+                await self._close(sub)
 
     async def broadcast(self, channel: str, data: dict):
-        """Broadcast a message to all connections on a channel."""
-        if channel not in self._connections:
+        """Broadcast a message to all connections on a channel, in every worker."""
+        await self._ensure_started()
+        await self._backend.publish(channel, data)
+
+    async def _deliver(self, channel: str, data: dict):
+        """Queue a message for this worker's matching subscribers."""
+        branches = self._channels.get(channel)
+        if not branches:
             return
-        dead = []
-        for ws in self._connections[channel]:
-            try:
-                await ws.send_json(data)
-            except Exception:
-                dead.append(ws)
-        for ws in dead:
-            self._connections[channel] = [
-                w for w in self._connections[channel] if w != ws
-            ]
+        branch_id = data.get("branch_id")
+        user_id = data.get("user_id")
+        if user_id is not None:
+            targets = [s for s in self._by_user.get(user_id, ()) if s.channel == channel]
+        elif branch_id is None:
+            targets = [s for subs in branches.values() for s in subs]
+        else:
+            targets = [*branches.get(branch_id, ()), *branches.get(None, ())]
+        role_as = data.get("role_as")
+        if role_as is not None:
+            targets = [s for s in targets if s.role_as == role_as]
+        field = COALESCE_FIELDS.get(channel)
+        key = (field, branch_id, data[field]) if field and data.get(field) is not None else None
+        for sub in targets:
+            sub.offer(data, key)
 
     async def send_personal(self, websocket: WebSocket, data: dict):
+        sub = self._subscribers.get(websocket)
+        if sub is not None:
+            sub.offer(data)
+            return
         try:
             await websocket.send_json(data)
         except Exception:
@@ -57,31 +212,60 @@ class ConnectionManager:
 
     def get_connection_count(self, channel: Optional[str] = None) -> int:
         if channel:
-            return len(self._connections.get(channel, []))
-        return sum(len(conns) for conns in self._connections.values())
+            return sum(len(subs) for subs in self._channels.get(channel, {}).values())
+        return len(self._subscribers)
 
 
 # Global manager instance
 manager = ConnectionManager()
 
 
+async def _resolve_subscription(token: Optional[str], branch_id: Optional[str]) -> tuple[User, Optional[str]]:
+    """Authenticate the socket's token; return the user and the branch they may subscribe to.
+
+    Super admins may pick any branch or all of them (None); everyone else is
+    held to their own branch.
+    """
+    async with async_session_factory() as session:
+        user = await user_from_token(session, token or "")
+    if user.role_as == 1:
+        return user, branch_id
+    if user.branch_id:
+        if branch_id and branch_id != user.branch_id:
+            raise HTTPException(403, "Not allowed to subscribe to this branch")
+        return user, user.branch_id
+    if not branch_id:
+        raise HTTPException(400, "branch_id is required")
+    return user, branch_id
+
+
 @router.websocket("/ws/alerts")
 async def websocket_alerts(
     websocket: WebSocket,
     channel: str = Query("general"),
     token: Optional[str] = Query(None),
+    branch_id: Optional[str] = Query(None),
 ):
     """WebSocket endpoint for real-time alerts.
 
-    Channels: low-stock-alerts, queue-updates, general
-    Auth: pass JWT as ?token=xxx query param (optional for now)
+    Channels: low-stock-alerts, queue-updates, pharmacy-queue, notifications, general
+    Auth: pass JWT as ?token=xxx query param (required)
+    Scope: ?branch_id= limits branch-tagged messages to one branch; defaults
+    to the user's own branch (all branches for super admins).
     """
-    await manager.connect(websocket, channel)
+    try:
+        user, branch_id = await _resolve_subscription(token, branch_id)
+    except HTTPException as exc:
+        await websocket.close(code=1008, reason=str(exc.detail))
+        return
+
+    await manager.connect(websocket, channel, branch_id, user.id, user.role_as)
     try:
         # Send welcome message
         await manager.send_personal(websocket, {
             "type": "connected",
             "channel": channel,
+            "branch_id": branch_id,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         })
 
@@ -130,16 +314,49 @@ async def broadcast_queue_update(queue_number: int, patient_name: str, status: s
     })
 
 
+async def broadcast_pharmacy_queue_update(
+    action: str, consultation_id: str, branch_id: str, entry: Optional[dict] = None
+):
+    """Called by consultation endpoints; action is added / updated / removed.
+
+    ``entry`` carries the same shape as one item of GET /consultation/pharmacy/queue.
+    """
+    await manager.broadcast("pharmacy-queue", {
+        "type": "pharmacy-queue",
+        "action": action,
+        "consultation_id": consultation_id,
+        "branch_id": branch_id,
+        "entry": jsonable_encoder(entry) if entry else None,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    })
+
+
+async def broadcast_notification(title: str, message: Optional[str] = None, *, user_id: Optional[str] = None,
+                                 role_as: Optional[int] = None, data: Optional[dict] = None):
+    """Tell connected clients about a new notification: one user's, one role's, or everyone's."""
+    await manager.broadcast("notifications", {
+        "type": "notification",
+        "title": title,
+        "message": message,
+        "user_id": user_id,
+        "role_as": role_as,
+        **(data or {}),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    })
+
+
 # ---- REST endpoint for status ----
 
 @router.get("/ws/status")
 async def websocket_status():
-    """Get WebSocket connection statistics."""
+    """Get WebSocket connection statistics for the worker answering the request."""
     return {
         "total_connections": manager.get_connection_count(),
         "channels": {
             "low-stock-alerts": manager.get_connection_count("low-stock-alerts"),
             "queue-updates": manager.get_connection_count("queue-updates"),
+            "pharmacy-queue": manager.get_connection_count("pharmacy-queue"),
+            "notifications": manager.get_connection_count("notifications"),
             "general": manager.get_connection_count("general"),
         }
     }
@@ -0,0 +1,190 @@
+"""
+Broadcast backends for fan-out across worker processes.
+
+A backend carries ``(channel, data)`` messages to every worker, and each
+worker passes them to every handler registered with ``add_handler`` (the
+websocket ConnectionManager, the principal cache, ...).  Publishing always
+delivers to the local worker as well.
+
+Backends (``settings.WS_BROADCAST_BACKEND``):
+  - memory: single process; publish calls the handler directly.
+  - unix:   every worker binds a datagram socket ``<WS_BUS_DIR>/<pid>.sock``
+            and publish sends one datagram to each peer socket it finds.
+            Works for any number of uvicorn workers on one host and needs no
+            broker process; sockets left by dead workers are removed on the
+            first failed send.
+
+Usage:
+    backend = get_broadcast_backend()     # shared by everything in this worker
+    backend.add_handler(deliver)          # deliver(channel, data) coroutine
+    await backend.start()
+    await backend.publish("queue-updates", {...})
+"""
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str, dict], Awaitable[None]]
+
+
+class BroadcastBackend(ABC):
+    def __init__(self):
+        self._handlers: List[Handler] = []
+        self._started = False
+
+    def add_handler(self, handler: Handler) -> None:
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    async def start(self) -> None:
+        """Idempotent; each worker starts its backend on first use."""
+        self._started = True
+
+    @abstractmethod
+    async def publish(self, channel: str, data: dict) -> None:
+        """Deliver *data* to every worker's handlers for *channel*."""
+
+    async def stop(self) -> None:
+        self._started = False
+
+    async def _dispatch(self, channel: str, data: dict) -> None:
+        for handler in self._handlers:
+            try:
+                await handler(channel, data)
+            except Exception:
+                logger.exception("Broadcast handler failed for %s", channel)
+
+
+class InProcessBackend(BroadcastBackend):
+    async def publish(self, channel: str, data: dict) -> None:
+        await self._dispatch(channel, data)
+
+
+class UnixSocketBus(BroadcastBackend):
+    MAX_DATAGRAM = 64 * 1024
+    PEER_REFRESH_SECONDS = 1.0
+    SEND_TIMEOUT_SECONDS = 1.0
+
+    def __init__(self, bus_dir: str):
+        super().__init__()
+        self.bus_dir = bus_dir
+        self.path = os.path.join(bus_dir, f"{os.getpid()}.sock")
+        self.dropped = 0
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._peers: List[str] = []
+        self._peers_at = 0.0
+
+    async def start(self) -> None:
+        if self._started:
+            return
+        await super().start()
+        os.makedirs(self.bus_dir, mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def publish(self, channel: str, data: dict) -> None:
+        payload = json.dumps({"channel": channel, "data": data}, default=str).encode()
+        if len(payload) > self.MAX_DATAGRAM:
+            logger.warning("Broadcast on %s is %d bytes; delivered locally only", channel, len(payload))
+        else:
+            for peer in list(self._peer_paths()):
+                await self._send(payload, peer)
+        await self._dispatch(channel, data)
+
+    async def _send(self, payload: bytes, peer: str) -> None:
+        deadline = None
+        while True:
+            try:
+                self._sock.sendto(payload, peer)
+                return
+            except BlockingIOError:
+                # Peer's queue is full: give it a moment to drain, then give up on it.
+                now = time.monotonic()
+                deadline = deadline or now + self.SEND_TIMEOUT_SECONDS
+                if now >= deadline:
+                    self.dropped += 1
+                    logger.warning("Broadcast bus peer %s is not draining; message dropped", peer)
+                    return
+                await asyncio.sleep(0.002)
+            except (ConnectionRefusedError, FileNotFoundError):
+                self._forget(peer)
+                return
+
+    def _peer_paths(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_at > self.PEER_REFRESH_SECONDS:
+            self._peers = [
+                os.path.join(self.bus_dir, name)
+                for name in os.listdir(self.bus_dir)
+                if name.endswith(".sock") and os.path.join(self.bus_dir, name) != self.path
+            ]
+            self._peers_at = now
+        return self._peers
+
+    def _forget(self, peer: str) -> None:
+        if peer in self._peers:
+            self._peers.remove(peer)
+        try:
+            os.unlink(peer)
+        except OSError:
+            pass
+
+    def _on_readable(self) -> None:
+        while self._sock is not None:
+            try:
+                payload = self._sock.recv(self.MAX_DATAGRAM)
+            except BlockingIOError:
+                return
+            try:
+                msg = json.loads(payload)
+            except ValueError:
+                continue
+            self._loop.create_task(self._dispatch(msg["channel"], msg["data"]))
+
+
+def create_broadcast_backend(name: Optional[str] = None) -> BroadcastBackend:
+    name = name or settings.WS_BROADCAST_BACKEND
+    if name == "memory":
+        return InProcessBackend()
+    if name == "unix":
+        return UnixSocketBus(settings.WS_BUS_DIR)
+    raise ValueError(f"Unknown WS_BROADCAST_BACKEND: {name!r}")
+
+
+_backend: Optional[BroadcastBackend] = None
+
+
+def get_broadcast_backend() -> BroadcastBackend:
+    """The worker-wide backend; one bus endpoint per process."""
+    global _backend
+    if _backend is None:
+        _backend = create_broadcast_backend()
+    return _backend
@@ -5,17 +5,80 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "HMS API"
     API_V1_STR: str = "/api/v1"
     DATABASE_URL: str
+    DB_ECHO: bool = False  # log every SQL statement; debugging only
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # below MySQL wait_timeout
+    DB_POOL_TIMEOUT_SECONDS: int = 30
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 600  # 10 hours
+    BCRYPT_ROUNDS: int = 12  # existing hashes with other rounds are upgraded on next login
+    PASSWORD_HASH_WORKERS: int = 2  # processes for bcrypt; 0 = threads in this process
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # authenticated user rows cached by get_current_user
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000  # revoked jtis before the filter is resized
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.01
+    TOKEN_BLACKLIST_PURGE_INTERVAL_SECONDS: int = 3600  # delete expired rows and rebuild the filter
     SMS_USER: str | None = None
     SMS_PASSWORD: str | None = None
     SMS_URL: str | None = None
     SMS_SENDER_ID: str | None = None
+    # The outbox dispatcher (app/services/sms_dispatcher.py); limits are per worker.
+    SMS_SEND_CONCURRENCY: int = 4
+    SMS_RATE_PER_SECOND: float = 10.0
+    SMS_BATCH_SIZE: int = 50  # outbox rows claimed (and their results written) at a time
+    SMS_MAX_ATTEMPTS: int = 5
+    SMS_RETRY_BASE_SECONDS: float = 5.0  # doubled per attempt
+    SMS_POLL_INTERVAL_SECONDS: float = 5.0
+    SMS_SEND_LEASE_SECONDS: int = 300  # a "sending" row older than this is retried
+    SMTP_HOST: str = "smtp.gmail.com"
+    SMTP_PORT: int = 587  # 465 = implicit TLS
+    SMTP_USE_TLS: bool = True  # STARTTLS on other ports
+    SMTP_USER: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_FROM_EMAIL: str = ""
+    SMTP_FROM_NAME: str = "HMS System"
+    # The email outbox dispatcher (app/services/email_dispatcher.py); limits are per worker.
+    SMTP_POOL_SIZE: int = 2  # long-lived authenticated SMTP sessions
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100  # reconnect after this many (servers cap it)
+    SMTP_IDLE_CHECK_SECONDS: int = 60  # NOOP a session idle this long before reusing it
+    EMAIL_RATE_PER_SECOND: float = 5.0
+    EMAIL_CAMPAIGN_RATE_PER_SECOND: float = 1.0  # bulk sends are spread out at this rate
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BASE_SECONDS: float = 30.0  # doubled per attempt
+    EMAIL_POLL_INTERVAL_SECONDS: float = 5.0
+    EMAIL_SEND_LEASE_SECONDS: int = 300
     PAYHERE_MERCHANT_ID: str = ""
     PAYHERE_MERCHANT_SECRET: str = ""
     PAYHERE_CURRENCY: str = "LKR"
     PAYHERE_SANDBOX: bool = True
+    AVAILABILITY_CACHE_TTL_SECONDS: int = 30
+    CASHIER_STATS_CACHE_TTL_SECONDS: int = 15
+    UNREAD_COUNT_CACHE_TTL_SECONDS: int = 300  # evicted on every change; the TTL only bounds missed events
+    UNREAD_COUNT_RECONCILE_INTERVAL_SECONDS: int = 3600  # recount unread notifications and repair drift
+    # "memory" for a single worker; "unix" relays websocket broadcasts between
+    # the uvicorn workers of one host through datagram sockets in WS_BUS_DIR.
+    WS_BROADCAST_BACKEND: str = "memory"
+    WS_BUS_DIR: str = "/tmp/hms-ws-bus"
+    WS_SEND_QUEUE_SIZE: int = 100  # pending messages per socket before the oldest is dropped
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0  # a socket that cannot take one message in this long is closed
+
+    # Chatbot interaction logs are buffered and inserted in batches; rows not
+    # yet inserted are journaled in CHAT_LOG_SPILL_DIR and replayed after a crash.
+    CHAT_LOG_BATCH_SIZE: int = 100
+    CHAT_LOG_FLUSH_INTERVAL_MS: int = 500
+    CHAT_LOG_SPILL_DIR: str = "/tmp/hms-chat-log"
+    CHAT_FEEDBACK_RECONCILE_INTERVAL_SECONDS: int = 3600  # apply feedback parked for a row not yet written
+
+    # Periodic maintenance jobs (app/core/scheduler.py, app/services/maintenance_jobs.py).
+    # Every worker runs the scheduler; a scheduled_job row lease picks the one that runs each job.
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_JITTER: float = 0.1  # +/- fraction applied to each check period
+    SLOT_LOCK_EXPIRY_INTERVAL_SECONDS: int = 60
+    SCHEDULE_SESSION_CLOSE_INTERVAL_SECONDS: int = 3600  # past sessions still "active" are completed
+    SALES_ROLLUP_REPAIR_INTERVAL_SECONDS: int = 86400  # rebuild yesterday's sales rollups
+    APPOINTMENT_REMINDER_INTERVAL_SECONDS: int = 900  # queue SMS reminders for tomorrow's appointments
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
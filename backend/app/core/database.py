@@ -1,20 +1,86 @@
+import threading
+import time
+
 from sqlmodel import SQLModel, create_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
 
+
+class PoolWaitStats:
+    """Time spent waiting for a pooled connection, for sizing the pool per worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_wait_stats.record(time.perf_counter() - start)
+        return conn
+
+
 # Async Engine (for FastAPI)
 async_engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
     future=True,
     pool_pre_ping=True,
+    poolclass=MeteredQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+)
+
+async_session_factory = sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
+
+def pool_status() -> dict:
+    """Snapshot of this worker's connection pool (each uvicorn worker has its own)."""
+    pool = async_engine.sync_engine.pool
+    stats = pool_wait_stats
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "avg_wait_ms": round(stats.total_wait_seconds * 1000 / stats.checkouts, 3) if stats.checkouts else 0.0,
+        "max_wait_ms": round(stats.max_wait_seconds * 1000, 3),
+    }
+
+
 async def get_session() -> AsyncSession:
-    async_session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+    async with async_session_factory() as session:
         yield session
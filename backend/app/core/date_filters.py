@@ -0,0 +1,36 @@
+"""
+Index-friendly date filters for timestamp columns.
+
+``func.date(Model.created_at) == some_day`` wraps the column in a function, so
+MySQL cannot use an index on ``created_at`` and scans the whole table.  These
+helpers express the same conditions as half-open ranges on the raw column.
+
+Usage:
+    from app.core.date_filters import on_date, between_dates
+
+    q = select(BillingTransaction).where(on_date(BillingTransaction.created_at, date.today()))
+    q = q.where(between_dates(BillingTransaction.created_at, from_date, to_date))
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, true
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def on_date(column, day: date):
+    """``column`` falls on ``day``: day 00:00 <= column < next day 00:00."""
+    return and_(column >= day_start(day), column < day_start(day + timedelta(days=1)))
+
+
+def between_dates(column, start: Optional[date] = None, end: Optional[date] = None):
+    """``column`` falls on any day from ``start`` to ``end`` inclusive; either bound may be omitted."""
+    conditions = []
+    if start is not None:
+        conditions.append(column >= day_start(start))
+    if end is not None:
+        conditions.append(column < day_start(end + timedelta(days=1)))
+    return and_(*conditions) if conditions else true()
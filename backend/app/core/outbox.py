@@ -0,0 +1,235 @@
+"""
+Outbox dispatchers: deliver queued rows in the background with bounded
+concurrency, a rate limit and retries.
+
+An outbox model needs ``id``, ``status`` (pending / sending / sent / failed),
+``attempts``, ``next_attempt_at`` (naive UTC), ``claim_token`` and ``sent_at``
+columns, and an index on (status, next_attempt_at).  A dispatcher, one per
+worker process:
+
+* claims up to ``batch_size`` due rows at a time with a conditional UPDATE, so
+  two workers never claim the same row; the claim is a lease, renewed every
+  third of ``lease_seconds`` while the batch is delivered, and rows whose
+  worker died are retried once it lapses;
+* delivers them with at most ``concurrency`` in flight and no more than
+  ``rate_per_second`` started;
+* retries transient failures with exponential backoff up to ``max_attempts``;
+* writes the batch's results in one statement per set of columns, only to
+  rows that still carry its claim token (a worker whose lease lapsed anyway
+  cannot overwrite the results of the worker that took the rows over).
+
+Subclasses set ``model`` and implement ``deliver``.
+
+Usage:
+    from app.core.outbox import Delivery, OutboxDispatcher
+
+    class SmsDispatcher(OutboxDispatcher):
+        model = SmsLog
+
+        async def deliver(self, row) -> Delivery:
+            ...
+            return Delivery("sent", {"provider_response": resp.text})
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import uuid4
+
+from sqlalchemy import bindparam, update
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces calls to ``acquire`` at least 1/rate seconds apart."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+@dataclass
+class Delivery:
+    """Outcome of one attempt: "sent", "retry" (transient) or "failed" (final), plus columns to store."""
+    outcome: str
+    columns: dict = field(default_factory=dict)
+
+
+class OutboxDispatcher(ABC):
+    model = None
+
+    def __init__(self, concurrency: int, rate_per_second: float, batch_size: int, max_attempts: int,
+                 retry_base_seconds: float, poll_interval: float, lease_seconds: int):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._limiter = RateLimiter(rate_per_second)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    @abstractmethod
+    async def deliver(self, row) -> Delivery:
+        """Send one claimed row and report the outcome."""
+
+    async def close_transport(self) -> None:
+        """Release pooled connections (called by ``close``)."""
+
+    def wake(self) -> None:
+        """Start the dispatcher if needed and have it look for due rows now."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+    async def close(self) -> None:
+        """Stop polling and release connections (on shutdown); claimed rows are retried after their lease."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.close_transport()
+
+    async def _run(self) -> None:
+        name = self.model.__tablename__
+        while True:
+            try:
+                claimed = await self.dispatch_once()
+            except Exception:
+                logger.exception("Dispatching %s failed", name)
+                claimed = 0
+            if claimed:
+                continue  # more may be due
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dispatch_once(self) -> int:
+        """Claim one batch of due rows, deliver them and record the results; returns rows claimed."""
+        from app.core.database import async_session_factory
+
+        async with async_session_factory() as session:
+            rows = await self._claim(session)
+            if not rows:
+                return 0
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+            token = rows[0].claim_token
+            delivered = asyncio.Event()
+            renewing = asyncio.get_running_loop().create_task(self._renew_lease(session, token, delivered))
+            try:
+                results = await asyncio.gather(*(self._attempt(row) for row in rows))
+            finally:
+                delivered.set()
+                await renewing
+            await self._record(session, token, results)
+        return len(rows)
+
+    async def _claim(self, session: AsyncSession) -> List:
+        model = self.model
+        now = datetime.utcnow()
+        due = (col(model.status).in_(("pending", "sending")), model.next_attempt_at <= now)
+        ids = (await session.exec(
+            select(model.id).where(*due).order_by(model.next_attempt_at).limit(self.batch_size)
+        )).all()
+        if not ids:
+            await session.commit()
+            return []
+        token = str(uuid4())
+        await session.exec(
+            update(model)
+            .where(col(model.id).in_(ids), *due)
+            .values(status="sending", claim_token=token, next_attempt_at=now + timedelta(seconds=self.lease_seconds))
+        )
+        await session.commit()
+        return list((await session.exec(select(model).where(model.claim_token == token))).all())
+
+    async def _renew_lease(self, session: AsyncSession, token: str, delivered: asyncio.Event) -> None:
+        """Keep the claim's lease ahead of the clock until the batch has been delivered."""
+        model = self.model
+        while True:
+            try:
+                await asyncio.wait_for(delivered.wait(), self.lease_seconds / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await session.exec(
+                    update(model)
+                    .where(model.claim_token == token, model.status == "sending")
+                    .values(next_attempt_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                )
+                await session.commit()
+            except Exception:
+                logger.exception("Renewing the %s lease failed", model.__tablename__)
+                await session.rollback()
+
+    async def _record(self, session: AsyncSession, token: str, results: List[dict]) -> None:
+        """Write the results of rows still claimed by ``token``."""
+        table = self.model.__table__
+        groups = {}
+        for result in results:
+            groups.setdefault(frozenset(result), []).append(result)
+        written = 0
+        for group in groups.values():
+            stmt = update(table).where(table.c.id == bindparam("b_id"), table.c.claim_token == token)
+            params = [{"b_id": r["id"], **{k: v for k, v in r.items() if k != "id"}} for r in group]
+            written += (await session.exec(stmt, params=params)).rowcount
+        await session.commit()
+        if written < len(results):
+            logger.warning("%d %s rows were re-claimed before their results were written",
+                           len(results) - written, table.name)
+
+    async def _attempt(self, row) -> dict:
+        """Deliver one claimed row; returns its column updates."""
+        attempts = row.attempts + 1
+        async with self._semaphore:
+            await self._limiter.acquire()
+            try:
+                delivery = await self.deliver(row)
+            except Exception:
+                logger.exception("Delivering %s %s failed", self.model.__tablename__, row.id)
+                delivery = Delivery("retry", {})
+        result = {"id": row.id, "attempts": attempts, "claim_token": None, **delivery.columns}
+        if delivery.outcome == "sent":
+            self.sent += 1
+            return {**result, "status": "sent", "sent_at": datetime.utcnow()}
+        if delivery.outcome == "retry" and attempts < self.max_attempts:
+            self.retried += 1
+            delay = self.retry_base_seconds * 2 ** (attempts - 1)
+            return {**result, "status": "pending", "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay)}
+        self.failed += 1
+        return {**result, "status": "failed"}
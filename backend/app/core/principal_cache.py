@@ -0,0 +1,117 @@
+"""
+Authenticated-principal cache for ``deps.user_from_token``.
+
+Caches each user's row (as a dict) by id for PRINCIPAL_CACHE_TTL_SECONDS so an
+authenticated request does not need a ``SELECT user`` before its real work.
+
+Any committed ORM change to a ``User`` (profile edits, toggle_active,
+password changes, branch assignment, deletes, ...) evicts that user here and,
+through the broadcast backend, in every other worker.  Writes that bypass the
+ORM are picked up when the entry expires.
+"""
+import asyncio
+from typing import Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.broadcast import get_broadcast_backend
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.user import User
+
+INVALIDATE_CHANNEL = "_principal-invalidate"
+
+principal_cache = TTLCache(ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS, max_entries=50000)
+
+# Bumped on every invalidation so a load that raced with one is not cached.
+_generation = 0
+
+
+def generation() -> int:
+    return _generation
+
+
+def get_cached_user(session: AsyncSession, user_id: str) -> Optional[User]:
+    """Return the cached user attached to *session* as a persistent instance, or None.
+
+    Attaching (rather than returning a loose copy) keeps route code that edits
+    ``current_user`` and commits, or re-reads it with ``session.get``, working
+    exactly as with a freshly loaded row.
+    """
+    data = principal_cache.get(user_id)
+    if data is None:
+        return None
+    existing = session.sync_session.identity_map.get((User, (user_id,), None))
+    if existing is not None:
+        return existing
+    user = User(**data)
+    make_transient_to_detached(user)
+    session.add(user)
+    return user
+
+
+def cache_user(user: User, loaded_at_generation: int) -> None:
+    """Cache *user* unless some user was invalidated since it was loaded."""
+    if loaded_at_generation == _generation:
+        principal_cache.set(user.id, user.model_dump())
+
+
+def invalidate_users(user_ids: Set[str]) -> None:
+    global _generation
+    _generation += 1
+    for user_id in user_ids:
+        principal_cache.invalidate(user_id)
+
+
+async def _on_broadcast(channel: str, data: dict) -> None:
+    if channel == INVALIDATE_CHANNEL:
+        invalidate_users(set(data.get("user_ids", ())))
+
+
+async def ensure_listening() -> None:
+    """Join the broadcast bus so other workers' invalidations reach this cache.
+
+    Called before the first entry is cached; a worker that caches nothing has
+    nothing to invalidate.
+    """
+    backend = get_broadcast_backend()
+    backend.add_handler(_on_broadcast)
+    await backend.start()
+
+
+async def _publish(user_ids: Set[str]) -> None:
+    await ensure_listening()
+    await get_broadcast_backend().publish(INVALIDATE_CHANNEL, {"user_ids": sorted(user_ids)})
+
+
+# ---- ORM hooks ----
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    changed = session.info.setdefault("principal_invalidations", set())
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).modified:
+            changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_users(session: Session) -> None:
+    changed = session.info.pop("principal_invalidations", None)
+    if not changed:
+        return
+    invalidate_users(changed)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # sync script: nothing else in this process to tell
+    loop.create_task(_publish(changed))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop("principal_invalidations", None)
@@ -0,0 +1,77 @@
+"""
+Counter rollup tables: add deltas to a keyed row with one native upsert.
+
+Used for the daily sales rollups, the chatbot log stats and the unread
+notification counters.  The rollup
+model needs a string ``id`` primary key, a unique constraint over the key
+columns and an ``updated_at`` column.
+
+Usage:
+    from app.core.rollups import bump_rollup
+
+    await bump_rollup(session, DailySalesRollup, {"branch_id": ..., "sales_date": ...},
+                      {"transaction_count": 1, "total_sales": 120.0})
+"""
+import uuid
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def _upsert(dialect: str, table, values, key_cols, delta_cols, now):
+    """Native "insert or add the deltas" statement for *values*, or None if the dialect has none."""
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(values)
+        return stmt.on_duplicate_key_update(
+            updated_at=now, **{c: table.c[c] + stmt.inserted[c] for c in delta_cols}
+        )
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(table).values(values)
+        return stmt.on_conflict_do_update(
+            index_elements=list(key_cols),
+            set_={"updated_at": now, **{c: table.c[c] + stmt.excluded[c] for c in delta_cols}},
+        )
+    return None
+
+
+async def bump_rollup(session: AsyncSession, model, key: dict, deltas: dict) -> None:
+    """Add *deltas* to the rollup row identified by *key*, creating it if missing.
+
+    Uses a single native upsert where the dialect has one so concurrent
+    writers on the same key never lose an increment.
+    """
+    table = model.__table__
+    now = datetime.utcnow()
+    values = {"id": str(uuid.uuid4()), **key, **deltas, "updated_at": now}
+    stmt = _upsert(session.get_bind().dialect.name, table, values, key, deltas, now)
+    if stmt is None:
+        match = [table.c[k] == v for k, v in key.items()]
+        res = await session.exec(
+            update(table).where(*match).values(updated_at=now, **{c: table.c[c] + d for c, d in deltas.items()})
+        )
+        if res.rowcount:
+            return
+        stmt = insert(table).values(**values)
+    await session.exec(stmt)
+
+
+async def bump_rollups(session: AsyncSession, model, bumps: List[Tuple[dict, dict]]) -> None:
+    """Apply many ``(key, deltas)`` bumps, as one multi-row upsert where the dialect allows.
+
+    Every bump must use the same key and delta columns, and no key may repeat.
+    """
+    if not bumps:
+        return
+    key_cols, delta_cols = list(bumps[0][0]), list(bumps[0][1])
+    now = datetime.utcnow()
+    values = [{"id": str(uuid.uuid4()), **key, **deltas, "updated_at": now} for key, deltas in bumps]
+    stmt = _upsert(session.get_bind().dialect.name, model.__table__, values, key_cols, delta_cols, now)
+    if stmt is None:
+        for key, deltas in bumps:
+            await bump_rollup(session, model, key, deltas)
+        return
+    await session.exec(stmt)
@@ -0,0 +1,205 @@
+"""
+Periodic background jobs, run by whichever worker claims them.
+
+Every worker process starts the same ``Scheduler`` from the FastAPI lifespan
+and checks each job about once a minute (``SCHEDULER_JITTER`` spreads the
+checks so workers do not wake in step).  A job runs only after a worker claims
+its ``scheduled_job`` row with a conditional UPDATE; the claim succeeds when
+the job is due (``last_started_at`` older than its interval) and nobody holds
+an unexpired lease, so one worker runs each occurrence however many are up.
+A worker that dies mid-run leaves a lease that expires after ``lease_seconds``
+(default: the interval), and the job is picked up again.
+
+Jobs therefore run at most once per interval, but may run again after a crash
+or a late lease: write them to be idempotent (set-based statements that are
+safe to repeat, claims on the rows they act on).  The row records the last
+run's timing, status and result, and each worker keeps its own run metrics
+(``stats``); both are served at /api/v1/internal/scheduler.
+
+Usage:
+    from app.core.scheduler import scheduler
+
+    @scheduler.job("slot-lock-expiry", interval_seconds=60)
+    async def expire_slot_locks(session: AsyncSession) -> int:
+        return await DoctorScheduleService.release_expired_locks(session)
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.scheduled_job import ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[AsyncSession], Awaitable[object]]
+
+MAX_CHECK_SECONDS = 60
+
+
+@dataclass
+class Job:
+    name: str
+    func: JobFunc
+    interval_seconds: float
+    lease_seconds: float
+    runs: int = 0
+    failures: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: Optional[float] = None
+    last_result: object = None
+    last_error: Optional[str] = None
+
+    def metrics(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_ms": self.last_ms,
+            "avg_ms": round(self.total_ms / self.runs, 1) if self.runs else None,
+            "max_ms": self.max_ms if self.runs else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+@dataclass
+class Scheduler:
+    jitter: float = 0.1
+    holder: str = field(default_factory=lambda: f"{socket.gethostname()}:{os.getpid()}"[:100])
+    jobs: Dict[str, Job] = field(default_factory=dict)
+    _tasks: List[asyncio.Task] = field(default_factory=list)
+
+    def job(self, name: str, interval_seconds: float, lease_seconds: Optional[float] = None):
+        """Register ``func(session)`` to run every ``interval_seconds`` on one worker."""
+        def register(func: JobFunc) -> JobFunc:
+            self.jobs[name] = Job(name, func, interval_seconds, lease_seconds or interval_seconds)
+            return func
+        return register
+
+    async def start(self) -> None:
+        """Create missing job rows and start checking every job (called once per worker)."""
+        from app.core.database import async_session_factory
+
+        if self._tasks:
+            return
+        async with async_session_factory() as session:
+            existing = set((await session.exec(select(ScheduledJob.name))).all())
+            missing = [name for name in self.jobs if name not in existing]
+            if missing:
+                session.add_all([ScheduledJob(name=name) for name in missing])
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    await session.rollback()  # another worker created them first
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._loop(job)) for job in self.jobs.values()]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "holder": self.holder,
+            "running": any(not task.done() for task in self._tasks),
+            "jobs": {name: job.metrics() for name, job in self.jobs.items()},
+        }
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _loop(self, job: Job) -> None:
+        check_every = min(job.interval_seconds, MAX_CHECK_SECONDS)
+        await asyncio.sleep(random.uniform(0, check_every))  # stagger workers and jobs
+        while True:
+            try:
+                await self.run_if_due(job)
+            except Exception:
+                logger.exception("Scheduling job %s failed", job.name)
+            await asyncio.sleep(self._jittered(check_every))
+
+    async def run_if_due(self, job: Job) -> bool:
+        """Claim ``job`` if it is due and unleased, run it and record the outcome; returns whether it ran."""
+        from app.core.database import async_session_factory
+
+        async with async_session_factory() as session:
+            if not await self._claim(session, job):
+                return False
+
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            async with async_session_factory() as session:
+                result = await job.func(session)
+        except Exception as e:
+            logger.exception("Scheduled job %s failed", job.name)
+            error = (str(e) or type(e).__name__)[:500]
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        job.runs += 1
+        job.total_ms += elapsed_ms
+        job.max_ms = max(job.max_ms, elapsed_ms)
+        job.last_ms, job.last_result, job.last_error = elapsed_ms, result, error
+        if error:
+            job.failures += 1
+
+        async with async_session_factory() as session:
+            await session.exec(
+                update(ScheduledJob)
+                .where(ScheduledJob.name == job.name, ScheduledJob.holder == self.holder)
+                .values(
+                    holder=None,
+                    lease_expires_at=None,
+                    last_finished_at=datetime.utcnow(),
+                    last_duration_ms=elapsed_ms,
+                    last_status="failed" if error else "ok",
+                    last_error=error,
+                    last_result=None if result is None else str(result)[:500],
+                    run_count=ScheduledJob.run_count + 1,
+                    failure_count=ScheduledJob.failure_count + (1 if error else 0),
+                )
+            )
+            await session.commit()
+        return True
+
+    async def _claim(self, session: AsyncSession, job: Job) -> bool:
+        now = datetime.utcnow()
+        # Checks are jittered, so accept a run that is up to ``jitter`` early.
+        due_before = now - timedelta(seconds=job.interval_seconds * (1 - self.jitter))
+        result = await session.exec(
+            update(ScheduledJob)
+            .where(
+                ScheduledJob.name == job.name,
+                or_(ScheduledJob.lease_expires_at == None, ScheduledJob.lease_expires_at <= now),  # noqa: E711
+                or_(ScheduledJob.last_started_at == None, ScheduledJob.last_started_at <= due_before),  # noqa: E711
+            )
+            .values(
+                holder=self.holder,
+                lease_expires_at=now + timedelta(seconds=job.lease_seconds),
+                last_started_at=now,
+            )
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+
+scheduler = Scheduler(jitter=settings.SCHEDULER_JITTER)
@@ -1,10 +1,17 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt", "pbkdf2_sha256"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt", "pbkdf2_sha256"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
@@ -15,6 +22,65 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password or "")
+    except (ValueError, TypeError):
+        return False, None
+
+
+# ---- Async hashing ----
+# bcrypt costs 200-300 ms of CPU per call; running it on the event loop stalls
+# every other request on the worker.  Request handlers use these coroutines,
+# which run the work in a small process pool.  Scripts may keep the sync API.
+
+_hash_executor: Optional[Executor] = None
+_hash_slots: Optional[asyncio.Semaphore] = None
+
+
+def _executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_WORKERS > 0:
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="password-hash")
+    return _hash_executor
+
+
+async def _run_hashing(fn, *args):
+    global _hash_slots
+    if _hash_slots is None:
+        # Bounds work queued behind the pool so a login storm cannot pile up unboundedly.
+        _hash_slots = asyncio.Semaphore(max(settings.PASSWORD_HASH_WORKERS, 1) * 8)
+    async with _hash_slots:
+        return await asyncio.get_running_loop().run_in_executor(_executor(), fn, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def check_password_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; the second item is a fresh hash when the stored one uses
+    outdated parameters (scheme or BCRYPT_ROUNDS), else None."""
+    return await _run_hashing(_verify_and_update, plain_password, hashed_password)
+
+
+def shutdown_password_hashing() -> None:
+    global _hash_executor, _hash_slots
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+    _hash_executor = None
+    _hash_slots = None
+
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -0,0 +1,79 @@
+"""
+Small in-process TTL cache for read-heavy endpoints.
+
+Values live for ``ttl_seconds`` and are shared by every request served by this
+worker.  Callers put whatever identifies the underlying data's version in the
+key (e.g. the latest row id) so a changed version is simply a cache miss.
+
+Usage:
+    from app.core.ttl_cache import TTLCache
+
+    _stats_cache = TTLCache(ttl_seconds=15)
+
+    cached = _stats_cache.get(key)
+    if cached is None:
+        cached = await compute()
+        _stats_cache.set(key, cached)
+"""
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store *value* for ``ttl_seconds`` (the cache default when not given)."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        if len(self._entries) >= self.max_entries:
+            self._evict()
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every entry whose key satisfies *predicate*."""
+        for key in [k for k in self._entries if predicate(k)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            # Still full: drop the oldest half (dicts keep insertion order).
+            for key in list(self._entries)[: self.max_entries // 2]:
+                del self._entries[key]
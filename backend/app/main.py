@@ -1,3 +1,5 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends, HTTPException
 from datetime import datetime
 from app.api import auth, users, branches, doctors, patients, receptionist, pharmacies, pharmacist, super_admin, nurse, staff, appointments, schedules, uploads
@@ -13,13 +15,55 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.database import get_session
 from app.models.user import User
-from app.api.deps import get_current_user
+from app.api.deps import get_current_active_superuser, get_current_user
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.database import async_session_factory
+    from app.core.scheduler import scheduler
+    from app.core.security import shutdown_password_hashing
+    from app.services import maintenance_jobs  # noqa: F401  (registers the jobs)
+    from app.services.chat_log_writer import chat_log_writer
+    from app.services.disease_matcher import disease_matcher
+    from app.services.email_dispatcher import email_dispatcher
+    from app.services.faq_index import faq_index
+    from app.services.sms_dispatcher import sms_dispatcher
+    from app.services.token_revocation import revocation_filter
+
+    if settings.SCHEDULER_ENABLED:
+        await scheduler.start()
+    try:
+        await revocation_filter.load()
+    except Exception:
+        logger.exception("Loading the token revocation filter at startup failed")
+    # Build the chatbot indexes before serving, so no chat message pays for the
+    # load; if this fails they are built on the first message instead.
+    try:
+        async with async_session_factory() as session:
+            await faq_index.ensure_current(session)
+            await disease_matcher.ensure_current(session)
+    except Exception:
+        logger.exception("Building the chatbot indexes at startup failed")
+    # Pick up outbox rows left pending or leased by a previous process.
+    sms_dispatcher.wake()
+    email_dispatcher.wake()
+    yield
+    await scheduler.stop()
+    await chat_log_writer.close()
+    await sms_dispatcher.close()
+    await email_dispatcher.close()
+    shutdown_password_hashing()
+
+
 app = FastAPI(
     title="HMS API",
     description="Hospital Management System API with FastAPI and MySQL",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 from fastapi.exceptions import RequestValidationError
@@ -82,6 +126,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 @app.middleware("http")
@@ -748,16 +793,16 @@ async def change_pw_alias(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(_get_current_user),
 ):
-    from app.core.security import verify_password as _vp, get_password_hash as _gph
+    from app.core.security import check_password as _vp, hash_password as _gph
     body = await request.json()
     user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if current_user.id != user_id and current_user.role_as != 1:
         raise HTTPException(status_code=403, detail="Not authorized")
-    if not _vp(body.get("current_password", ""), user.hashed_password):
+    if not await _vp(body.get("current_password", ""), user.hashed_password):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
-    user.hashed_password = _gph(body["new_password"])
+    user.hashed_password = await _gph(body["new_password"])
     session.add(user)
     await session.commit()
     return {"status": 200, "message": "Password changed successfully"}
@@ -783,3 +828,45 @@ async def health_check():
         health_status["database"] = f"error: {str(e)}"
 
     return health_status
+
+
+@app.get("/api/v1/internal/db-pool")
+async def db_pool_metrics(current_user: User = Depends(get_current_active_superuser)):
+    """Connection pool usage for this worker process, for sizing DB_POOL_* settings."""
+    from app.core.database import pool_status
+
+    return {"pid": os.getpid(), **pool_status()}
+
+
+@app.get("/api/v1/internal/auth-cache")
+async def auth_cache_metrics(current_user: User = Depends(get_current_active_superuser)):
+    """Hit rate of this worker's authenticated-user cache (PRINCIPAL_CACHE_TTL_SECONDS)
+    and size of its refresh-token revocation filter."""
+    from app.core.principal_cache import principal_cache
+    from app.services.token_revocation import revocation_filter
+
+    return {
+        "pid": os.getpid(),
+        "ttl_seconds": principal_cache.ttl_seconds,
+        **principal_cache.stats(),
+        "token_revocation": revocation_filter.stats(),
+    }
+
+
+@app.get("/api/v1/internal/scheduler")
+async def scheduler_metrics(
+    current_user: User = Depends(get_current_active_superuser),
+    session: AsyncSession = Depends(get_session),
+):
+    """Last run of every scheduled job (whichever worker ran it) and this worker's run metrics."""
+    from sqlmodel import select
+    from app.core.scheduler import scheduler
+    from app.models.scheduled_job import ScheduledJob
+
+    rows = (await session.exec(select(ScheduledJob).order_by(ScheduledJob.name))).all()
+    return {
+        "pid": os.getpid(),
+        "enabled": settings.SCHEDULER_ENABLED,
+        "jobs": [row.model_dump() for row in rows],
+        "local": scheduler.stats(),
+    }
@@ -83,8 +83,10 @@ from .pharmacy_inventory import (
 )
 from .notification import (
     Notification,
+    NotificationBroadcast,
     NotificationCreate,
     NotificationRead,
+    NotificationUnreadCounter,
 )
 from .nurse_domain import (
     VitalSign,
@@ -101,6 +103,8 @@ from .pos import (
     TransactionItem,
     TransactionItemCreate,
     TransactionItemRead,
+    DailySalesRollup,
+    DailyProductRollup,
     CashRegister,
     CashRegisterCreate,
     CashRegisterRead,
@@ -206,6 +210,8 @@ from .chatbot import (
     ChatbotLog,
     ChatbotLogCreate,
     ChatbotLogRead,
+    ChatbotLogStats,
+    ChatbotPendingFeedback,
     DiseaseMapping,
     DiseaseMappingCreate,
     DiseaseMappingRead,
@@ -215,6 +221,11 @@ from .sms_log import (
     SmsLogCreate,
     SmsLogRead,
 )
+from .email_outbox import (
+    EmailOutbox,
+    EmailOutboxRead,
+)
+from .scheduled_job import ScheduledJob
 
 from .doctor_main_question import (
     DoctorMainQuestion,
@@ -237,3 +248,4 @@ from .website import (
     ContactMessageCreate,
     ContactMessageRead,
 )
+from .patient_search import PatientSearchEntry
@@ -2,7 +2,7 @@ from typing import Optional
 from datetime import date, time, datetime
 from uuid import uuid4
 from sqlmodel import Field, Relationship, SQLModel, Column
-from sqlalchemy import Text
+from sqlalchemy import Computed, Index, Integer, Text, UniqueConstraint
 from app.models.patient import Patient
 from app.models.doctor import Doctor
 from app.models.branch import Branch
@@ -37,10 +37,37 @@ class AppointmentBase(SQLModel):
     original_appointment_date: Optional[datetime] = Field(default=None)
     nurse_assessment_status: Optional[str] = Field(default=None, max_length=20)  # null / completed
 
+# 1 while the appointment holds its slot, NULL once cancelled (NULLs never collide in a unique index).
+ACTIVE_SLOT_SQL = "CASE WHEN status = 'cancelled' THEN NULL ELSE 1 END"
+
+
 class Appointment(AppointmentBase, table=True):
+    __table_args__ = (
+        # At most one active appointment per doctor and slot: a partial unique
+        # index, spelled with a generated column because MySQL has no partial indexes.
+        UniqueConstraint("doctor_id", "appointment_date", "appointment_time", "active_slot",
+                         name="uq_appointment_active_slot"),
+        # Booking conflict checks and availability (doctor + day, or a day range).
+        Index("ix_appointment_doctor_date_time_status", "doctor_id", "appointment_date", "appointment_time", "status"),
+        # Session queues, listed in time order.
+        Index("ix_appointment_session_time", "schedule_session_id", "appointment_time"),
+        # Day lists sorted by time, and the super admin list (date desc, time desc).
+        Index("ix_appointment_date_time", "appointment_date", "appointment_time"),
+        # Receptionist walk-in counts for a day.
+        Index("ix_appointment_date_walk_in", "appointment_date", "is_walk_in"),
+        # Status counts: pending overall, completed today, no-shows over a range.
+        Index("ix_appointment_status_date", "status", "appointment_date"),
+    )
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    # Bumped on every ORM or Core update; the consultation queue ETag relies on it.
+    updated_at: Optional[datetime] = Field(
+        default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
+    reminder_sent_at: Optional[datetime] = Field(default=None)  # set when the day-before reminder is queued
+    active_slot: Optional[int] = Field(
+        default=None, sa_column=Column(Integer, Computed(ACTIVE_SLOT_SQL, persisted=True), nullable=True)
+    )
 
     # Relationships
     patient: Optional[Patient] = Relationship()
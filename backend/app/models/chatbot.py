@@ -70,6 +70,28 @@ class ChatbotLogCreate(ChatbotLogBase):
     pass
 
 
+class ChatbotLogStats(SQLModel, table=True):
+    """Interaction counters per detected category, maintained as logs are written
+    and feedback arrives; ``ChatbotService.get_analytics`` reads these."""
+    __tablename__ = "chatbot_log_stats"
+    __table_args__ = (sa.UniqueConstraint("category", name="uq_chatbot_log_stats_category"),)
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, max_length=36)
+    category: str = Field(max_length=100)  # "" for logs without a category
+    total: int = Field(default=0)
+    helpful: int = Field(default=0)
+    not_helpful: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ChatbotPendingFeedback(SQLModel, table=True):
+    """Feedback that arrived before its log row was written (the row was still
+    buffered by another worker); applied when the row is inserted."""
+    __tablename__ = "chatbot_pending_feedback"
+    log_id: str = Field(primary_key=True, max_length=36)
+    was_helpful: bool
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
 class ChatbotLogRead(SQLModel):
     id: str
     session_id: str
@@ -88,6 +110,8 @@ class DiseaseMappingBase(SQLModel):
     disease_name: str = Field(max_length=255)
     specialization: str = Field(max_length=255)
     safe_response: str = Field(sa_column=sa.Column(sa.Text, nullable=False))
+    synonyms: Optional[str] = Field(default=None, sa_column=sa.Column("synonyms", sa.Text, nullable=True))  # comma-separated
+    priority: int = Field(default=50)
     is_active: bool = Field(default=True)
 
 
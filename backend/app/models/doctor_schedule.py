@@ -6,7 +6,7 @@ from typing import Optional
 from uuid import uuid4
 
 from sqlmodel import Field, SQLModel, Column
-from sqlalchemy import Text
+from sqlalchemy import Text, UniqueConstraint
 
 
 # ---------- DoctorSchedule ----------
@@ -84,7 +84,13 @@ class SlotLockBase(SQLModel):
 
 
 class SlotLock(SlotLockBase, table=True):
+    """A hold on one slot; at most one row per slot, taken over once it expires.
+
+    A booking converts the hold into its appointment (``appointment_id``, with
+    ``expires_at`` set to the booking time).
+    """
     __tablename__ = "slot_lock"
+    __table_args__ = (UniqueConstraint("doctor_id", "slot_date", "slot_time", name="uq_slot_lock_doctor_date_time"),)
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
 
 
@@ -0,0 +1,37 @@
+"""Email outbox model — rows are sent by app/services/email_dispatcher.py"""
+
+from sqlmodel import SQLModel, Field
+import sqlalchemy as sa
+from typing import Optional
+from datetime import datetime
+import uuid
+
+
+class EmailOutboxBase(SQLModel):
+    to_email: str = Field(max_length=255)
+    subject: str = Field(max_length=255)
+    body: str = Field(sa_column=sa.Column(sa.Text, nullable=False))
+    html: bool = Field(default=False)
+    template_name: Optional[str] = Field(default=None, max_length=50)
+    campaign_id: Optional[str] = Field(default=None, max_length=36, index=True)  # rows queued by one bulk send
+    status: str = Field(default="pending", max_length=20)  # pending / sending / sent / failed
+    last_error: Optional[str] = Field(default=None, max_length=500)
+
+class EmailOutbox(EmailOutboxBase, table=True):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # The dispatcher's "what is due" scan.
+        sa.Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, max_length=36)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    attempts: int = Field(default=0)
+    next_attempt_at: Optional[datetime] = None  # naive UTC; due when <= now (also the lease of a "sending" row)
+    claim_token: Optional[str] = Field(default=None, max_length=36)
+    sent_at: Optional[datetime] = None
+
+class EmailOutboxRead(EmailOutboxBase):
+    id: str
+    created_at: datetime
+    attempts: int
+    sent_at: Optional[datetime] = None
@@ -6,7 +6,7 @@ from typing import Optional
 from uuid import uuid4
 
 from sqlmodel import Field, SQLModel, Column
-from sqlalchemy import Text
+from sqlalchemy import Index, Text, UniqueConstraint
 
 
 class NotificationBase(SQLModel):
@@ -22,6 +22,10 @@ class NotificationBase(SQLModel):
 
 class Notification(NotificationBase, table=True):
     __tablename__ = "notification"
+    __table_args__ = (
+        # A user's unread list, and the unread counts when a counter is missing or reconciled.
+        Index("ix_notification_user_read_created", "user_id", "is_read", "created_at"),
+    )
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     read_at: Optional[datetime] = None
@@ -35,3 +39,30 @@ class NotificationRead(NotificationBase):
     id: str
     created_at: datetime
     read_at: Optional[datetime]
+
+
+class NotificationBroadcast(SQLModel, table=True):
+    """One POST /notifications/broadcast run; ``sent`` advances as chunks are inserted."""
+    __tablename__ = "notification_broadcast"
+    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
+    title: str = Field(max_length=255)
+    message: Optional[str] = Field(default=None, sa_column=Column(Text))
+    role_as: Optional[int] = None  # None = every active user
+    created_by: str = Field(foreign_key="user.id", max_length=36)
+    status: str = Field(default="queued", max_length=20)  # queued / running / completed / failed
+    total: int = Field(default=0)
+    sent: int = Field(default=0)
+    error: Optional[str] = Field(default=None, max_length=500)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+class NotificationUnreadCounter(SQLModel, table=True):
+    """Unread notifications per user, maintained by NotificationService; see
+    app/services/unread_counter.py."""
+    __tablename__ = "notification_unread_counter"
+    __table_args__ = (UniqueConstraint("user_id", name="uq_notification_unread_counter_user"),)
+    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
+    user_id: str = Field(foreign_key="user.id", max_length=36)
+    unread: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,26 @@
+"""Patient search index.
+
+One row per patient user holding normalized copies of the searchable fields so
+receptionist lookups are prefix / equality range scans instead of
+``LIKE '%q%'`` over the whole user table.  Rows are kept in step with ``user``
+by the flush listener in ``app.services.patient_search_service``.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class PatientSearchEntry(SQLModel, table=True):
+    __tablename__ = "patient_search_index"
+
+    # No FK: the row is derived data, written after the user row in the same flush.
+    user_id: str = Field(primary_key=True, max_length=36)
+    first_name: str = Field(default="", max_length=255, index=True)  # lowercased, letters only
+    last_name: str = Field(default="", max_length=255, index=True)
+    first_name_key: str = Field(default="", max_length=8, index=True)  # soundex
+    last_name_key: str = Field(default="", max_length=8, index=True)
+    phone: Optional[str] = Field(default=None, max_length=20, index=True)  # national digits, no leading 0
+    nic: Optional[str] = Field(default=None, max_length=20, index=True)  # uppercase, alphanumerics only
+    email: Optional[str] = Field(default=None, max_length=255, index=True)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
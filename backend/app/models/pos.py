@@ -1,7 +1,8 @@
 """POS / Cashier Billing models – Patch 4.1
 
 Tables: billing_transaction, transaction_item, cash_register,
-        cash_entry, daily_cash_summary, eod_report, pos_audit_log
+        cash_entry, daily_cash_summary, eod_report, pos_audit_log,
+        daily_sales_rollup, daily_product_rollup
 """
 from __future__ import annotations
 
@@ -10,7 +11,7 @@ from typing import Optional
 from uuid import uuid4
 
 from sqlmodel import Field, SQLModel, Column
-from sqlalchemy import Text
+from sqlalchemy import Index, Text, UniqueConstraint
 
 
 # ---------- BillingTransaction ----------
@@ -31,6 +32,13 @@ class BillingTransactionBase(SQLModel):
 
 class BillingTransaction(BillingTransactionBase, table=True):
     __tablename__ = "billing_transaction"
+    __table_args__ = (
+        # Dashboards filter by branch/status and a created_at range, cashier screens by cashier/status + range.
+        Index("ix_billing_transaction_branch_status_created", "branch_id", "status", "created_at"),
+        Index("ix_billing_transaction_cashier_status_created", "cashier_id", "status", "created_at"),
+        # All-branch dashboards (no branch filter) and pending counts.
+        Index("ix_billing_transaction_status_created", "status", "created_at"),
+    )
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
@@ -70,6 +78,43 @@ class TransactionItemRead(TransactionItemBase):
     id: str
 
 
+# ---------- Sales rollups ----------
+# Pre-aggregated completed sales, maintained by POSService on create/refund and
+# rebuilt from raw rows by scripts/backfill_sales_rollups.py.  Keyed on the
+# transaction's created_at date, the same day the raw analytics queries bin by.
+
+class DailySalesRollup(SQLModel, table=True):
+    __tablename__ = "daily_sales_rollup"
+    __table_args__ = (
+        UniqueConstraint("branch_id", "sales_date", "cashier_id", "payment_method",
+                         name="uq_daily_sales_rollup_key"),
+        Index("ix_daily_sales_rollup_date_branch", "sales_date", "branch_id"),
+    )
+    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
+    branch_id: str = Field(foreign_key="branch.id", max_length=36)
+    sales_date: date
+    cashier_id: str = Field(foreign_key="user.id", max_length=36)
+    payment_method: str = Field(default="", max_length=30)  # "" when the transaction had none
+    transaction_count: int = Field(default=0)
+    total_sales: float = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DailyProductRollup(SQLModel, table=True):
+    __tablename__ = "daily_product_rollup"
+    __table_args__ = (
+        UniqueConstraint("branch_id", "sales_date", "description", name="uq_daily_product_rollup_key"),
+        Index("ix_daily_product_rollup_date_branch", "sales_date", "branch_id"),
+    )
+    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
+    branch_id: str = Field(foreign_key="branch.id", max_length=36)
+    sales_date: date
+    description: str = Field(max_length=255)
+    quantity: int = Field(default=0)
+    revenue: float = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 # ---------- CashRegister ----------
 
 class CashRegisterBase(SQLModel):
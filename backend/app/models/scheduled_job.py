@@ -0,0 +1,26 @@
+"""Scheduled job state — one row per job registered with app/core/scheduler.py"""
+
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class ScheduledJob(SQLModel, table=True):
+    """Lease and last-run record of a periodic job, shared by every worker.
+
+    A worker runs a job only after claiming this row: the job must be due
+    (``last_started_at`` older than its interval) and not leased by another
+    worker (``lease_expires_at`` in the past).
+    """
+    __tablename__ = "scheduled_job"
+    name: str = Field(primary_key=True, max_length=100)
+    holder: Optional[str] = Field(default=None, max_length=100)  # host:pid of the worker running it
+    lease_expires_at: Optional[datetime] = None
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_duration_ms: Optional[float] = None
+    last_status: Optional[str] = Field(default=None, max_length=20)  # ok / failed
+    last_error: Optional[str] = Field(default=None, max_length=500)
+    last_result: Optional[str] = Field(default=None, max_length=500)
+    run_count: int = Field(default=0)
+    failure_count: int = Field(default=0)
@@ -10,14 +10,23 @@ import uuid
 class SmsLogBase(SQLModel):
     recipient: str = Field(max_length=20)
     message: str = Field(sa_column=sa.Column(sa.Text, nullable=False))
-    template_type: Optional[str] = Field(default=None, max_length=50)  # appointment_confirm, cancellation, credentials, schedule_change, payment_receipt, queue_notification
-    status: str = Field(default="pending", max_length=20)  # pending / sent / failed
+    template_type: Optional[str] = Field(default=None, max_length=50)  # appointment_confirm, cancellation, credentials, schedule_change, payment_receipt, queue_notification, appointment_reminder
+    status: str = Field(default="pending", max_length=20)  # pending / sending / sent / failed
     provider_response: Optional[str] = Field(default=None, max_length=500)
 
 class SmsLog(SmsLogBase, table=True):
+    """Also the SMS outbox: pending rows are sent by app/services/sms_dispatcher.py."""
     __tablename__ = "sms_log"
+    __table_args__ = (
+        # The dispatcher's "what is due" scan.
+        sa.Index("ix_sms_log_status_next_attempt", "status", "next_attempt_at"),
+    )
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, max_length=36)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    attempts: int = Field(default=0)
+    next_attempt_at: Optional[datetime] = None  # naive UTC; due when <= now (also the lease of a "sending" row)
+    claim_token: Optional[str] = Field(default=None, max_length=36)
+    sent_at: Optional[datetime] = None
 
 class SmsLogCreate(SmsLogBase):
     pass
@@ -25,3 +34,5 @@ class SmsLogCreate(SmsLogBase):
 class SmsLogRead(SmsLogBase):
     id: str
     created_at: datetime
+    attempts: int = 0
+    sent_at: Optional[datetime] = None
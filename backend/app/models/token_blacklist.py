@@ -8,9 +8,9 @@ class TokenBlacklist(SQLModel, table=True):
     __tablename__ = "token_blacklist"
 
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
-    token_jti: str = Field(index=True, max_length=64)
+    token_jti: str = Field(index=True, unique=True, max_length=64)
     user_id: str = Field(foreign_key="user.id", max_length=36)
-    expires_at: datetime
+    expires_at: datetime = Field(index=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
@@ -11,22 +11,36 @@ from uuid import uuid4
 from fastapi import HTTPException
 from sqlmodel import select, func, or_
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 
 from app.models.appointment import Appointment
 from app.models.appointment_extras import AppointmentAuditLog, AppointmentSettings
 from app.models.doctor import Doctor
-from app.models.doctor_schedule import DoctorSchedule
+from app.models.doctor_schedule import DoctorSchedule, SlotLock
 from app.models.patient import Patient
 from app.models.branch import Branch
 from app.models.user import User
 from app.models.patient_session import ScheduleSession
+from app.services.availability_index import availability_index
+from app.services.doctor_schedule_service import DoctorScheduleService
 
 
 def _verification_code() -> str:
     return "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
 
+def is_slot_conflict(exc: IntegrityError) -> bool:
+    """Whether ``exc`` is uq_appointment_active_slot rejecting a taken slot.
+
+    MySQL and PostgreSQL name the constraint in the error; SQLite lists its
+    columns instead.
+    """
+    message = str(exc.orig)
+    return "uq_appointment_active_slot" in message or "appointment.active_slot" in message
+
+
 class AppointmentService:
     """Booking flow, status transitions, cancellation, audit."""
 
@@ -147,8 +161,16 @@ class AppointmentService:
             session_key=session_key,
             created_by=created_by,
         )
-        session.add(schedule_session)
-        await session.flush()
+        try:
+            async with session.begin_nested():
+                session.add(schedule_session)
+        except IntegrityError:
+            # A concurrent booking created the session first.  Lock the row to
+            # read it: a plain read could come from a snapshot taken before it.
+            existing = await session.exec(
+                select(ScheduleSession).where(ScheduleSession.session_key == session_key).with_for_update()
+            )
+            return existing.one()
         return schedule_session
 
     # ---- Core booking ----
@@ -170,18 +192,9 @@ class AppointmentService:
         if not doctor:
             raise HTTPException(404, "Doctor not found")
 
-        # Check slot not already taken
-        existing = await session.exec(
-            select(Appointment).where(
-                Appointment.doctor_id == doctor_id,
-                Appointment.appointment_date == appt_date,
-                Appointment.appointment_time == appt_time,
-                Appointment.status != "cancelled",
-            )
+        schedule_session = await AppointmentService._get_or_create_schedule_session(
+            session, doctor_id, branch_id, appt_date, appt_time, booked_by
         )
-        if existing.first():
-            raise HTTPException(409, "Slot already booked")
-
         appt = Appointment(
             patient_id=patient_id,
             doctor_id=doctor_id,
@@ -193,21 +206,35 @@ class AppointmentService:
             status="confirmed",
             verification_code=_verification_code(),
             is_walk_in=is_walk_in,
+            schedule_id=schedule_session.schedule_id,
+            schedule_session_id=schedule_session.id,
         )
-        schedule_session = await AppointmentService._get_or_create_schedule_session(
-            session, doctor_id, branch_id, appt_date, appt_time, booked_by
-        )
-        appt.schedule_id = schedule_session.schedule_id
-        appt.schedule_session_id = schedule_session.id
-
         session.add(appt)
 
         await AppointmentService._audit(
             session, appt.id, "created", booked_by,
             new_data={"status": "confirmed", "date": str(appt_date), "time": str(appt_time)},
         )
+        # No "is the slot free?" read to race against: uq_appointment_active_slot
+        # rejects the INSERT when another active appointment has the slot, and
+        # the slot's lock row is then claimed for this appointment.
+        try:
+            await session.flush()
+        except IntegrityError as exc:
+            await session.rollback()
+            if not is_slot_conflict(exc):
+                raise
+            raise HTTPException(409, "Slot already booked")
+        if not await DoctorScheduleService.claim_slot_lock(
+            session, doctor_id, appt_date, appt_time, booked_by,
+            expires_at=datetime.now(timezone.utc),
+            schedule_id=schedule_session.schedule_id, appointment_id=appt.id,
+        ):
+            await session.rollback()
+            raise HTTPException(409, "Slot is held by another booking")
         await session.commit()
         await session.refresh(appt)
+        availability_index.invalidate(doctor_id, appt_date)
         return appt
 
     # ---- Status transitions ----
@@ -246,6 +273,7 @@ class AppointmentService:
         )
         await session.commit()
         await session.refresh(appt)
+        availability_index.invalidate(appt.doctor_id, appt.appointment_date)
         return appt
 
     # ---- Reschedule ----
@@ -272,31 +300,21 @@ class AppointmentService:
         if (appt_datetime - datetime.utcnow()) < timedelta(hours=24):
             raise HTTPException(403, "Appointments can only be rescheduled at least 24 hours in advance.")
 
-        # Verify new slot available
-        existing = await session.exec(
-            select(Appointment).where(
-                Appointment.doctor_id == appt.doctor_id,
-                Appointment.appointment_date == new_date,
-                Appointment.appointment_time == new_time,
-                Appointment.status != "cancelled",
-                Appointment.id != appointment_id,
-            )
-        )
-        if existing.first():
-            raise HTTPException(409, "New slot already booked")
-
         old_data = {"date": str(appt.appointment_date), "time": str(appt.appointment_time)}
+        old_date, old_time = appt.appointment_date, appt.appointment_time
+        schedule_session = await AppointmentService._get_or_create_schedule_session(
+            session, appt.doctor_id, appt.branch_id, new_date, new_time, changed_by
+        )
 
         # Save original date only on first reschedule
         if appt.reschedule_count == 0:
             appt.original_appointment_date = datetime.combine(appt.appointment_date, appt.appointment_time)
 
+        if (new_date, new_time) != (appt.appointment_date, appt.appointment_time):
+            appt.reminder_sent_at = None  # remind again for the new date
         appt.appointment_date = new_date
         appt.appointment_time = new_time
         appt.reschedule_count += 1
-        schedule_session = await AppointmentService._get_or_create_schedule_session(
-            session, appt.doctor_id, appt.branch_id, new_date, new_time, changed_by
-        )
         appt.schedule_id = schedule_session.schedule_id
         appt.schedule_session_id = schedule_session.id
         appt.updated_at = datetime.utcnow()
@@ -307,8 +325,33 @@ class AppointmentService:
             old_data=old_data,
             new_data={"date": str(new_date), "time": str(new_time)},
         )
+        # As in ``book``: uq_appointment_active_slot rejects a taken slot, and
+        # the new slot's lock must be free or this user's own hold.
+        try:
+            await session.flush()
+        except IntegrityError as exc:
+            await session.rollback()
+            if not is_slot_conflict(exc):
+                raise
+            raise HTTPException(409, "New slot already booked")
+        if not await DoctorScheduleService.claim_slot_lock(
+            session, appt.doctor_id, new_date, new_time, changed_by,
+            expires_at=datetime.now(timezone.utc),
+            schedule_id=schedule_session.schedule_id, appointment_id=appt.id,
+        ):
+            await session.rollback()
+            raise HTTPException(409, "New slot is held by another booking")
+        await session.exec(
+            delete(SlotLock).where(
+                SlotLock.doctor_id == appt.doctor_id,
+                SlotLock.slot_date == old_date,
+                SlotLock.slot_time == old_time,
+                SlotLock.appointment_id == appt.id,
+            )
+        )
         await session.commit()
         await session.refresh(appt)
+        availability_index.invalidate(appt.doctor_id, old_date, new_date)
         return appt
 
     # ---- Payment ----
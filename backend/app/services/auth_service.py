@@ -11,10 +11,11 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.security import create_access_token, check_password, check_password_and_update, hash_password
 from app.models.user import User
 from app.models.patient import Patient
 from app.models.token_blacklist import TokenBlacklist
+from app.services.token_revocation import TokenRevokedError, commit_revocation, revocation_filter
 
 
 class AuthService:
@@ -40,24 +41,32 @@ class AuthService:
         return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
     async def _is_blacklisted(self, jti: str) -> bool:
-        result = await self.session.exec(
-            select(TokenBlacklist).where(TokenBlacklist.token_jti == jti)
-        )
-        return result.first() is not None
+        return await revocation_filter.is_revoked(self.session, jti)
 
     async def _blacklist_token(self, jti: str, user_id: str, expires_at: datetime):
         bl = TokenBlacklist(token_jti=jti, user_id=user_id, expires_at=expires_at)
         self.session.add(bl)
-        await self.session.commit()
+        try:
+            await commit_revocation(self.session)
+        except TokenRevokedError:
+            raise ValueError("Token revoked")
 
     # ── public methods ──────────────────────
     async def login(self, email: str, password: str) -> dict:
         result = await self.session.exec(select(User).where(User.email == email))
         user = result.first()
-        if not user or not verify_password(password, user.hashed_password):
+        if not user:
+            raise ValueError("Incorrect email or password")
+        valid, new_hash = await check_password_and_update(password, user.hashed_password)
+        if not valid:
             raise ValueError("Incorrect email or password")
         if not user.is_active:
             raise ValueError("Inactive user")
+        if new_hash:
+            # Stored hash predates the current BCRYPT_ROUNDS / scheme; upgrade it transparently.
+            user.hashed_password = new_hash
+            self.session.add(user)
+            await self.session.commit()
         tokens = self._create_token_pair(user.id)
         return {
             **tokens,
@@ -92,7 +101,7 @@ class AuthService:
                 raise ValueError("NIC already registered")
 
         new_user = User(
-            email=email, username=email, hashed_password=get_password_hash(password),
+            email=email, username=email, hashed_password=await hash_password(password),
             role_as=5, is_active=True, first_name=first_name, last_name=last_name,
             date_of_birth=date_of_birth, gender=gender, nic_number=nic,
             contact_number_mobile=phone,
@@ -140,7 +149,7 @@ class AuthService:
         user = await self.session.get(User, payload["sub"])
         if not user:
             raise ValueError("User not found")
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = await hash_password(new_password)
         self.session.add(user)
         await self._blacklist_token(
             jti=payload.get("jti", self._make_jti()), user_id=user.id,
@@ -164,9 +173,9 @@ class AuthService:
         return self._create_token_pair(user.id)
 
     async def change_password(self, user: User, current_password: str, new_password: str):
-        if not verify_password(current_password, user.hashed_password):
+        if not await check_password(current_password, user.hashed_password):
             raise ValueError("Current password is incorrect")
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = await hash_password(new_password)
         self.session.add(user)
         await self.session.commit()
 
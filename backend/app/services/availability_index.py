@@ -0,0 +1,116 @@
+"""In-process slot availability index.
+
+Caches the result of the schedule / cancellation / appointment / slot-lock
+queries behind ``DoctorScheduleService.check_availability`` per
+``(doctor_id, date)``.  Each schedule block keeps its slot start-times once and
+marks taken slots in an integer bitmap, so serving a read is a dict lookup plus
+a bit test per slot.
+
+Entries are dropped explicitly by the write paths (booking, reschedule, status
+changes, slot locks, schedule edits) and otherwise expire after a short TTL,
+which also bounds staleness for writes made by other workers.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class SlotBlock:
+    """One schedule block on a given day with a bitmap of taken slots."""
+
+    schedule_id: str
+    branch_id: str
+    start_time: time
+    end_time: time
+    slot_duration_minutes: int
+    slots: Tuple[time, ...]
+    taken: int = 0
+
+    def is_taken(self, idx: int) -> bool:
+        return bool(self.taken >> idx & 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        available = [t for i, t in enumerate(self.slots) if not self.is_taken(i)]
+        return {
+            "schedule_id": self.schedule_id,
+            "branch_id": self.branch_id,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "slot_duration_minutes": self.slot_duration_minutes,
+            "available_slots": [t.strftime("%H:%M") for t in available],
+            "total_slots": len(self.slots),
+            "booked_slots": len(self.slots) - len(available),
+        }
+
+
+def build_block(schedule_id: str, branch_id: str, start_time: time, end_time: time,
+                slot_duration_minutes: int, slots: List[time], taken_times: set) -> SlotBlock:
+    taken = 0
+    for i, t in enumerate(slots):
+        if t in taken_times:
+            taken |= 1 << i
+    return SlotBlock(
+        schedule_id=schedule_id,
+        branch_id=branch_id,
+        start_time=start_time,
+        end_time=end_time,
+        slot_duration_minutes=slot_duration_minutes,
+        slots=tuple(slots),
+        taken=taken,
+    )
+
+
+class AvailabilityIndex:
+    """Per-(doctor, date) cache of :class:`SlotBlock` lists.
+
+    A per-doctor generation counter guards against a read that started before
+    an invalidation writing its (now stale) result back afterwards.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 20000):
+        self.ttl_seconds = ttl_seconds
+        self._entries = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self._generations: Dict[str, int] = {}
+
+    def generation(self, doctor_id: str) -> int:
+        return self._generations.get(doctor_id, 0)
+
+    def get(self, doctor_id: str, day: date) -> Optional[List[SlotBlock]]:
+        return self._entries.get((doctor_id, day))
+
+    def put(
+        self,
+        doctor_id: str,
+        day: date,
+        blocks: List[SlotBlock],
+        generation: int,
+        valid_for: Optional[float] = None,
+    ) -> None:
+        """Store *blocks* unless the doctor was invalidated since *generation* was read."""
+        if generation != self.generation(doctor_id):
+            return
+        ttl = self.ttl_seconds if valid_for is None else min(self.ttl_seconds, valid_for)
+        self._entries.set((doctor_id, day), blocks, ttl_seconds=ttl)
+
+    def invalidate(self, doctor_id: str, *days: Optional[date]) -> None:
+        """Drop cached days for a doctor (all of them when no day is given)."""
+        self._generations[doctor_id] = self.generation(doctor_id) + 1
+        targets = [d for d in days if d is not None]
+        if targets:
+            for d in targets:
+                self._entries.invalidate((doctor_id, d))
+        else:
+            self._entries.invalidate_where(lambda key: key[0] == doctor_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+
+
+availability_index = AvailabilityIndex(ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS)
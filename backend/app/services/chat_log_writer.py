@@ -0,0 +1,312 @@
+"""Batched background writer for ``ChatbotLog``.
+
+``/chatbot/chat`` hands its log row to :data:`chat_log_writer` and returns;
+rows are inserted CHAT_LOG_BATCH_SIZE at a time, or after
+CHAT_LOG_FLUSH_INTERVAL_MS, together with the matching ``chatbot_log_stats``
+increments.
+
+Each row is appended to a per-process journal in CHAT_LOG_SPILL_DIR before
+``submit`` returns, and a journal is deleted only once its rows are
+committed.  Journals left behind by a process that died are replayed by the
+next writer to start (rows already in the table are skipped, so a crash
+between commit and delete does not duplicate them).
+
+Feedback can arrive on a worker that does not hold the row yet.  It is then
+parked in ``chatbot_pending_feedback`` and applied by whichever side comes
+second: the writer checks for parked feedback after committing a batch (or a
+replay), and ``record_feedback`` checks for the row after parking.  Deleting
+the parked row claims it, so it is applied once.
+"""
+from __future__ import annotations
+
+import asyncio
+import glob
+import json
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.rollups import bump_rollup
+from app.models.chatbot import ChatbotLog, ChatbotLogStats, ChatbotPendingFeedback
+
+logger = logging.getLogger(__name__)
+
+_JOURNAL_PREFIX = "chatbot-log-"
+
+
+def _owner_pid(path: str) -> Optional[int]:
+    """Pid of the process writing (or replaying) a journal file."""
+    name = os.path.basename(path)[len(_JOURNAL_PREFIX):]
+    if ".replaying-" in name:
+        name = name.rsplit(".replaying-", 1)[1]
+    try:
+        return int(name.split(".")[0])
+    except ValueError:
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+async def insert_logs(session: AsyncSession, rows: List[dict]) -> None:
+    """Insert log rows and add them to ``chatbot_log_stats`` (caller commits)."""
+    await session.exec(insert(ChatbotLog), params=rows)
+    counts: Dict[str, Counter] = {}
+    for row in rows:
+        c = counts.setdefault(row.get("category_detected") or "", Counter())
+        c["total"] += 1
+        if row.get("was_helpful") is True:
+            c["helpful"] += 1
+        elif row.get("was_helpful") is False:
+            c["not_helpful"] += 1
+    for category, deltas in counts.items():
+        await bump_rollup(
+            session, ChatbotLogStats, {"category": category},
+            {"total": deltas["total"], "helpful": deltas["helpful"], "not_helpful": deltas["not_helpful"]},
+        )
+
+
+async def apply_feedback(session: AsyncSession, log_id: str, was_helpful: bool) -> bool:
+    """Store feedback on a written log row and adjust the counters (caller commits); False if the row is not stored."""
+    log = await session.get(ChatbotLog, log_id)
+    if not log:
+        return False
+    previous = log.was_helpful
+    log.was_helpful = was_helpful
+    session.add(log)
+    if previous != was_helpful:
+        await bump_rollup(
+            session, ChatbotLogStats, {"category": log.category_detected or ""},
+            {
+                "helpful": int(was_helpful is True) - int(previous is True),
+                "not_helpful": int(was_helpful is False) - int(previous is False),
+            },
+        )
+    return True
+
+
+async def apply_pending_feedback(session: AsyncSession, log_ids: List[str]) -> int:
+    """Apply parked feedback for those of *log_ids* whose rows are stored, and commit; returns how many."""
+    applied = 0
+    for start in range(0, len(log_ids), 500):
+        parked = (await session.exec(
+            select(ChatbotPendingFeedback.log_id, ChatbotPendingFeedback.was_helpful)
+            .join(ChatbotLog, ChatbotLog.id == ChatbotPendingFeedback.log_id)
+            .where(col(ChatbotPendingFeedback.log_id).in_(log_ids[start:start + 500]))
+        )).all()
+        for log_id, was_helpful in parked:
+            claimed = await session.exec(delete(ChatbotPendingFeedback).where(ChatbotPendingFeedback.log_id == log_id))
+            if claimed.rowcount and await apply_feedback(session, log_id, was_helpful):
+                applied += 1
+    await session.commit()
+    return applied
+
+
+async def reconcile_pending_feedback(session: AsyncSession, max_age: timedelta = timedelta(days=1)) -> int:
+    """Apply any parked feedback whose row is stored by now and drop parked feedback older than *max_age*."""
+    log_ids = list((await session.exec(select(ChatbotPendingFeedback.log_id))).all())
+    applied = await apply_pending_feedback(session, log_ids)
+    await session.exec(
+        delete(ChatbotPendingFeedback).where(ChatbotPendingFeedback.created_at < datetime.utcnow() - max_age)
+    )
+    await session.commit()
+    return applied
+
+
+async def record_feedback(session: AsyncSession, log_id: str, was_helpful: bool) -> None:
+    """Apply feedback now if the log row is stored, otherwise park it until the row is written."""
+    if await apply_feedback(session, log_id, was_helpful):
+        await session.commit()
+        return
+    await session.merge(ChatbotPendingFeedback(log_id=log_id, was_helpful=was_helpful))
+    await session.commit()
+    # The batch holding the row may have committed meanwhile, after checking for feedback.
+    await apply_pending_feedback(session, [log_id])
+
+
+class ChatLogWriter:
+    def __init__(self, batch_size: int, flush_interval_ms: int, spill_dir: str):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.spill_dir = spill_dir
+        self._buffer: List[dict] = []
+        self._pending_ids: set = set()
+        self._journal = None
+        self._journal_seq = 0
+        self._rotated: List[str] = []  # journals whose rows are in _buffer but not yet committed
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._tasks: set = set()
+        self._started = False
+        self.flushed = 0
+        self.failed_flushes = 0
+
+    @property
+    def _journal_path(self) -> str:
+        return os.path.join(self.spill_dir, f"{_JOURNAL_PREFIX}{os.getpid()}.jsonl")
+
+    def _start(self) -> None:
+        os.makedirs(self.spill_dir, mode=0o700, exist_ok=True)
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+        self._flush_lock = asyncio.Lock()
+        self._started = True
+        self._spawn(self._recover())
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def submit(self, row: dict) -> None:
+        """Queue one ``ChatbotLog`` row (column dict with ``id`` set); never waits on the database."""
+        if not self._started:
+            self._start()
+        self._journal.write(json.dumps(row, default=str) + "\n")
+        self._journal.flush()
+        self._buffer.append(row)
+        self._pending_ids.add(row["id"])
+        if len(self._buffer) >= self.batch_size:
+            self._schedule_flush(0)
+        elif self._timer is None:
+            self._schedule_flush(self.flush_interval)
+
+    def is_pending(self, log_id: str) -> bool:
+        return log_id in self._pending_ids
+
+    def _schedule_flush(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, lambda: self._spawn(self.flush()))
+
+    async def flush(self) -> None:
+        """Insert everything buffered so far; on failure keep it for the next attempt."""
+        if not self._started:
+            return
+        async with self._flush_lock:
+            self._timer = None
+            rows, self._buffer = self._buffer, []
+            if not rows:
+                return
+            self._rotate_journal()
+            files, self._rotated = self._rotated, []
+            try:
+                await self._insert(rows)
+            except Exception:
+                logger.exception("Writing %d chatbot log rows failed; retrying later", len(rows))
+                self.failed_flushes += 1
+                self._buffer = rows + self._buffer
+                self._rotated = files + self._rotated
+                if self._timer is None:
+                    self._schedule_flush(max(self.flush_interval, 5.0))
+                return
+            self._pending_ids.difference_update(row["id"] for row in rows)
+            self.flushed += len(rows)
+            for path in files:
+                os.unlink(path)
+
+    def _rotate_journal(self) -> None:
+        """Move the journal holding the rows being flushed aside and start a fresh one."""
+        self._journal.close()
+        self._journal_seq += 1
+        rotated = f"{self._journal_path}.{self._journal_seq}"
+        os.replace(self._journal_path, rotated)
+        self._rotated.append(rotated)
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+
+    async def _insert(self, rows: List[dict]) -> None:
+        from app.core.database import async_session_factory
+
+        async with async_session_factory() as session:
+            await insert_logs(session, [_restore(row) for row in rows])
+            await session.commit()
+            await self._apply_parked_feedback(session, [row["id"] for row in rows])
+
+    async def _apply_parked_feedback(self, session: AsyncSession, log_ids: List[str]) -> None:
+        # The rows are committed either way; the chat-feedback-reconcile job retries a failure.
+        try:
+            await apply_pending_feedback(session, log_ids)
+        except Exception:
+            logger.exception("Applying parked chatbot feedback failed")
+            await session.rollback()
+
+    async def _recover(self) -> None:
+        """Replay journals of processes that are gone."""
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, f"{_JOURNAL_PREFIX}*"))):
+            pid = _owner_pid(path)
+            if pid is None or pid == os.getpid() or _pid_alive(pid):
+                continue
+            try:
+                await self._replay(path)
+            except Exception:
+                logger.exception("Replaying chatbot log journal %s failed", path)
+
+    async def _replay(self, path: str) -> None:
+        from app.core.database import async_session_factory
+
+        # Claim the file first so two starting workers do not replay it twice.
+        claimed = f"{path}.replaying-{os.getpid()}"
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            return
+        rows: Dict[str, dict] = {}
+        with open(claimed, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # torn last line
+                rows[row["id"]] = row
+        async with async_session_factory() as session:
+            existing = set()
+            ids = list(rows)
+            for start in range(0, len(ids), 500):
+                result = await session.exec(select(ChatbotLog.id).where(col(ChatbotLog.id).in_(ids[start:start + 500])))
+                existing.update(result.all())
+            missing = [_restore(row) for log_id, row in rows.items() if log_id not in existing]
+            if missing:
+                await insert_logs(session, missing)
+                await session.commit()
+                await self._apply_parked_feedback(session, [row["id"] for row in missing])
+        os.unlink(claimed)
+        logger.info("Replayed %d chatbot log rows from %s", len(missing), path)
+
+    async def close(self) -> None:
+        """Flush what is buffered and close the journal (on shutdown)."""
+        if not self._started:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        await self.flush()
+        if not self._buffer:
+            self._journal.close()
+            os.unlink(self._journal_path)
+            self._started = False
+
+
+def _restore(row: dict) -> dict:
+    """Undo the JSON round trip for the journal's datetime column."""
+    if isinstance(row.get("created_at"), str):
+        row = {**row, "created_at": datetime.fromisoformat(row["created_at"])}
+    return row
+
+
+chat_log_writer = ChatLogWriter(
+    batch_size=settings.CHAT_LOG_BATCH_SIZE,
+    flush_interval_ms=settings.CHAT_LOG_FLUSH_INTERVAL_MS,
+    spill_dir=settings.CHAT_LOG_SPILL_DIR,
+)
@@ -1,13 +1,14 @@
 """Chatbot Service — Patch 6.0 (intent detection + live data + improved matching)"""
 
-from sqlmodel import select, col, func, text
+from sqlmodel import select, text
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Optional
 import uuid
 import re
 from datetime import datetime, timezone, timedelta
 
-from app.models.chatbot import ChatbotFAQ, ChatbotLog, DiseaseMapping
+from app.models.chatbot import ChatbotFAQ, ChatbotLog, ChatbotLogStats, DiseaseMapping
+from app.services.chat_log_writer import chat_log_writer, record_feedback
 
 
 # ---- Intent keywords ----
@@ -97,64 +98,25 @@ class ChatbotService:
 
     @staticmethod
     async def match_faq(session: AsyncSession, question: str, language: str = "en") -> Optional[ChatbotFAQ]:
-        """Improved keyword matching with priority weighting."""
-        q = select(ChatbotFAQ).where(ChatbotFAQ.is_active == True)
-        result = await session.exec(q)
-        faqs = result.all()
+        """BM25 keyword matching over the in-memory FAQ index, with priority weighting."""
+        from app.services.faq_index import faq_index
 
-        q_lower = question.lower()
-        q_words = set(q_lower.split()) - STOP_WORDS
-
-        best_match: Optional[ChatbotFAQ] = None
-        best_score = 0.0
-
-        for faq in faqs:
-            # Match against the question field
-            faq_q = faq.question.lower()
-            faq_words = set(faq_q.split()) - STOP_WORDS
-
-            # Also match against keywords if present
-            kw_str = faq.keywords or ""
-            kw_words = set(k.strip().lower() for k in kw_str.split(",") if k.strip())
-
-            # Word overlap score
-            question_overlap = len(q_words & faq_words)
-            keyword_overlap = len(q_words & kw_words)
-
-            # Substring match bonus
-            substring_bonus = 0
-            for w in q_words:
-                if len(w) >= 4 and w in faq_q:
-                    substring_bonus += 1
-
-            # Check if Sinhala question matches
-            si_bonus = 0
-            if language == "si" and faq.question_si:
-                if any(w in faq.question_si.lower() for w in q_words if len(w) >= 2):
-                    si_bonus = 2
-
-            score = question_overlap + (keyword_overlap * 1.5) + substring_bonus + si_bonus
-            # Weight by priority (higher priority = higher score)
-            score *= (1 + faq.priority / 100)
-
-            if score > best_score:
-                best_score = score
-                best_match = faq
-
-        return best_match if best_score >= 2.0 else None
+        await faq_index.ensure_current(session)
+        match = faq_index.best_match(question, language)
+        if match is None:
+            return None
+        return await session.get(ChatbotFAQ, match[0])
 
     @staticmethod
     async def match_disease(session: AsyncSession, question: str) -> Optional[DiseaseMapping]:
-        """Check if the question matches a disease mapping."""
-        q = select(DiseaseMapping).where(DiseaseMapping.is_active == True)
-        result = await session.exec(q)
-        mappings = result.all()
+        """Check if the question mentions a mapped disease (or synonym); best match wins."""
+        from app.services.disease_matcher import disease_matcher
 
-        q_lower = question.lower()
-        for mapping in mappings:
-            if mapping.disease_name.lower() in q_lower:
-                return mapping
-        return None
+        await disease_matcher.ensure_current(session)
+        mapping_id = disease_matcher.best(question)
+        if mapping_id is None:
+            return None
+        return await session.get(DiseaseMapping, mapping_id)
 
     @staticmethod
     async def get_live_doctors(session: AsyncSession, specialization: str = None, city: str = None) -> list[dict]:
@@ -250,21 +212,10 @@ class ChatbotService:
     @staticmethod
     async def get_suggestions(session: AsyncSession, language: str = "en") -> list[str]:
         """Return top FAQ questions as suggestions."""
-        q = (
-            select(ChatbotFAQ)
-            .where(ChatbotFAQ.is_active == True)
-            .order_by(col(ChatbotFAQ.priority).desc())
-            .limit(6)
-        )
-        result = await session.exec(q)
-        faqs = result.all()
-        suggestions = []
-        for faq in faqs:
-            if language == "si" and faq.question_si:
-                suggestions.append(faq.question_si)
-            else:
-                suggestions.append(faq.question)
-        return suggestions
+        from app.services.faq_index import faq_index
+
+        await faq_index.ensure_current(session)
+        return faq_index.top_questions(6, language)
 
     @staticmethod
     async def log_interaction(
@@ -275,6 +226,7 @@ class ChatbotService:
         language: str = "en",
         category: str = "faq",
     ) -> ChatbotLog:
+        """Queue the interaction with the batched log writer; the row is inserted shortly after."""
         log = ChatbotLog(
             session_id=session_id,
             question=question,
@@ -282,41 +234,30 @@ class ChatbotService:
             category_detected=category,
             language=language,
         )
-        session.add(log)
-        await session.commit()
-        await session.refresh(log)
+        chat_log_writer.submit(log.model_dump())
         return log
 
     @staticmethod
     async def submit_feedback(session: AsyncSession, log_id: str, was_helpful: bool) -> None:
-        log = await session.get(ChatbotLog, log_id)
-        if log:
-            log.was_helpful = was_helpful
-            session.add(log)
-            await session.commit()
+        if not log_id:
+            return
+        if chat_log_writer.is_pending(log_id):
+            await chat_log_writer.flush()
+        await record_feedback(session, log_id, was_helpful)
 
     @staticmethod
     async def get_analytics(session: AsyncSession) -> dict:
-        """Chatbot analytics with category breakdown."""
-        total_q = select(func.count()).select_from(ChatbotLog)
-        helpful_q = select(func.count()).select_from(ChatbotLog).where(ChatbotLog.was_helpful == True)
-        not_helpful_q = select(func.count()).select_from(ChatbotLog).where(ChatbotLog.was_helpful == False)
-        no_feedback_q = select(func.count()).select_from(ChatbotLog).where(ChatbotLog.was_helpful == None)
-
-        total = (await session.exec(total_q)).one()
-        helpful = (await session.exec(helpful_q)).one()
-        not_helpful = (await session.exec(not_helpful_q)).one()
-        no_feedback = (await session.exec(no_feedback_q)).one()
-
-        # Category breakdown
-        cat_q = select(
-            ChatbotLog.category_detected, func.count()
-        ).group_by(ChatbotLog.category_detected)
-        cat_result = await session.exec(cat_q)
+        """Chatbot analytics with category breakdown, from the chatbot_log_stats counters."""
+        result = await session.exec(select(ChatbotLogStats))
+        total = helpful = not_helpful = 0
         category_breakdown = {}
-        for row in cat_result.all():
-            cat_name = row[0] or "unknown"
-            category_breakdown[cat_name] = row[1]
+        for row in result.all():
+            total += row.total
+            helpful += row.helpful
+            not_helpful += row.not_helpful
+            if row.total:
+                category_breakdown[row.category or "unknown"] = row.total
+        no_feedback = total - helpful - not_helpful
 
         return {
             "total_interactions": total,
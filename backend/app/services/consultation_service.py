@@ -5,14 +5,18 @@ Auto-link to appointment, generate audit logs, second opinions, auto-summary, ph
 """
 from __future__ import annotations
 
+import base64
+import hashlib
 import json
 from datetime import date, datetime
 from typing import List, Optional
 
 from fastapi import HTTPException
-from sqlmodel import select, func
+from sqlalchemy import and_, case, or_
+from sqlmodel import col, select, func
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.date_filters import on_date
 from app.models.consultation import (
     Consultation,
     ConsultationDiagnosis,
@@ -131,29 +135,58 @@ class ConsultationService:
     # Queue (enhanced with nurse_assessment_status)
     # ============================================================
 
+    QUEUE_STATUSES = ("confirmed", "in_progress", "pending")
+
     @staticmethod
-    async def get_queue(session: AsyncSession, doctor_id: str, appt_date: Optional[date] = None):
-        d = appt_date or date.today()
-        q = select(Appointment).where(
+    def _queue_filters(doctor_id: str, d: date) -> list:
+        return [
             Appointment.doctor_id == doctor_id,
             Appointment.appointment_date == d,
-            Appointment.status.in_(["confirmed", "in_progress", "pending"]),
-        ).order_by(Appointment.appointment_time)  # type: ignore
+            Appointment.status.in_(ConsultationService.QUEUE_STATUSES),
+        ]
+
+    @staticmethod
+    async def get_queue_version(session: AsyncSession, doctor_id: str, appt_date: Optional[date] = None) -> str:
+        """Fingerprint of a doctor's queue for the day, used as its ETag.
+
+        One aggregate query over the same rows ``get_queue`` returns: it changes
+        whenever an appointment enters or leaves the queue, is confirmed, paid,
+        starts consultation, finishes nurse assessment or is otherwise updated
+        (``updated_at`` moves on every update, but only to the second on MySQL,
+        so the status counts catch changes within the same second).
+        """
+        d = appt_date or date.today()
+        q = select(
+            func.count(Appointment.id),
+            func.max(Appointment.updated_at),
+            func.sum(case((Appointment.status == "in_progress", 1), else_=0)),
+            func.sum(case((Appointment.status == "confirmed", 1), else_=0)),
+            func.sum(case((Appointment.payment_status == "paid", 1), else_=0)),
+            func.sum(case((Appointment.nurse_assessment_status == "completed", 1), else_=0)),
+        ).where(*ConsultationService._queue_filters(doctor_id, d))
+        row = (await session.exec(q)).one()
+        raw = f"{doctor_id}:{d.isoformat()}:" + ":".join(str(v) for v in row)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    @staticmethod
+    async def get_queue(session: AsyncSession, doctor_id: str, appt_date: Optional[date] = None):
+        from app.models.user import User
+
+        d = appt_date or date.today()
+        q = (
+            select(Appointment, User.first_name, User.last_name, User.id)
+            .outerjoin(Patient, Patient.id == Appointment.patient_id)
+            .outerjoin(User, User.id == Patient.user_id)
+            .where(*ConsultationService._queue_filters(doctor_id, d))
+            .order_by(Appointment.appointment_time)  # type: ignore
+        )
         result = await session.exec(q)
-        appointments = list(result.all())
 
         # Enrich each appointment with nurse assessment info + patient name
         enriched = []
-        for appt in appointments:
+        for appt, first_name, last_name, user_id in result.all():
             data = appt.model_dump()
-            # Fetch patient name
-            patient = await session.get(Patient, appt.patient_id) if appt.patient_id else None
-            if patient:
-                from app.models.user import User
-                user = await session.get(User, patient.user_id)
-                data["patient_name"] = f"{user.first_name} {user.last_name}" if user else "Unknown"
-            else:
-                data["patient_name"] = "Unknown"
+            data["patient_name"] = f"{first_name} {last_name}" if user_id else "Unknown"
 
             # Determine queue status colour
             if appt.status == "in_progress":
@@ -430,45 +463,112 @@ class ConsultationService:
         await session.refresh(c)
         return c
 
+    @staticmethod
+    def _pharmacy_queue_query():
+        """Consultations awaiting dispensing that have at least one prescription, with patient names."""
+        from app.models.user import User
+
+        has_prescription = (
+            select(ConsultationPrescription.id)
+            .where(ConsultationPrescription.consultation_id == Consultation.id)
+            .exists()
+        )
+        return (
+            select(Consultation, User.first_name, User.last_name, User.id)
+            .outerjoin(Patient, Patient.id == Consultation.patient_id)
+            .outerjoin(User, User.id == Patient.user_id)
+            .where(
+                Consultation.status.in_(["completed", "paid"]),
+                Consultation.medicines_issued_at == None,  # noqa: E711
+                has_prescription,
+            )
+        )
+
+    @staticmethod
+    async def _enrich_pharmacy_rows(session: AsyncSession, rows: list) -> List[dict]:
+        """Attach prescriptions to (consultation, first, last, user_id) rows with one IN query."""
+        if not rows:
+            return []
+        ids = [row[0].id for row in rows]
+        rx_result = await session.exec(
+            select(ConsultationPrescription).where(col(ConsultationPrescription.consultation_id).in_(ids))
+        )
+        prescriptions: dict = {}
+        for rx in rx_result.all():
+            prescriptions.setdefault(rx.consultation_id, []).append(rx.model_dump())
+
+        return [
+            {
+                **c.model_dump(),
+                "patient_name": f"{first_name} {last_name}" if user_id else "Unknown",
+                "prescriptions": prescriptions.get(c.id, []),
+            }
+            for c, first_name, last_name, user_id in rows
+        ]
+
+    @staticmethod
+    def _encode_pharmacy_cursor(c: Consultation) -> str:
+        raw = json.dumps([c.completed_at.isoformat() if c.completed_at else None, c.id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_pharmacy_cursor(cursor: str):
+        try:
+            completed_at, consultation_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (datetime.fromisoformat(completed_at) if completed_at else None), str(consultation_id)
+        except (ValueError, TypeError):
+            raise HTTPException(400, "Invalid cursor")
+
     @staticmethod
     async def get_pharmacy_queue(
         session: AsyncSession,
         branch_id: Optional[str] = None,
-    ):
-        """Get consultations that have prescriptions and are completed/paid but medicines not issued."""
-        q = select(Consultation).where(
-            Consultation.status.in_(["completed", "paid"]),
-            Consultation.medicines_issued_at == None,  # noqa: E711
-        )
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """Get consultations that have prescriptions and are completed/paid but medicines not issued.
+
+        Newest ``completed_at`` first.  Without *limit* the whole queue is
+        returned; with it the queue is keyset-paginated: pass the returned
+        ``next_cursor`` back to fetch the following page.  Costs two queries per
+        page (queue rows with patient names, then their prescriptions).
+        """
+        q = ConsultationService._pharmacy_queue_query()
         if branch_id:
             q = q.where(Consultation.branch_id == branch_id)
-        q = q.order_by(Consultation.completed_at.desc())  # type: ignore
+        if cursor:
+            # completed_at DESC puts NULLs last on both MySQL and SQLite.
+            after_at, after_id = ConsultationService._decode_pharmacy_cursor(cursor)
+            if after_at is None:
+                q = q.where(Consultation.completed_at == None, Consultation.id < after_id)  # noqa: E711
+            else:
+                q = q.where(or_(
+                    Consultation.completed_at < after_at,
+                    and_(Consultation.completed_at == after_at, Consultation.id < after_id),
+                    Consultation.completed_at == None,  # noqa: E711
+                ))
+        q = q.order_by(Consultation.completed_at.desc(), Consultation.id.desc())  # type: ignore
+        if limit is not None:
+            q = q.limit(limit + 1)
         result = await session.exec(q)
-        consultations = list(result.all())
+        rows = list(result.all())
 
-        # Only include consultations that have prescriptions
-        enriched = []
-        for c in consultations:
-            rx_result = await session.exec(
-                select(ConsultationPrescription).where(
-                    ConsultationPrescription.consultation_id == c.id
-                )
-            )
-            prescriptions = list(rx_result.all())
-            if prescriptions:
-                patient = await session.get(Patient, c.patient_id)
-                patient_name = "Unknown"
-                if patient:
-                    from app.models.user import User
-                    user = await session.get(User, patient.user_id)
-                    patient_name = f"{user.first_name} {user.last_name}" if user else "Unknown"
-
-                enriched.append({
-                    **c.model_dump(),
-                    "patient_name": patient_name,
-                    "prescriptions": [p.model_dump() for p in prescriptions],
-                })
-        return enriched
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = ConsultationService._encode_pharmacy_cursor(rows[-1][0])
+        return {
+            "queue": await ConsultationService._enrich_pharmacy_rows(session, rows),
+            "next_cursor": next_cursor,
+        }
+
+    @staticmethod
+    async def get_pharmacy_queue_entry(session: AsyncSession, consultation_id: str) -> Optional[dict]:
+        """Single pharmacy-queue entry, or None if the consultation is not awaiting dispensing."""
+        q = ConsultationService._pharmacy_queue_query().where(Consultation.id == consultation_id)
+        result = await session.exec(q)
+        entries = await ConsultationService._enrich_pharmacy_rows(session, list(result.all()))
+        return entries[0] if entries else None
 
     # ============================================================
     # Sub-item helpers (existing)
@@ -560,7 +660,7 @@ class ConsultationService:
         # 1. Today's consultations by status
         status_q = (
             select(Consultation.status, func.count(Consultation.id))
-            .where(func.date(Consultation.started_at) == target_date)
+            .where(on_date(Consultation.started_at, target_date))
             .group_by(Consultation.status)
         )
         status_q = branch_filter(status_q)
@@ -598,8 +698,7 @@ class ConsultationService:
         issued_today_q = (
             select(func.count(Consultation.id))
             .where(
-                Consultation.medicines_issued_at != None,  # noqa: E711
-                func.date(Consultation.medicines_issued_at) == target_date,
+                on_date(Consultation.medicines_issued_at, target_date),
             )
         )
         issued_today_q = branch_filter(issued_today_q)
@@ -617,8 +716,7 @@ class ConsultationService:
         revenue_q = (
             select(func.coalesce(func.sum(Consultation.consultation_fee), 0))
             .where(
-                Consultation.payment_collected_at != None,  # noqa: E711
-                func.date(Consultation.payment_collected_at) == target_date,
+                on_date(Consultation.payment_collected_at, target_date),
             )
         )
         revenue_q = branch_filter(revenue_q)
@@ -638,7 +736,7 @@ class ConsultationService:
             )
             .where(
                 Consultation.completed_at != None,  # noqa: E711
-                func.date(Consultation.started_at) == target_date,
+                on_date(Consultation.started_at, target_date),
             )
         )
         duration_q = branch_filter(duration_q)
@@ -0,0 +1,196 @@
+"""Aho–Corasick matcher for ``ChatbotService.match_disease``.
+
+Every active mapping's disease name and synonyms are compiled into one
+automaton, so a chat message is scanned once however many mappings exist.
+Matches must start and end on word boundaries ("flu" does not fire inside
+"fluid").  When several mappings match, the highest priority wins, then the
+longest matched phrase, then the earliest one in the message.
+
+Each worker compiles the automaton at startup (``app.main.lifespan``), or on
+its first match if that failed, and recompiles it on the next match after a
+commit that touches ``DiseaseMapping`` in any worker (signalled over the
+broadcast backend).
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.broadcast import get_broadcast_backend
+from app.models.chatbot import DiseaseMapping
+
+CHANGED_CHANNEL = "_disease-mappings-changed"
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _SPACES.sub(" ", text.lower()).strip()
+
+
+def _is_word_char(ch: str) -> bool:
+    # Sinhala vowel signs and ZWJ are not alphanumeric but belong to the word.
+    return ch.isalnum() or "\u0D80" <= ch <= "\u0DFF" or ch == "\u200D"
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher; ``find_all`` yields ``(start, end, value)``."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern, value)
+        self._link()
+
+    def _add(self, pattern: str, value: object) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), value))
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, value in out[state]:
+                yield i + 1 - length, i + 1, value
+
+
+@dataclass(frozen=True)
+class _Target:
+    mapping_id: str
+    priority: int
+
+
+class DiseaseMatcher:
+    def __init__(self):
+        self._automaton: Optional[AhoCorasick] = None
+        self._stale = True
+        self._lock: Optional[asyncio.Lock] = None
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def compile(self, mappings: Iterable[DiseaseMapping]) -> None:
+        patterns = []
+        for mapping in mappings:
+            target = _Target(mapping.id, mapping.priority or 0)
+            phrases = {normalize(mapping.disease_name)}
+            phrases.update(normalize(s) for s in (mapping.synonyms or "").split(","))
+            patterns.extend((phrase, target) for phrase in phrases if phrase)
+        self._automaton = AhoCorasick(patterns)
+
+    async def ensure_current(self, session: AsyncSession) -> None:
+        if not self._stale:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._stale:
+                await join_bus()
+                self._stale = False  # changes committed from here on mark it again
+                try:
+                    result = await session.exec(select(DiseaseMapping).where(DiseaseMapping.is_active == True))
+                    self.compile(result.all())
+                except Exception:
+                    self._stale = True  # load again on the next match
+                    raise
+
+    def matches(self, question: str) -> List[Tuple[int, int, str, int]]:
+        """Every whole-word match in *question* as ``(start, end, mapping_id, priority)``."""
+        if self._automaton is None:
+            return []
+        text = normalize(question)
+        found = []
+        for start, end, target in self._automaton.find_all(text):
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            found.append((start, end, target.mapping_id, target.priority))
+        return found
+
+    def best(self, question: str) -> Optional[str]:
+        """Mapping id of the winning match: highest priority, then longest, then earliest."""
+        found = self.matches(question)
+        if not found:
+            return None
+        start, end, mapping_id, priority = max(found, key=lambda m: (m[3], m[1] - m[0], -m[0]))
+        return mapping_id
+
+
+disease_matcher = DiseaseMatcher()
+
+
+async def _on_broadcast(channel: str, data: dict) -> None:
+    if channel == CHANGED_CHANNEL:
+        disease_matcher.mark_stale()
+
+
+async def join_bus() -> None:
+    backend = get_broadcast_backend()
+    backend.add_handler(_on_broadcast)
+    await backend.start()
+
+
+async def _publish() -> None:
+    await join_bus()
+    await get_broadcast_backend().publish(CHANGED_CHANNEL, {})
+
+
+# ---- ORM hooks ----
+
+@event.listens_for(Session, "after_flush")
+def _note_mapping_changes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, DiseaseMapping) for obj in session.new | session.dirty | session.deleted):
+        session.info["disease_mappings_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_mapping_changes(session: Session) -> None:
+    if not session.info.pop("disease_mappings_changed", False):
+        return
+    disease_matcher.mark_stale()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    loop.create_task(_publish())
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_mapping_changes(session: Session) -> None:
+    session.info.pop("disease_mappings_changed", None)
@@ -3,11 +3,13 @@ from __future__ import annotations
 
 import json
 from datetime import date, datetime, time, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 from fastapi import HTTPException
-from sqlmodel import select
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.doctor_schedule import (
@@ -17,11 +19,15 @@ from app.models.doctor_schedule import (
     SlotLock,
 )
 from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.services.availability_index import SlotBlock, availability_index, build_block
 
 
 class DoctorScheduleService:
     """Encapsulates schedule CRUD, slot generation, conflict detection, and lock management."""
 
+    MAX_AVAILABILITY_RANGE_DAYS = 31
+
     # ---- Schedule CRUD ----
 
     @staticmethod
@@ -32,6 +38,7 @@ class DoctorScheduleService:
         session.add(schedule)
         await session.commit()
         await session.refresh(schedule)
+        availability_index.invalidate(schedule.doctor_id)
         return schedule
 
     @staticmethod
@@ -73,6 +80,7 @@ class DoctorScheduleService:
         session.add(mod)
         await session.commit()
         await session.refresh(schedule)
+        availability_index.invalidate(schedule.doctor_id)
         return schedule
 
     @staticmethod
@@ -80,8 +88,10 @@ class DoctorScheduleService:
         schedule = await session.get(DoctorSchedule, schedule_id)
         if not schedule:
             raise HTTPException(404, "Schedule not found")
+        doctor_id = schedule.doctor_id
         await session.delete(schedule)
         await session.commit()
+        availability_index.invalidate(doctor_id)
 
     # ---- Availability / Slot Generation ----
 
@@ -105,77 +115,211 @@ class DoctorScheduleService:
         branch_id: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Return available (un-booked, un-locked, un-cancelled) slots for a doctor on a given date."""
-        weekday = check_date.weekday()
-        q = select(DoctorSchedule).where(
-            DoctorSchedule.doctor_id == doctor_id,
-            DoctorSchedule.day_of_week == weekday,
-            DoctorSchedule.status == "active",
+        days = await DoctorScheduleService.check_availability_range(
+            session, doctor_id, check_date, check_date, branch_id
         )
-        if branch_id:
-            q = q.where(DoctorSchedule.branch_id == branch_id)
-        result = await session.exec(q)
-        schedules = list(result.all())
+        return days[check_date]
 
-        # filter by valid_from / valid_until
-        schedules = [
-            s for s in schedules
-            if (s.valid_from is None or s.valid_from <= check_date)
-            and (s.valid_until is None or s.valid_until >= check_date)
-        ]
+    @staticmethod
+    async def check_availability_range(
+        session: AsyncSession,
+        doctor_id: str,
+        start_date: date,
+        end_date: date,
+        branch_id: Optional[str] = None,
+    ) -> Dict[date, List[Dict[str, Any]]]:
+        """Return availability for every date in [start_date, end_date], keyed by date.
+
+        Days already held in the availability index are served from memory; the
+        rest are loaded together with one query per table.
+        """
+        days = DoctorScheduleService._date_range(start_date, end_date)
+
+        blocks_by_day: Dict[date, List[SlotBlock]] = {}
+        missing: List[date] = []
+        for d in days:
+            cached = availability_index.get(doctor_id, d)
+            if cached is None:
+                missing.append(d)
+            else:
+                blocks_by_day[d] = cached
+
+        if missing:
+            generation = availability_index.generation(doctor_id)
+            loaded, valid_for = await DoctorScheduleService._load_day_blocks(
+                session, [doctor_id], missing[0], missing[-1]
+            )
+            for d in missing:
+                blocks_by_day[d] = loaded.get((doctor_id, d), [])
+                availability_index.put(
+                    doctor_id, d, blocks_by_day[d], generation, valid_for.get((doctor_id, d))
+                )
+
+        return {
+            d: [b.to_dict() for b in blocks_by_day[d] if not branch_id or b.branch_id == branch_id]
+            for d in days
+        }
 
-        # check cancellations
-        cancel_q = select(DoctorScheduleCancellation).where(
-            DoctorScheduleCancellation.doctor_id == doctor_id,
-            DoctorScheduleCancellation.status == "approved",
-            DoctorScheduleCancellation.cancel_date <= check_date,
+    @staticmethod
+    async def branch_availability(
+        session: AsyncSession,
+        branch_id: str,
+        start_date: date,
+        end_date: date,
+        specialization: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Slot matrix for every doctor scheduled at a branch over a date range.
+
+        Costs one query to find the doctors plus, for any (doctor, day) not
+        already in the availability index, one query per table for all of them
+        together, so the query count does not grow with doctors or days.
+        """
+        days = DoctorScheduleService._date_range(start_date, end_date)
+
+        doctor_q = (
+            select(Doctor)
+            .where(
+                col(Doctor.id).in_(
+                    select(DoctorSchedule.doctor_id).where(
+                        DoctorSchedule.branch_id == branch_id,
+                        DoctorSchedule.status == "active",
+                    )
+                )
+            )
+            .order_by(Doctor.first_name, Doctor.last_name)
         )
-        cancel_result = await session.exec(cancel_q)
-        cancelled_ids = set()
-        for c in cancel_result.all():
-            end_d = c.cancel_end_date or c.cancel_date
-            if c.cancel_date <= check_date <= end_d:
-                cancelled_ids.add(c.schedule_id)
-
-        schedules = [s for s in schedules if s.id not in cancelled_ids]
-
-        # booked appointments
-        appt_q = select(Appointment).where(
-            Appointment.doctor_id == doctor_id,
-            Appointment.appointment_date == check_date,
-            Appointment.status != "cancelled",
+        if specialization:
+            doctor_q = doctor_q.where(col(Doctor.specialization).ilike(f"%{specialization}%"))
+        doctor_result = await session.exec(doctor_q)
+        doctors = list(doctor_result.all())
+
+        blocks: Dict[Tuple[str, date], List[SlotBlock]] = {}
+        to_load: List[str] = []
+        generations: Dict[str, int] = {}
+        for doctor in doctors:
+            cached = {d: availability_index.get(doctor.id, d) for d in days}
+            if any(v is None for v in cached.values()):
+                to_load.append(doctor.id)
+                generations[doctor.id] = availability_index.generation(doctor.id)
+            else:
+                blocks.update({(doctor.id, d): v for d, v in cached.items()})
+
+        if to_load:
+            loaded, valid_for = await DoctorScheduleService._load_day_blocks(
+                session, to_load, start_date, end_date
+            )
+            for doctor_id in to_load:
+                for d in days:
+                    day_blocks = loaded.get((doctor_id, d), [])
+                    blocks[(doctor_id, d)] = day_blocks
+                    availability_index.put(
+                        doctor_id, d, day_blocks, generations[doctor_id], valid_for.get((doctor_id, d))
+                    )
+
+        matrix: List[Dict[str, Any]] = []
+        for doctor in doctors:
+            matrix.append({
+                "doctor_id": doctor.id,
+                "doctor_name": f"{doctor.first_name} {doctor.last_name}".strip(),
+                "specialization": doctor.specialization,
+                "days": [
+                    {
+                        "date": d.isoformat(),
+                        "slots": [b.to_dict() for b in blocks[(doctor.id, d)] if b.branch_id == branch_id],
+                    }
+                    for d in days
+                ],
+            })
+        return matrix
+
+    @staticmethod
+    async def _load_day_blocks(
+        session: AsyncSession, doctor_ids: List[str], start_date: date, end_date: date
+    ) -> Tuple[Dict[Tuple[str, date], List[SlotBlock]], Dict[Tuple[str, date], float]]:
+        """Build slot blocks for every (doctor, day) in the range from four set-based queries.
+
+        Also returns, per (doctor, day), the seconds until its earliest live slot
+        lock expires so the cached entry does not outlive the lock.
+        """
+        sched_result = await session.exec(
+            select(DoctorSchedule).where(
+                col(DoctorSchedule.doctor_id).in_(doctor_ids),
+                DoctorSchedule.status == "active",
+            )
+        )
+        schedules: Dict[str, List[DoctorSchedule]] = {}
+        for sched in sched_result.all():
+            schedules.setdefault(sched.doctor_id, []).append(sched)
+
+        cancel_result = await session.exec(
+            select(DoctorScheduleCancellation).where(
+                col(DoctorScheduleCancellation.doctor_id).in_(doctor_ids),
+                DoctorScheduleCancellation.status == "approved",
+                DoctorScheduleCancellation.cancel_date <= end_date,
+            )
         )
-        appt_result = await session.exec(appt_q)
-        booked_times = {a.appointment_time for a in appt_result.all()}
+        cancellations = [
+            c for c in cancel_result.all() if (c.cancel_end_date or c.cancel_date) >= start_date
+        ]
 
-        # active slot locks
-        now = datetime.now(timezone.utc)
-        lock_q = select(SlotLock).where(
-            SlotLock.doctor_id == doctor_id,
-            SlotLock.slot_date == check_date,
-            SlotLock.expires_at > now,
+        appt_result = await session.exec(
+            select(Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time).where(
+                col(Appointment.doctor_id).in_(doctor_ids),
+                Appointment.appointment_date >= start_date,
+                Appointment.appointment_date <= end_date,
+                Appointment.status != "cancelled",
+            )
         )
-        lock_result = await session.exec(lock_q)
-        locked_times = {lk.slot_time for lk in lock_result.all()}
+        taken: Dict[Tuple[str, date], set] = {}
+        for appt_doctor, appt_date, appt_time in appt_result.all():
+            taken.setdefault((appt_doctor, appt_date), set()).add(appt_time)
 
-        result_slots: List[Dict[str, Any]] = []
-        for sched in schedules:
-            all_slots = DoctorScheduleService.generate_slots(
-                sched.start_time, sched.end_time, sched.slot_duration_minutes
+        now = datetime.now(timezone.utc)
+        lock_result = await session.exec(
+            select(SlotLock).where(
+                col(SlotLock.doctor_id).in_(doctor_ids),
+                SlotLock.slot_date >= start_date,
+                SlotLock.slot_date <= end_date,
+                SlotLock.expires_at > now,
             )
-            available = [
-                t for t in all_slots if t not in booked_times and t not in locked_times
-            ]
-            result_slots.append({
-                "schedule_id": sched.id,
-                "branch_id": sched.branch_id,
-                "start_time": sched.start_time.isoformat(),
-                "end_time": sched.end_time.isoformat(),
-                "slot_duration_minutes": sched.slot_duration_minutes,
-                "available_slots": [t.strftime("%H:%M") for t in available],
-                "total_slots": len(all_slots),
-                "booked_slots": len(all_slots) - len(available),
-            })
-        return result_slots
+        )
+        valid_for: Dict[Tuple[str, date], float] = {}
+        for lk in lock_result.all():
+            key = (lk.doctor_id, lk.slot_date)
+            taken.setdefault(key, set()).add(lk.slot_time)
+            expires_at = lk.expires_at if lk.expires_at.tzinfo else lk.expires_at.replace(tzinfo=timezone.utc)
+            remaining = (expires_at - now).total_seconds()
+            valid_for[key] = min(valid_for.get(key, remaining), remaining)
+
+        blocks_by_day: Dict[Tuple[str, date], List[SlotBlock]] = {}
+        for doctor_id in doctor_ids:
+            doctor_schedules = schedules.get(doctor_id, [])
+            doctor_cancellations = [c for c in cancellations if c.doctor_id == doctor_id]
+            cur = start_date
+            while cur <= end_date:
+                cancelled_ids = {
+                    c.schedule_id for c in doctor_cancellations
+                    if c.cancel_date <= cur <= (c.cancel_end_date or c.cancel_date)
+                }
+                day_taken = taken.get((doctor_id, cur), set())
+                blocks: List[SlotBlock] = []
+                for sched in doctor_schedules:
+                    if sched.day_of_week != cur.weekday() or sched.id in cancelled_ids:
+                        continue
+                    if sched.valid_from is not None and sched.valid_from > cur:
+                        continue
+                    if sched.valid_until is not None and sched.valid_until < cur:
+                        continue
+                    slots = DoctorScheduleService.generate_slots(
+                        sched.start_time, sched.end_time, sched.slot_duration_minutes
+                    )
+                    blocks.append(build_block(
+                        sched.id, sched.branch_id, sched.start_time, sched.end_time,
+                        sched.slot_duration_minutes, slots, day_taken,
+                    ))
+                blocks_by_day[(doctor_id, cur)] = blocks
+                cur += timedelta(days=1)
+        return blocks_by_day, valid_for
 
     # ---- Cancellation Workflow ----
 
@@ -197,6 +341,7 @@ class DoctorScheduleService:
         session.add(cancel)
         await session.commit()
         await session.refresh(cancel)
+        availability_index.invalidate(cancel.doctor_id)
         return cancel
 
     @staticmethod
@@ -274,38 +419,98 @@ class DoctorScheduleService:
 
     # ---- Slot Lock helpers ----
 
+    @staticmethod
+    async def claim_slot_lock(
+        session: AsyncSession, doctor_id: str, slot_date: date, slot_time: time, locked_by: str,
+        expires_at: datetime, schedule_id: Optional[str] = None, appointment_id: Optional[str] = None,
+    ) -> bool:
+        """Take the slot's lock row for ``locked_by`` (caller commits); False if another user holds it.
+
+        One conditional UPDATE takes over an expired row or ``locked_by``'s own
+        hold; otherwise a row is inserted, and uq_slot_lock_doctor_date_time
+        turns a concurrent claim into a conflict instead of a second hold.
+        """
+        now = datetime.now(timezone.utc)
+        values = dict(locked_by=locked_by, locked_at=now, expires_at=expires_at,
+                      schedule_id=schedule_id, appointment_id=appointment_id)
+        result = await session.exec(
+            update(SlotLock)
+            .where(
+                SlotLock.doctor_id == doctor_id,
+                SlotLock.slot_date == slot_date,
+                SlotLock.slot_time == slot_time,
+                or_(
+                    SlotLock.expires_at <= now,
+                    and_(SlotLock.locked_by == locked_by, SlotLock.appointment_id == None),  # noqa: E711
+                ),
+            )
+            .values(**values)
+        )
+        if result.rowcount:
+            return True
+        try:
+            async with session.begin_nested():
+                session.add(SlotLock(doctor_id=doctor_id, slot_date=slot_date, slot_time=slot_time, **values))
+        except IntegrityError:
+            return False
+        return True
+
     @staticmethod
     async def lock_slot(
         session: AsyncSession, doctor_id: str, slot_date: date, slot_time: time,
         locked_by: str, schedule_id: Optional[str] = None, ttl_minutes: int = 5,
     ) -> SlotLock:
-        lock = SlotLock(
-            doctor_id=doctor_id,
-            schedule_id=schedule_id,
-            slot_date=slot_date,
-            slot_time=slot_time,
-            locked_by=locked_by,
-            expires_at=datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes),
+        booked = await session.exec(
+            select(Appointment.id).where(
+                Appointment.doctor_id == doctor_id,
+                Appointment.appointment_date == slot_date,
+                Appointment.appointment_time == slot_time,
+                Appointment.status != "cancelled",
+            )
         )
-        session.add(lock)
+        if booked.first():
+            raise HTTPException(409, "Slot already booked")
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes)
+        if not await DoctorScheduleService.claim_slot_lock(
+            session, doctor_id, slot_date, slot_time, locked_by, expires_at, schedule_id=schedule_id
+        ):
+            await session.rollback()
+            raise HTTPException(409, "Slot is held by another booking")
         await session.commit()
-        await session.refresh(lock)
-        return lock
+        result = await session.exec(
+            select(SlotLock).where(
+                SlotLock.doctor_id == doctor_id, SlotLock.slot_date == slot_date, SlotLock.slot_time == slot_time,
+            )
+        )
+        availability_index.invalidate(doctor_id, slot_date)
+        return result.one()
 
     @staticmethod
     async def release_expired_locks(session: AsyncSession) -> int:
+        """Delete expired holds, and locks converted into appointments once their day has passed
+        (run by the scheduler's slot-lock-expiry job)."""
         now = datetime.now(timezone.utc)
-        q = select(SlotLock).where(SlotLock.expires_at <= now, SlotLock.appointment_id == None)  # noqa: E711
-        result = await session.exec(q)
-        expired = list(result.all())
-        for lk in expired:
-            await session.delete(lk)
-        if expired:
-            await session.commit()
-        return len(expired)
+        result = await session.exec(
+            delete(SlotLock).where(
+                SlotLock.expires_at <= now,
+                or_(SlotLock.appointment_id == None, SlotLock.slot_date < date.today()),  # noqa: E711
+            )
+        )
+        await session.commit()
+        return result.rowcount
 
     # ---- Internal helpers ----
 
+    @staticmethod
+    def _date_range(start_date: date, end_date: date) -> List[date]:
+        if end_date < start_date:
+            raise HTTPException(400, "end_date must not be before start_date")
+        if (end_date - start_date).days >= DoctorScheduleService.MAX_AVAILABILITY_RANGE_DAYS:
+            raise HTTPException(
+                400, f"Date range cannot exceed {DoctorScheduleService.MAX_AVAILABILITY_RANGE_DAYS} days"
+            )
+        return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
     @staticmethod
     async def _check_overlap(session: AsyncSession, data: dict) -> None:
         """Raise 409 if a schedule already exists for the same doctor + branch + day overlapping time range."""
@@ -0,0 +1,181 @@
+"""Email outbox dispatcher.
+
+``EmailService.queue_email`` (and the bulk ``queue_campaign``) insert pending
+``email_outbox`` rows and wake the dispatcher (see app/core/outbox.py).  Mail
+goes out over a pool of SMTP_POOL_SIZE long-lived sessions that have done
+STARTTLS and AUTH once, each driven by its own thread of a dedicated executor,
+so a batch of reminders neither repeats the handshake per message nor ties up
+the default threadpool.  A session is NOOPed before reuse after
+SMTP_IDLE_CHECK_SECONDS of idleness and replaced after
+SMTP_MAX_MESSAGES_PER_CONNECTION messages.
+
+4xx replies and connection errors are retried with backoff up to
+EMAIL_MAX_ATTEMPTS; 5xx replies (unknown recipient, rejected content, ...)
+are final.  scripts/bench_email_outbox.py runs the dispatcher against a local
+stand-in SMTP server.
+"""
+import asyncio
+import queue
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional
+
+from app.core.config import settings
+from app.core.outbox import Delivery, OutboxDispatcher
+from app.models.email_outbox import EmailOutbox
+
+
+def smtp_configured() -> bool:
+    return bool(settings.SMTP_USER and settings.SMTP_PASSWORD)
+
+
+class _SmtpSession:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SmtpPool:
+    """Authenticated SMTP sessions kept open between messages (used from worker threads)."""
+
+    def __init__(self, max_messages: int, idle_check_seconds: float):
+        self.max_messages = max_messages
+        self.idle_check_seconds = idle_check_seconds
+        self._idle: "queue.SimpleQueue[_SmtpSession]" = queue.SimpleQueue()
+        self.opened = 0
+
+    def _connect(self) -> _SmtpSession:
+        if settings.SMTP_PORT == 465:
+            smtp = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+        else:
+            smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+            if settings.SMTP_USE_TLS:
+                smtp.starttls()
+        try:
+            smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        except BaseException:
+            smtp.close()
+            raise
+        self.opened += 1
+        return _SmtpSession(smtp)
+
+    def _checkout(self) -> _SmtpSession:
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - session.last_used < self.idle_check_seconds:
+                return session
+            try:
+                if session.smtp.noop()[0] == 250:
+                    return session
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(session)
+
+    def _checkin(self, session: _SmtpSession) -> None:
+        if session.sent >= self.max_messages:
+            self._discard(session)
+            return
+        session.last_used = time.monotonic()
+        self._idle.put(session)
+
+    @staticmethod
+    def _discard(session: _SmtpSession) -> None:
+        try:
+            session.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            session.smtp.close()
+
+    def send(self, msg: MIMEMultipart) -> None:
+        session = self._checkout()
+        try:
+            session.smtp.send_message(msg)
+        except smtplib.SMTPRecipientsRefused:
+            self._checkin(session)  # smtplib has RSET the session
+            raise
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code == 421:
+                self._discard(session)  # server is closing the connection
+            else:
+                self._checkin(session)
+            raise
+        except BaseException:
+            self._discard(session)
+            raise
+        session.sent += 1
+        self._checkin(session)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def build_message(row: EmailOutbox) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = row.subject
+    msg["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL or settings.SMTP_USER}>"
+    msg["To"] = row.to_email
+    msg.attach(MIMEText(row.body, "html" if row.html else "plain"))
+    return msg
+
+
+def _smtp_error(code: int, reply) -> str:
+    text = reply.decode(errors="replace") if isinstance(reply, bytes) else str(reply)
+    return f"{code} {text}"[:500]
+
+
+class EmailDispatcher(OutboxDispatcher):
+    model = EmailOutbox
+
+    def __init__(self, *args, max_messages_per_connection: int, idle_check_seconds: float, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = SmtpPool(max_messages_per_connection, idle_check_seconds)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def stats(self) -> dict:
+        return {**super().stats(), "smtp_connections_opened": self.pool.opened}
+
+    async def close_transport(self) -> None:
+        if self._executor is not None:
+            await asyncio.to_thread(self._executor.shutdown)
+            self._executor = None
+        await asyncio.to_thread(self.pool.close)
+
+    async def deliver(self, row: EmailOutbox) -> Delivery:
+        if not smtp_configured():
+            return Delivery("failed", {"last_error": "SMTP credentials not configured"})
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="smtp")
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.pool.send, build_message(row))
+        except smtplib.SMTPRecipientsRefused as e:
+            code, reply = next(iter(e.recipients.values()))
+            return Delivery("retry" if code < 500 else "failed", {"last_error": _smtp_error(code, reply)})
+        except smtplib.SMTPResponseException as e:
+            return Delivery("retry" if e.smtp_code < 500 else "failed",
+                            {"last_error": _smtp_error(e.smtp_code, e.smtp_error)})
+        except (smtplib.SMTPException, OSError) as e:
+            return Delivery("retry", {"last_error": (str(e) or type(e).__name__)[:500]})
+        return Delivery("sent", {"last_error": None})
+
+
+email_dispatcher = EmailDispatcher(
+    concurrency=settings.SMTP_POOL_SIZE,
+    rate_per_second=settings.EMAIL_RATE_PER_SECOND,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EMAIL_RETRY_BASE_SECONDS,
+    poll_interval=settings.EMAIL_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.EMAIL_SEND_LEASE_SECONDS,
+    max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+    idle_check_seconds=settings.SMTP_IDLE_CHECK_SECONDS,
+)
@@ -1,10 +1,22 @@
-"""Email Service — Patch 5.7 (Background email via SMTP)"""
+"""Email Service — Patch 5.7 (Background email via SMTP)
+
+Emails go through the email_outbox table; see app/services/email_dispatcher.py.
+"""
+
+from datetime import datetime, timedelta
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import insert
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional
 from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.email_dispatcher import email_dispatcher
+
+CAMPAIGN_INSERT_CHUNK = 1000
 
 
 # Email templates
@@ -61,64 +73,136 @@ Regards,
 }
 
 
-class EmailService:
+class CompiledTemplate:
+    """A ``str.format`` template parsed once into literal text and field names."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._parts = []
+        for literal, field_name, spec, conversion in Formatter().parse(text):
+            if field_name is not None and not field_name.isidentifier():
+                raise ValueError(f"Unsupported template field {{{field_name}}} in {text!r}")
+            self._parts.append((literal, field_name, spec, conversion))
+        self.fields = frozenset(name for _, name, _, _ in self._parts if name)
+
+    def render(self, values: dict) -> str:
+        missing = self.fields - values.keys()
+        if missing:
+            raise ValueError(f"Missing template variable: {', '.join(sorted(missing))}")
+        out = []
+        for literal, field_name, spec, conversion in self._parts:
+            out.append(literal)
+            if field_name is not None:
+                value = values[field_name]
+                if conversion == "r":
+                    value = repr(value)
+                elif conversion == "s":
+                    value = str(value)
+                out.append(format(value, spec or ""))
+        return "".join(out)
+
+
+# Compiled at import, so a malformed template fails at startup rather than in a send.
+COMPILED_TEMPLATES: Dict[str, Tuple[CompiledTemplate, CompiledTemplate]] = {
+    name: (CompiledTemplate(tmpl["subject"]), CompiledTemplate(tmpl["body"]))
+    for name, tmpl in EMAIL_TEMPLATES.items()
+}
 
-    @staticmethod
-    def _get_smtp_config() -> dict:
-        return {
-            "host": getattr(settings, "SMTP_HOST", "smtp.gmail.com"),
-            "port": int(getattr(settings, "SMTP_PORT", 587)),
-            "user": getattr(settings, "SMTP_USER", ""),
-            "password": getattr(settings, "SMTP_PASSWORD", ""),
-            "from_email": getattr(settings, "SMTP_FROM_EMAIL", ""),
-            "from_name": getattr(settings, "SMTP_FROM_NAME", "HMS System"),
-        }
+
+class EmailService:
 
     @staticmethod
     def render_template(template_name: str, **kwargs) -> tuple[str, str]:
         """Render email template returning (subject, body)."""
-        tmpl = EMAIL_TEMPLATES.get(template_name)
-        if not tmpl:
+        compiled = COMPILED_TEMPLATES.get(template_name)
+        if not compiled:
             raise ValueError(f"Unknown email template: {template_name}")
-        subject = tmpl["subject"].format(**kwargs)
-        body = tmpl["body"].format(**kwargs)
-        return subject, body
+        subject, body = compiled
+        return subject.render(kwargs), body.render(kwargs)
 
     @staticmethod
-    def send_email_sync(
+    async def queue_email(
+        session: AsyncSession,
         to_email: str,
         subject: str,
         body: str,
         html: bool = False,
-    ) -> dict:
-        """Send email via SMTP (synchronous — use in BackgroundTasks)."""
-        cfg = EmailService._get_smtp_config()
-        if not cfg["user"] or not cfg["password"]:
-            return {"success": False, "error": "SMTP credentials not configured"}
-
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = f"{cfg['from_name']} <{cfg['from_email'] or cfg['user']}>"
-        msg["To"] = to_email
-
-        content_type = "html" if html else "plain"
-        msg.attach(MIMEText(body, content_type))
-
-        try:
-            with smtplib.SMTP(cfg["host"], cfg["port"]) as server:
-                server.starttls()
-                server.login(cfg["user"], cfg["password"])
-                server.send_message(msg)
-            return {"success": True}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        template_name: Optional[str] = None,
+    ) -> EmailOutbox:
+        """Queue one email for the outbox dispatcher."""
+        row = EmailOutbox(
+            to_email=to_email, subject=subject, body=body, html=html,
+            template_name=template_name, next_attempt_at=datetime.utcnow(),
+        )
+        session.add(row)
+        await session.commit()
+        await session.refresh(row)
+        email_dispatcher.wake()
+        return row
 
     @staticmethod
-    def send_template_email_sync(
+    async def queue_template_email(
+        session: AsyncSession,
         to_email: str,
         template_name: str,
         **kwargs,
-    ) -> dict:
-        """Render template and send (synchronous)."""
+    ) -> EmailOutbox:
+        """Render template and queue."""
         subject, body = EmailService.render_template(template_name, **kwargs)
-        return EmailService.send_email_sync(to_email, subject, body)
+        return await EmailService.queue_email(session, to_email, subject, body, template_name=template_name)
+
+    @staticmethod
+    async def queue_campaign(
+        session: AsyncSession,
+        recipients: List[dict],
+        template_name: Optional[str] = None,
+        subject: Optional[str] = None,
+        body: Optional[str] = None,
+        html: bool = False,
+        variables: Optional[dict] = None,
+    ) -> Tuple[str, int]:
+        """Queue one email per ``{"to_email", "variables"}`` recipient; returns (campaign_id, queued).
+
+        Uses a named template or the given subject/body (which may contain
+        ``{placeholders}`` too).  Every recipient is rendered before anything
+        is queued, so a bad one rejects the whole campaign.  Sends are spread
+        at EMAIL_CAMPAIGN_RATE_PER_SECOND so transactional mail queued later
+        is not stuck behind the campaign.
+        """
+        if template_name:
+            compiled = COMPILED_TEMPLATES.get(template_name)
+            if not compiled:
+                raise ValueError(f"Unknown email template: {template_name}")
+        else:
+            compiled = (CompiledTemplate(subject or ""), CompiledTemplate(body or ""))
+        campaign_id = str(uuid4())
+        now = datetime.utcnow()
+        spacing = 1 / settings.EMAIL_CAMPAIGN_RATE_PER_SECOND if settings.EMAIL_CAMPAIGN_RATE_PER_SECOND > 0 else 0
+        rows = []
+        for i, recipient in enumerate(recipients):
+            to_email = recipient.get("to_email")
+            if not to_email:
+                raise ValueError(f"Recipient {i} has no to_email")
+            values = {**(variables or {}), **(recipient.get("variables") or {})}
+            rows.append({
+                "id": str(uuid4()), "to_email": to_email,
+                "subject": compiled[0].render(values), "body": compiled[1].render(values),
+                "html": html, "template_name": template_name, "campaign_id": campaign_id,
+                "status": "pending", "attempts": 0, "created_at": now,
+                "next_attempt_at": now + timedelta(seconds=i * spacing),
+            })
+        for start in range(0, len(rows), CAMPAIGN_INSERT_CHUNK):
+            await session.exec(insert(EmailOutbox), params=rows[start:start + CAMPAIGN_INSERT_CHUNK])
+        await session.commit()
+        if rows:
+            email_dispatcher.wake()
+        return campaign_id, len(rows)
+
+    @staticmethod
+    async def campaign_status(session: AsyncSession, campaign_id: str) -> Dict[str, int]:
+        result = await session.exec(
+            select(EmailOutbox.status, func.count(EmailOutbox.id))
+            .where(EmailOutbox.campaign_id == campaign_id)
+            .group_by(EmailOutbox.status)
+        )
+        return dict(result.all())
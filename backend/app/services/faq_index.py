@@ -0,0 +1,338 @@
+"""In-process inverted index for ``ChatbotService.match_faq``.
+
+Active FAQs are tokenized once (English tokens stemmed, Sinhala tokens
+stripped of common case suffixes, stop words dropped) into per-field posting
+lists for the question, the keywords and the Sinhala question.  A chat message
+only touches the postings of its own terms and is scored with BM25, with the
+field weights and priority multiplier ``match_faq`` always used.
+
+Each worker builds the index at startup (``app.main.lifespan``), or on its
+first match if that failed.  A session
+``after_commit`` listener notes the FAQs a commit touched, here and, over the
+broadcast backend, in every other worker; each worker reloads just those rows
+before its next match.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.broadcast import get_broadcast_backend
+from app.models.chatbot import ChatbotFAQ
+from app.services.chatbot_service import STOP_WORDS, _stem
+
+CHANGED_CHANNEL = "_faq-changed"
+
+# BM25 parameters and per-field weights (keywords counted 1.5x, as before).
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {"question": 1.0, "keywords": 1.5, "question_si": 1.0}
+
+# Cached term scores use a snapshot of the FAQ count and average field
+# lengths; an edit re-scores only its own terms until these drift this far.
+STATS_TOLERANCE = 0.01
+
+# A match needs at least this much evidence, priority-weighted: a shared
+# question word counts 1 (2 if it has 4+ letters), a keyword 1.5 and any
+# Sinhala question word 2 -- the thresholds of the original scan.
+MIN_EVIDENCE = 2.0
+
+# Sinhala vowel signs are combining marks, which \w does not match.
+_TOKEN_RE = re.compile(r"[\w\u0D80-\u0DFF\u200D]+")
+_SINHALA_RE = re.compile(r"[\u0D80-\u0DFF]")
+# Common Sinhala case / plural endings, longest first.
+_SINHALA_SUFFIXES = ("යන්ට", "වලට", "වලින්", "යන්", "යට", "යේ", "ගේ", "වල", "ට", "ද", "ය")
+
+
+def _stem_sinhala(word: str) -> str:
+    for suffix in _SINHALA_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased, stemmed, stop-word-free tokens of *text*."""
+    if not text:
+        return []
+    terms = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        terms.append(_stem_sinhala(word) if _SINHALA_RE.search(word) else _stem(word))
+    return terms
+
+
+def _keyword_terms(keywords: Optional[str]) -> List[str]:
+    terms = []
+    for keyword in (keywords or "").split(","):
+        terms.extend(tokenize(keyword))
+    return terms
+
+
+@dataclass
+class _Doc:
+    priority: int
+    question: str
+    question_si: Optional[str]
+    terms: Dict[str, Counter]
+    lengths: Dict[str, int]
+
+
+class FAQIndex:
+    def __init__(self):
+        self._lock: Optional[asyncio.Lock] = None
+        self.clear()
+
+    def clear(self) -> None:
+        self._docs: Dict[str, _Doc] = {}
+        self._postings: Dict[str, Dict[str, Dict[str, int]]] = {f: defaultdict(dict) for f in FIELD_WEIGHTS}
+        self._total_length: Dict[str, int] = {f: 0 for f in FIELD_WEIGHTS}
+        self._built = False
+        self._pending: Set[str] = set()
+        self._score_cache: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._scored_stats: Optional[Tuple[int, Dict[str, float]]] = None
+        self._top_cache: Dict[Tuple[int, str], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ---- maintenance ----
+
+    def upsert(self, faq_id: str, values: dict) -> None:
+        """Index (or re-index) one FAQ from its column values; inactive FAQs are removed."""
+        self.remove(faq_id)
+        self._top_cache.clear()
+        if not values.get("is_active"):
+            return
+        fields = {
+            "question": Counter(tokenize(values.get("question"))),
+            "keywords": Counter(_keyword_terms(values.get("keywords"))),
+            "question_si": Counter(tokenize(values.get("question_si"))),
+        }
+        doc = _Doc(
+            priority=values.get("priority") or 0,
+            question=values.get("question") or "",
+            question_si=values.get("question_si"),
+            terms=fields,
+            lengths={f: sum(c.values()) for f, c in fields.items()},
+        )
+        self._docs[faq_id] = doc
+        for field, counts in fields.items():
+            postings = self._postings[field]
+            for term, tf in counts.items():
+                postings[term][faq_id] = tf
+            self._total_length[field] += doc.lengths[field]
+        self._rescore(doc)
+
+    def remove(self, faq_id: str) -> None:
+        doc = self._docs.pop(faq_id, None)
+        if doc is None:
+            return
+        self._top_cache.clear()
+        for field, counts in doc.terms.items():
+            postings = self._postings[field]
+            for term in counts:
+                docs = postings.get(term)
+                if docs is not None:
+                    docs.pop(faq_id, None)
+                    if not docs:
+                        del postings[term]
+            self._total_length[field] -= doc.lengths[field]
+        self._rescore(doc)
+
+    def _stats(self) -> Tuple[int, Dict[str, float]]:
+        n_docs = len(self._docs)
+        return n_docs, {f: (self._total_length[f] / n_docs if n_docs else 0.0) or 1.0 for f in FIELD_WEIGHTS}
+
+    def _rescore(self, doc: _Doc) -> None:
+        """Drop cached scores an added or removed FAQ changed.
+
+        Its own terms changed document frequency, so they are re-scored.  Every
+        other term moved only with the FAQ count and average field lengths;
+        once those drift past STATS_TOLERANCE from the snapshot the cached
+        scores were computed with, everything is re-scored.
+        """
+        if self._scored_stats is None:
+            return
+        n_then, avg_then = self._scored_stats
+        n_now, avg_now = self._stats()
+        drifted = abs(n_now - n_then) > STATS_TOLERANCE * n_then or any(
+            abs(avg_now[f] - avg_then[f]) > STATS_TOLERANCE * avg_then[f] for f in FIELD_WEIGHTS
+        )
+        if drifted:
+            self._score_cache.clear()
+            self._scored_stats = None
+            return
+        for field, counts in doc.terms.items():
+            for term in counts:
+                self._score_cache.pop((field, term), None)
+
+    def warm(self) -> None:
+        """Score every indexed term now, so no match pays for a first lookup."""
+        for field in FIELD_WEIGHTS:
+            for term in list(self._postings[field]):
+                self._contributions(field, term)
+
+    def mark_changed(self, faq_ids: Iterable[str]) -> None:
+        """Reload these FAQs from the database before the next match."""
+        self._pending.update(faq_ids)
+
+    async def ensure_current(self, session: AsyncSession) -> None:
+        if self._built and not self._pending:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._built:
+                await join_bus()
+                self._pending.clear()
+                result = await session.exec(select(ChatbotFAQ).where(ChatbotFAQ.is_active == True))
+                for faq in result.all():
+                    self.upsert(faq.id, faq.model_dump())
+                self.warm()
+                self._built = True
+            elif self._pending:
+                ids, self._pending = self._pending, set()
+                result = await session.exec(select(ChatbotFAQ).where(col(ChatbotFAQ.id).in_(ids)))
+                found = {faq.id: faq for faq in result.all()}
+                for faq_id in ids:
+                    faq = found.get(faq_id)
+                    if faq is None:
+                        self.remove(faq_id)
+                    else:
+                        self.upsert(faq_id, faq.model_dump())
+
+    # ---- lookup ----
+
+    def top_questions(self, limit: int, language: str = "en") -> List[str]:
+        """Questions of the *limit* highest-priority FAQs (Sinhala text where asked for and present)."""
+        key = (limit, language)
+        cached = self._top_cache.get(key)
+        if cached is None:
+            docs = heapq.nlargest(limit, self._docs.values(), key=lambda d: d.priority)
+            cached = [
+                d.question_si if language == "si" and d.question_si else d.question
+                for d in docs
+            ]
+            self._top_cache[key] = cached
+        return list(cached)
+
+    def _contributions(self, field: str, term: str) -> Dict[str, float]:
+        """Priority-boosted BM25 score of *term* in *field* for every FAQ containing it.
+
+        Cached per term until an edit touches the term or the FAQ count and
+        average field lengths drift (see ``_rescore``).  Terms no FAQ contains
+        are not cached, so arbitrary question words cannot grow the cache.
+        """
+        docs = self._postings[field].get(term)
+        if not docs:
+            return {}
+        key = (field, term)
+        cached = self._score_cache.get(key)
+        if cached is not None:
+            return cached
+        if self._scored_stats is None:
+            self._scored_stats = self._stats()
+        n_docs, avg_lengths = self._scored_stats
+        avg_length = avg_lengths[field]
+        idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        weight = FIELD_WEIGHTS[field] * idf
+        contributions = {}
+        for faq_id, tf in docs.items():
+            doc = self._docs[faq_id]
+            norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc.lengths[field] / avg_length))
+            contributions[faq_id] = weight * norm * (1 + doc.priority / 100)
+        self._score_cache[key] = contributions
+        return contributions
+
+    def _has_enough_evidence(self, faq_id: str, terms: Set[str], fields: List[str]) -> bool:
+        doc = self._docs[faq_id]
+        evidence = 0.0
+        for term in terms:
+            if term in doc.terms["question"]:
+                evidence += 2.0 if len(term) >= 4 else 1.0
+            if term in doc.terms["keywords"]:
+                evidence += 1.5
+        if "question_si" in fields and not terms.isdisjoint(doc.terms["question_si"]):
+            evidence += 2.0
+        return evidence * (1 + doc.priority / 100) >= MIN_EVIDENCE
+
+    def best_match(self, question: str, language: str = "en") -> Optional[Tuple[str, float]]:
+        """Return ``(faq_id, score)`` of the best FAQ for *question*, or None."""
+        terms = set(tokenize(question))
+        if not terms or not self._docs:
+            return None
+        fields = ["question", "keywords"] + (["question_si"] if language == "si" else [])
+        scores: Dict[str, float] = {}
+        get = scores.get
+        for field in fields:
+            for term in terms:
+                for faq_id, score in self._contributions(field, term).items():
+                    scores[faq_id] = get(faq_id, 0.0) + score
+        if not scores:
+            return None
+        # Nearly always the top-scoring FAQ also clears the evidence bar.
+        best = max(scores, key=get)
+        if self._has_enough_evidence(best, terms, fields):
+            return best, scores[best]
+        for faq_id in sorted(scores, key=get, reverse=True)[1:]:
+            if self._has_enough_evidence(faq_id, terms, fields):
+                return faq_id, scores[faq_id]
+        return None
+
+
+faq_index = FAQIndex()
+
+
+async def _on_broadcast(channel: str, data: dict) -> None:
+    if channel == CHANGED_CHANNEL:
+        faq_index.mark_changed(data.get("ids", ()))
+
+
+async def join_bus() -> None:
+    backend = get_broadcast_backend()
+    backend.add_handler(_on_broadcast)
+    await backend.start()
+
+
+async def _publish(faq_ids: List[str]) -> None:
+    await join_bus()
+    await get_broadcast_backend().publish(CHANGED_CHANNEL, {"ids": faq_ids})
+
+
+# ---- ORM hooks ----
+
+@event.listens_for(Session, "after_flush")
+def _collect_faq_changes(session: Session, flush_context) -> None:
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, ChatbotFAQ):
+            session.info.setdefault("faq_changes", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_faq_changes(session: Session) -> None:
+    changes = session.info.pop("faq_changes", None)
+    if not changes:
+        return
+    faq_index.mark_changed(changes)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    loop.create_task(_publish(sorted(changes)))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_faq_changes(session: Session) -> None:
+    session.info.pop("faq_changes", None)
@@ -0,0 +1,152 @@
+"""Periodic maintenance jobs, registered with the scheduler (app/core/scheduler.py).
+
+Each replaces work that used to happen inline on a request path, or not at
+all.  All of them are set-based and safe to repeat: the scheduler runs each
+one on a single worker per interval, but a crashed run is retried after its
+lease and the reminder job claims its appointments before queueing anything.
+Importing this module registers the jobs; app.main imports it before
+``scheduler.start()``.
+"""
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import insert, update
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.scheduler import scheduler
+from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.patient_session import ScheduleSession
+from app.models.sms_log import SmsLog
+from app.models.user import User
+from app.services.chat_log_writer import reconcile_pending_feedback
+from app.services.doctor_schedule_service import DoctorScheduleService
+from app.services.pos_service import POSService
+from app.services.sms_dispatcher import provider_configured, sms_dispatcher
+from app.services.sms_service import SmsService
+from app.services.token_revocation import purge_expired
+from app.services.unread_counter import reconcile
+
+REMINDER_CHUNK = 500
+
+
+@scheduler.job("slot-lock-expiry", interval_seconds=settings.SLOT_LOCK_EXPIRY_INTERVAL_SECONDS)
+async def expire_slot_locks(session: AsyncSession) -> int:
+    """Delete expired slot holds (and locks of past bookings)."""
+    return await DoctorScheduleService.release_expired_locks(session)
+
+
+@scheduler.job("token-blacklist-purge", interval_seconds=settings.TOKEN_BLACKLIST_PURGE_INTERVAL_SECONDS)
+async def purge_token_blacklist(session: AsyncSession) -> int:
+    return await purge_expired(session)
+
+
+@scheduler.job("schedule-session-close", interval_seconds=settings.SCHEDULE_SESSION_CLOSE_INTERVAL_SECONDS)
+async def close_stale_sessions(session: AsyncSession) -> int:
+    """Complete sessions from past days that were never closed by the doctor."""
+    result = await session.exec(
+        update(ScheduleSession)
+        .where(ScheduleSession.status == "active", ScheduleSession.session_date < date.today())
+        .values(status="completed", updated_at=datetime.utcnow())
+    )
+    await session.commit()
+    return result.rowcount
+
+
+@scheduler.job("sales-rollup-repair", interval_seconds=settings.SALES_ROLLUP_REPAIR_INTERVAL_SECONDS)
+async def repair_sales_rollups(session: AsyncSession) -> dict:
+    """Recompute yesterday's sales rollups from the raw rows, once the day is closed."""
+    yesterday = date.today() - timedelta(days=1)
+    return await POSService.rebuild_sales_rollups(session, yesterday, yesterday)
+
+
+@scheduler.job("unread-count-reconcile", interval_seconds=settings.UNREAD_COUNT_RECONCILE_INTERVAL_SECONDS)
+async def reconcile_unread_counts(session: AsyncSession) -> int:
+    return await reconcile(session)
+
+
+@scheduler.job("chat-feedback-reconcile", interval_seconds=settings.CHAT_FEEDBACK_RECONCILE_INTERVAL_SECONDS)
+async def reconcile_chat_feedback(session: AsyncSession) -> int:
+    """Apply chatbot feedback parked for log rows written since; drop what has waited a day."""
+    return await reconcile_pending_feedback(session)
+
+
+@scheduler.job("appointment-reminders", interval_seconds=settings.APPOINTMENT_REMINDER_INTERVAL_SECONDS)
+async def queue_appointment_reminders(session: AsyncSession) -> int:
+    """Queue an SMS reminder for each of tomorrow's open appointments; returns SMS queued.
+
+    Appointments are taken in id order, REMINDER_CHUNK at a time, and claimed
+    by setting ``reminder_sent_at`` in the same transaction that inserts their
+    SMS rows, so an appointment is reminded once however often this runs
+    (rescheduling clears the claim, so the new date is reminded too).
+    Appointments without a phone number are claimed without an SMS.
+    """
+    if not provider_configured():
+        return 0
+    tomorrow = date.today() + timedelta(days=1)
+    queued = 0
+    after = ""
+    while True:
+        rows = (await session.exec(
+            select(
+                Appointment.id, Appointment.appointment_number, Appointment.appointment_time,
+                Patient.contact_number, User.contact_number_mobile, User.first_name, User.last_name,
+                Doctor.first_name.label("doctor_first_name"), Doctor.last_name.label("doctor_last_name"),
+            )
+            .join(Patient, Patient.id == Appointment.patient_id)
+            .join(User, User.id == Patient.user_id)
+            .join(Doctor, Doctor.id == Appointment.doctor_id)
+            .where(
+                Appointment.appointment_date == tomorrow,
+                col(Appointment.status).in_(("pending", "confirmed")),
+                Appointment.reminder_sent_at == None,  # noqa: E711
+                Appointment.id > after,
+            )
+            .order_by(Appointment.id)
+            .limit(REMINDER_CHUNK)
+        )).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        now = datetime.utcnow()
+        claimed = await session.exec(
+            update(Appointment)
+            .where(col(Appointment.id).in_(ids), Appointment.reminder_sent_at == None)  # noqa: E711
+            .values(reminder_sent_at=now)
+        )
+        if claimed.rowcount != len(ids):
+            await session.rollback()  # some were reminded meanwhile; select the chunk again
+            continue
+        messages = []
+        for row in rows:
+            phone = row.contact_number or row.contact_number_mobile
+            if not phone:
+                continue
+            messages.append({
+                "id": str(uuid4()),
+                "recipient": phone,
+                "message": SmsService.render_template(
+                    "appointment_reminder",
+                    patient_name=" ".join(filter(None, (row.first_name, row.last_name))) or "Patient",
+                    doctor_name=f"{row.doctor_first_name} {row.doctor_last_name}",
+                    date=tomorrow.isoformat(),
+                    time=row.appointment_time.strftime("%H:%M"),
+                    ref=row.appointment_number or row.id[:8],
+                ),
+                "template_type": "appointment_reminder",
+                "status": "pending",
+                "attempts": 0,
+                "created_at": now,
+                "next_attempt_at": now,
+            })
+        if messages:
+            await session.exec(insert(SmsLog), params=messages)
+        await session.commit()
+        queued += len(messages)
+        after = ids[-1]
+    if queued:
+        sms_dispatcher.wake()
+    return queued
@@ -1,14 +1,24 @@
 """Notification service – Patch 3.3"""
 from __future__ import annotations
 
+import logging
 from datetime import datetime
 from typing import List, Optional
+from uuid import uuid4
 
 from fastapi import HTTPException
+from sqlalchemy import delete, insert, update
 from sqlmodel import select, func
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.models.notification import Notification
+from app.core.permissions import role_name
+from app.models.notification import Notification, NotificationBroadcast
+from app.models.user import User
+from app.services.unread_counter import bump_unread, get_unread_count
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHUNK = 1000
 
 
 class NotificationService:
@@ -17,6 +27,8 @@ class NotificationService:
     async def create(session: AsyncSession, data: dict) -> Notification:
         n = Notification(**data)
         session.add(n)
+        if not n.is_read:
+            await bump_unread(session, {n.user_id: 1})
         await session.commit()
         await session.refresh(n)
         return n
@@ -45,55 +57,125 @@ class NotificationService:
 
     @staticmethod
     async def unread_count(session: AsyncSession, user_id: str) -> int:
-        result = await session.exec(
-            select(func.count(Notification.id))
-            .where(Notification.user_id == user_id, Notification.is_read == False)  # noqa
-        )
-        return result.one() or 0
+        return await get_unread_count(session, user_id)
 
     @staticmethod
     async def mark_read(session: AsyncSession, notification_id: str, user_id: str) -> Notification:
-        n = await session.get(Notification, notification_id)
+        result = await session.exec(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == user_id,
+                   Notification.is_read == False)  # noqa
+            .values(is_read=True, read_at=datetime.utcnow())
+        )
+        if result.rowcount:
+            await bump_unread(session, {user_id: -1})
+            await session.commit()
+        n = await session.get(Notification, notification_id, populate_existing=True)
         if not n or n.user_id != user_id:
             raise HTTPException(404, "Notification not found")
-        n.is_read = True
-        n.read_at = datetime.utcnow()
-        session.add(n)
-        await session.commit()
-        await session.refresh(n)
         return n
 
     @staticmethod
     async def mark_all_read(session: AsyncSession, user_id: str) -> int:
         result = await session.exec(
-            select(Notification)
+            update(Notification)
             .where(Notification.user_id == user_id, Notification.is_read == False)  # noqa
+            .values(is_read=True, read_at=datetime.utcnow())
         )
-        items = list(result.all())
-        now = datetime.utcnow()
-        for n in items:
-            n.is_read = True
-            n.read_at = now
-            session.add(n)
+        await bump_unread(session, {user_id: -result.rowcount})
         await session.commit()
-        return len(items)
+        return result.rowcount
 
     @staticmethod
     async def delete(session: AsyncSession, notification_id: str, user_id: str):
-        n = await session.get(Notification, notification_id)
-        if not n or n.user_id != user_id:
-            raise HTTPException(404, "Notification not found")
-        await session.delete(n)
+        owned = (Notification.id == notification_id, Notification.user_id == user_id)
+        result = await session.exec(delete(Notification).where(*owned, Notification.is_read == False))  # noqa
+        if result.rowcount:
+            await bump_unread(session, {user_id: -1})
+        else:
+            result = await session.exec(delete(Notification).where(*owned))
+            if not result.rowcount:
+                raise HTTPException(404, "Notification not found")
         await session.commit()
 
     @staticmethod
     async def clear_read(session: AsyncSession, user_id: str) -> int:
         result = await session.exec(
-            select(Notification)
+            delete(Notification)
             .where(Notification.user_id == user_id, Notification.is_read == True)  # noqa
         )
-        items = list(result.all())
-        for n in items:
-            await session.delete(n)
         await session.commit()
-        return len(items)
+        return result.rowcount
+
+    # ---- broadcasts ----
+
+    @staticmethod
+    def _recipients(role_as: Optional[int]):
+        conditions = [User.is_active == True]  # noqa
+        if role_as is not None:
+            conditions.append(User.role_as == role_as)
+        return conditions
+
+    @staticmethod
+    async def start_broadcast(session: AsyncSession, created_by: str, title: str,
+                              message: Optional[str], role_as: Optional[int]) -> NotificationBroadcast:
+        """Record a broadcast job; ``run_broadcast`` does the inserts."""
+        total = (await session.exec(
+            select(func.count(User.id)).where(*NotificationService._recipients(role_as))
+        )).one()
+        job = NotificationBroadcast(
+            title=title, message=message, role_as=role_as, created_by=created_by, total=total,
+        )
+        session.add(job)
+        await session.commit()
+        await session.refresh(job)
+        return job
+
+    @staticmethod
+    async def run_broadcast(session: AsyncSession, job_id: str) -> NotificationBroadcast:
+        """Insert the job's notifications BROADCAST_CHUNK users per multi-row INSERT.
+
+        Each chunk commits with the job's ``sent`` counter, so progress is
+        visible to every worker and a failure leaves a consistent count.
+        """
+        job = await session.get(NotificationBroadcast, job_id)
+        job.status = "running"
+        session.add(job)
+        await session.commit()
+        conditions = NotificationService._recipients(job.role_as)
+        last_id = ""
+        try:
+            while True:
+                users = (await session.exec(
+                    select(User.id, User.role_as)
+                    .where(*conditions, User.id > last_id)
+                    .order_by(User.id)
+                    .limit(BROADCAST_CHUNK)
+                )).all()
+                if not users:
+                    break
+                now = datetime.utcnow()
+                await session.exec(insert(Notification), params=[
+                    {
+                        "id": str(uuid4()), "user_id": user_id, "role": role_name(role_as),
+                        "title": job.title, "message": job.message or "", "type": "info",
+                        "is_read": False, "created_at": now,
+                    }
+                    for user_id, role_as in users
+                ])
+                await bump_unread(session, {user_id: 1 for user_id, _ in users})
+                job.sent += len(users)
+                session.add(job)
+                await session.commit()
+                last_id = users[-1][0]
+            job.status = "completed"
+        except Exception as exc:
+            logger.exception("Notification broadcast %s failed after %d rows", job_id, job.sent)
+            await session.rollback()
+            job.status = "failed"
+            job.error = str(exc)[:500]
+        job.finished_at = datetime.utcnow()
+        session.add(job)
+        await session.commit()
+        await session.refresh(job)
+        return job
@@ -0,0 +1,280 @@
+"""Patient search over the ``patient_search_index`` table.
+
+Queries are classified as email, phone / NIC or name:
+
+* email, phone and NIC match by prefix on normalized columns
+  (``+94 77-123 4567``, ``0771234567`` and ``771234567`` are the same phone),
+  expressed as index range scans;
+* names match when every query token is a prefix of the first or last name,
+  and fall back to soundex keys so ``Perera`` still finds ``Pereira``.
+
+Candidates come from index range scans and are ranked in Python by how
+closely they match.  The index follows ``user`` through a session
+``after_flush`` listener, so every ORM write path keeps it current;
+``scripts/backfill_patient_search.py`` rebuilds it for existing data or after
+bulk SQL edits.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, event, inspect, insert, or_, and_
+from sqlalchemy.orm import Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.patient_search import PatientSearchEntry
+from app.models.user import User
+
+PATIENT_ROLE = 5
+CANDIDATE_LIMIT = 200
+FUZZY_THRESHOLD = 0.6
+_INDEXED_FIELDS = ("role_as", "first_name", "last_name", "contact_number_mobile", "nic_number", "email")
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+_DIGITS = "0123456789"
+_NIC_CHARS = _DIGITS + _LETTERS.upper()
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(
+    ["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for c in letters}
+
+
+# ---------- normalization ----------
+
+def normalize_name(value: Optional[str]) -> str:
+    return re.sub(r"[^a-z]", "", (value or "").lower())
+
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    digits = re.sub(r"\D", "", value or "")
+    if len(digits) > 9 and digits.startswith("94"):
+        digits = digits[2:]
+    return digits.lstrip("0") or None
+
+
+def normalize_nic(value: Optional[str]) -> Optional[str]:
+    return re.sub(r"[^0-9A-Z]", "", (value or "").upper()) or None
+
+
+def normalize_email(value: Optional[str]) -> Optional[str]:
+    return (value or "").strip().lower() or None
+
+
+def soundex(name: str) -> str:
+    """American soundex of an already normalized name ("" for an empty name)."""
+    if not name:
+        return ""
+    out, last = name[0].upper(), _SOUNDEX_CODES.get(name[0], "")
+    for c in name[1:]:
+        code = _SOUNDEX_CODES.get(c, "")
+        if code not in ("0", last):
+            out += code
+        if c not in "hw":
+            last = code
+        if len(out) == 4:
+            break
+    return out.ljust(4, "0")
+
+
+def entry_values(user: User) -> dict:
+    first = normalize_name(user.first_name)
+    last = normalize_name(user.last_name)
+    return {
+        "user_id": user.id,
+        "first_name": first,
+        "last_name": last,
+        "first_name_key": soundex(first),
+        "last_name_key": soundex(last),
+        "phone": normalize_phone(user.contact_number_mobile),
+        "nic": normalize_nic(user.nic_number),
+        "email": normalize_email(user.email),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+# ---------- index maintenance ----------
+
+def _changed(user: User) -> bool:
+    state = inspect(user)
+    return any(state.attrs[f].history.has_changes() for f in _INDEXED_FIELDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_patient_search(session: Session, flush_context) -> None:
+    stale: List[str] = []
+    fresh: List[dict] = []
+    for obj in session.new:
+        if isinstance(obj, User) and obj.role_as == PATIENT_ROLE:
+            fresh.append(entry_values(obj))
+    for obj in session.dirty:
+        if isinstance(obj, User) and _changed(obj):
+            stale.append(obj.id)
+            if obj.role_as == PATIENT_ROLE:
+                fresh.append(entry_values(obj))
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            stale.append(obj.id)
+    if stale:
+        session.execute(delete(PatientSearchEntry).where(PatientSearchEntry.user_id.in_(stale)))
+    if fresh:
+        session.execute(insert(PatientSearchEntry), fresh)
+
+
+# ---------- search ----------
+
+def _prefix_match(column, prefix: str, alphabet: str):
+    """``column LIKE 'prefix%'`` as a range that MySQL and SQLite both serve from a B-tree index.
+
+    Characters of *alphabet* are listed in collation order, so the exclusive
+    upper bound is the prefix incremented within it: ``ka -> kb``,
+    ``kaz -> kb``, ``079 -> 08``.  A prefix ending in anything else (an email
+    ending in ``.``) falls back to LIKE.
+    """
+    stem = prefix.rstrip(alphabet[-1])
+    if not stem:
+        return column >= prefix
+    if stem[-1] not in alphabet:
+        return column.startswith(prefix, autoescape=True)
+    upper = stem[:-1] + alphabet[alphabet.index(stem[-1]) + 1]
+    return and_(column >= prefix, column < upper)
+
+
+def _number_match(value: str):
+    """Phone or NIC prefix condition for *value*; None when it has no usable characters."""
+    E = PatientSearchEntry
+    phone = normalize_phone(value)
+    nic = normalize_nic(value)
+    conditions = []
+    if nic:
+        conditions.append(_prefix_match(E.nic, nic, _NIC_CHARS))
+    if phone:
+        conditions.append(_prefix_match(E.phone, phone, _DIGITS))
+    return or_(*conditions) if conditions else None
+
+
+@dataclass
+class PatientMatch:
+    user_id: str
+    score: float
+
+
+def _name_score(tokens: List[str], entry: PatientSearchEntry) -> float:
+    names = [n for n in (entry.first_name, entry.last_name) if n]
+    if not names:
+        return 0.0
+    total = 0.0
+    for tok in tokens:
+        best = 0.0
+        for name in names:
+            if name == tok:
+                best = 1.0
+            elif name.startswith(tok):
+                best = max(best, 0.9 + 0.1 * len(tok) / len(name))
+            else:
+                # Compare with the whole name and with its head, for partly typed tokens.
+                ratio = max(
+                    SequenceMatcher(None, tok, name).ratio(),
+                    SequenceMatcher(None, tok, name[: len(tok)]).ratio(),
+                )
+                best = max(best, 0.85 * ratio)
+        total += best
+    return total / len(tokens)
+
+
+class PatientSearchService:
+
+    @staticmethod
+    async def search(
+        session: AsyncSession, q: str, skip: int = 0, limit: int = 20, phone: Optional[str] = None,
+    ) -> List[PatientMatch]:
+        """Return patient user ids matching *q*, best first.
+
+        *phone* narrows the matches to patients whose phone or NIC starts with
+        it; it is part of every candidate query, so the limits apply after it.
+        """
+        q = (q or "").strip()
+        if not q:
+            return []
+        want = min(skip + limit, CANDIDATE_LIMIT)
+        E = PatientSearchEntry
+        narrow = []
+        if phone:
+            number = _number_match(phone)
+            if number is None:
+                return []
+            narrow.append(number)
+
+        if "@" in q or ("." in q and " " not in q):
+            email = normalize_email(q)
+            rows = (await session.exec(
+                select(E.user_id, E.email)
+                .where(_prefix_match(E.email, email, _DIGITS + _LETTERS), *narrow)
+                .limit(want)
+            )).all()
+            matches = [PatientMatch(uid, 1.0 if value == email else 0.9) for uid, value in rows]
+        elif re.fullmatch(r"[\d\s+\-()]+[vVxX]?", q) and sum(c.isdigit() for c in q) >= 3:
+            number, nic = normalize_phone(q), normalize_nic(q)
+            rows = (await session.exec(
+                select(E.user_id, E.phone, E.nic).where(_number_match(q), *narrow).limit(want)
+            )).all()
+            matches = [
+                PatientMatch(uid, 1.0 if (p and p == number) or (n and n == nic) else 0.9)
+                for uid, p, n in rows
+            ]
+        else:
+            tokens = [t for t in (normalize_name(part) for part in q.split()) if t]
+            if not tokens:
+                return []
+            prefix = and_(*[
+                or_(_prefix_match(E.first_name, t, _LETTERS), _prefix_match(E.last_name, t, _LETTERS))
+                for t in tokens
+            ])
+            entries = list((await session.exec(select(E).where(prefix, *narrow).limit(CANDIDATE_LIMIT))).all())
+            if len(entries) < want:
+                seen = {e.user_id for e in entries}
+                sounds = and_(*[
+                    or_(E.first_name_key == soundex(t), E.last_name_key == soundex(t)) for t in tokens
+                ])
+                fuzzy = (await session.exec(select(E).where(sounds, *narrow).limit(CANDIDATE_LIMIT))).all()
+                entries += [e for e in fuzzy if e.user_id not in seen]
+            matches = [PatientMatch(e.user_id, _name_score(tokens, e)) for e in entries]
+            matches = [m for m in matches if m.score >= FUZZY_THRESHOLD]
+
+        matches.sort(key=lambda m: -m.score)
+        return matches[skip: skip + limit]
+
+    @staticmethod
+    async def search_users(session: AsyncSession, q: str, skip: int = 0, limit: int = 20) -> List[User]:
+        """Ranked :meth:`search` results loaded as ``User`` rows."""
+        matches = await PatientSearchService.search(session, q, skip, limit)
+        if not matches:
+            return []
+        users = (await session.exec(
+            select(User).where(User.id.in_([m.user_id for m in matches]), User.role_as == PATIENT_ROLE)
+        )).all()
+        by_id: Dict[str, User] = {u.id: u for u in users}
+        return [by_id[m.user_id] for m in matches if m.user_id in by_id]
+
+    @staticmethod
+    async def rebuild(session: AsyncSession, batch_size: int = 5000) -> int:
+        """Rebuild the whole index from ``user``; returns the number of patients indexed."""
+        await session.exec(delete(PatientSearchEntry))
+        indexed = 0
+        last_id = ""
+        while True:
+            users = (await session.exec(
+                select(User)
+                .where(User.role_as == PATIENT_ROLE, User.id > last_id)
+                .order_by(User.id)
+                .limit(batch_size)
+            )).all()
+            if not users:
+                break
+            await session.exec(insert(PatientSearchEntry), params=[entry_values(u) for u in users])
+            indexed += len(users)
+            last_id = users[-1].id
+            session.expunge_all()
+        await session.commit()
+        return indexed
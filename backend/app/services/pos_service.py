@@ -10,12 +10,17 @@ import json
 import uuid
 
 from fastapi import HTTPException
+from sqlalchemy import delete, update
 from sqlmodel import select, func
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.date_filters import between_dates, on_date
+from app.core.rollups import bump_rollup
 from app.models.pos import (
     BillingTransaction,
     TransactionItem,
+    DailySalesRollup,
+    DailyProductRollup,
     CashRegister,
     CashEntry,
     DailyCashSummary,
@@ -38,12 +43,16 @@ class POSService:
         session.add(txn)
         await session.flush()
 
+        rows: List[TransactionItem] = []
         if items:
             for it in items:
                 it["transaction_id"] = txn.id
                 it["total"] = it.get("quantity", 1) * it.get("unit_price", 0) - it.get("discount", 0)
-                session.add(TransactionItem(**it))
+                rows.append(TransactionItem(**it))
+            session.add_all(rows)
 
+        if txn.status == "completed":
+            await POSService._apply_to_rollups(session, txn, rows, sign=1)
         await session.commit()
         await session.refresh(txn)
         return txn
@@ -56,10 +65,7 @@ class POSService:
         q = select(BillingTransaction)
         if branch_id:
             q = q.where(BillingTransaction.branch_id == branch_id)
-        if from_date:
-            q = q.where(func.date(BillingTransaction.created_at) >= from_date)
-        if to_date:
-            q = q.where(func.date(BillingTransaction.created_at) <= to_date)
+        q = q.where(between_dates(BillingTransaction.created_at, from_date, to_date))
         if status:
             q = q.where(BillingTransaction.status == status)
         q = q.order_by(BillingTransaction.created_at.desc()).offset(skip).limit(limit)  # type: ignore
@@ -83,13 +89,123 @@ class POSService:
             raise HTTPException(404, "Transaction not found")
         if t.status == "refunded":
             raise HTTPException(400, "Already refunded")
-        t.status = "refunded"
-        t.updated_at = datetime.utcnow()
-        session.add(t)
+        previous = t.status
+        # Claim the refund: of two concurrent refunds only one moves the status,
+        # so only one takes the sale back out of the rollups.
+        claimed = await session.exec(
+            update(BillingTransaction)
+            .where(BillingTransaction.id == txn_id, BillingTransaction.status == previous)
+            .values(status="refunded", updated_at=datetime.utcnow())
+        )
+        if claimed.rowcount != 1:
+            await session.rollback()
+            current = (await session.exec(
+                select(BillingTransaction.status).where(BillingTransaction.id == txn_id)
+            )).first()
+            if current == "refunded":
+                raise HTTPException(400, "Already refunded")
+            raise HTTPException(409, "Transaction changed while refunding; reload and retry")
+        if previous == "completed":
+            items_res = await session.exec(
+                select(TransactionItem).where(TransactionItem.transaction_id == txn_id)
+            )
+            await POSService._apply_to_rollups(session, t, list(items_res.all()), sign=-1)
         await session.commit()
         await session.refresh(t)
         return t
 
+    # ---- Sales rollups ----
+
+    @staticmethod
+    async def _apply_to_rollups(session: AsyncSession, txn: BillingTransaction,
+                                items: List[TransactionItem], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a completed transaction from the daily rollups."""
+        sales_date = txn.created_at.date()
+        await bump_rollup(
+            session,
+            DailySalesRollup,
+            {
+                "branch_id": txn.branch_id,
+                "sales_date": sales_date,
+                "cashier_id": txn.cashier_id,
+                "payment_method": txn.payment_method or "",
+            },
+            {"transaction_count": sign, "total_sales": sign * float(txn.net_amount or 0)},
+        )
+        per_product: dict = {}
+        for it in items:
+            qty, revenue = per_product.get(it.description, (0, 0.0))
+            per_product[it.description] = (qty + (it.quantity or 0), revenue + float(it.total or 0))
+        for description, (qty, revenue) in per_product.items():
+            await bump_rollup(
+                session,
+                DailyProductRollup,
+                {"branch_id": txn.branch_id, "sales_date": sales_date, "description": description},
+                {"quantity": sign * qty, "revenue": sign * revenue},
+            )
+
+    @staticmethod
+    async def rebuild_sales_rollups(session: AsyncSession, from_date: Optional[date] = None,
+                                    to_date: Optional[date] = None) -> dict:
+        """Recompute both rollup tables for a date range (everything when no bounds) from raw rows."""
+        def _in_range(column):
+            conditions = []
+            if from_date:
+                conditions.append(column >= from_date)
+            if to_date:
+                conditions.append(column <= to_date)
+            return conditions
+
+        def _as_date(value) -> date:
+            # func.date() comes back as a string on SQLite
+            return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+        await session.exec(delete(DailySalesRollup).where(*_in_range(DailySalesRollup.sales_date)))
+        await session.exec(delete(DailyProductRollup).where(*_in_range(DailyProductRollup.sales_date)))
+
+        filters = [
+            BillingTransaction.status == "completed",
+            between_dates(BillingTransaction.created_at, from_date, to_date),
+        ]
+        day = func.date(BillingTransaction.created_at)
+        method = func.coalesce(BillingTransaction.payment_method, "")
+        sales_rows = (await session.exec(
+            select(
+                BillingTransaction.branch_id, day, BillingTransaction.cashier_id, method,
+                func.count(BillingTransaction.id), func.coalesce(func.sum(BillingTransaction.net_amount), 0),
+            )
+            .where(*filters)
+            .group_by(BillingTransaction.branch_id, day, BillingTransaction.cashier_id, method)
+        )).all()
+        session.add_all([
+            DailySalesRollup(
+                branch_id=r[0], sales_date=_as_date(r[1]), cashier_id=r[2], payment_method=r[3],
+                transaction_count=int(r[4]), total_sales=float(r[5]),
+            )
+            for r in sales_rows
+        ])
+
+        product_rows = (await session.exec(
+            select(
+                BillingTransaction.branch_id, day, TransactionItem.description,
+                func.coalesce(func.sum(TransactionItem.quantity), 0),
+                func.coalesce(func.sum(TransactionItem.total), 0),
+            )
+            .join(BillingTransaction, BillingTransaction.id == TransactionItem.transaction_id)
+            .where(*filters)
+            .group_by(BillingTransaction.branch_id, day, TransactionItem.description)
+        )).all()
+        session.add_all([
+            DailyProductRollup(
+                branch_id=r[0], sales_date=_as_date(r[1]), description=r[2],
+                quantity=int(r[3]), revenue=float(r[4]),
+            )
+            for r in product_rows
+        ])
+
+        await session.commit()
+        return {"sales_rows": len(sales_rows), "product_rows": len(product_rows)}
+
     # ---- Cash Register ----
 
     @staticmethod
@@ -141,7 +257,7 @@ class POSService:
         entries_res = await session.exec(
             select(CashEntry).where(
                 CashEntry.register_id == register_id,
-                func.date(CashEntry.created_at) == summary_date,
+                on_date(CashEntry.created_at, summary_date),
             )
         )
         entries = list(entries_res.all())
@@ -212,7 +328,7 @@ class POSService:
         if cashier_id:
             filters.append(BillingTransaction.cashier_id == cashier_id)
 
-        today_filters = filters + [func.date(BillingTransaction.created_at) == date.today()]
+        today_filters = filters + [on_date(BillingTransaction.created_at, date.today())]
 
         total_txns = await session.exec(q_base.where(*filters))
         today_txns = await session.exec(q_base.where(*today_filters))
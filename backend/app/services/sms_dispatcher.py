@@ -0,0 +1,82 @@
+"""SMS outbox dispatcher.
+
+``SmsService.send_sms`` only inserts a pending ``sms_log`` row and wakes the
+dispatcher, so the request that triggered the message (registration, password
+reset, ...) does not wait on the provider.  The dispatcher (see
+app/core/outbox.py) sends over one pooled ``httpx.AsyncClient``, with at most
+SMS_SEND_CONCURRENCY requests in flight and SMS_RATE_PER_SECOND per worker.
+Network errors, 429s and 5xx responses are retried with backoff up to
+SMS_MAX_ATTEMPTS; any other non-200 is final.
+
+scripts/bench_sms_outbox.py runs the dispatcher against a local stand-in for
+the Textware endpoint.
+"""
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.outbox import Delivery, OutboxDispatcher
+from app.models.sms_log import SmsLog
+
+DEFAULT_SMS_URL = "http://sms.textware.lk:5001/sms/send_sms.php"
+
+
+def provider_configured() -> bool:
+    return bool(settings.SMS_USER and settings.SMS_PASSWORD)
+
+
+class SmsDispatcher(OutboxDispatcher):
+    model = SmsLog
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            )
+        return self._client
+
+    async def close_transport(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def deliver(self, row: SmsLog) -> Delivery:
+        if not provider_configured():
+            return Delivery("failed", {"provider_response": "SMS credentials not configured"})
+        try:
+            resp = await self._get_client().get(
+                settings.SMS_URL or DEFAULT_SMS_URL,
+                params={
+                    "username": settings.SMS_USER,
+                    "password": settings.SMS_PASSWORD,
+                    "src": settings.SMS_SENDER_ID or "HMS",
+                    "dst": row.recipient,
+                    "msg": row.message,
+                    "dr": "1",
+                },
+            )
+        except httpx.HTTPError as e:
+            return Delivery("retry", {"provider_response": str(e)[:500] or type(e).__name__})
+        columns = {"provider_response": resp.text[:500]}
+        if resp.status_code == 200:
+            return Delivery("sent", columns)
+        if resp.status_code == 429 or resp.status_code >= 500:
+            return Delivery("retry", columns)
+        return Delivery("failed", columns)
+
+
+sms_dispatcher = SmsDispatcher(
+    concurrency=settings.SMS_SEND_CONCURRENCY,
+    rate_per_second=settings.SMS_RATE_PER_SECOND,
+    batch_size=settings.SMS_BATCH_SIZE,
+    max_attempts=settings.SMS_MAX_ATTEMPTS,
+    retry_base_seconds=settings.SMS_RETRY_BASE_SECONDS,
+    poll_interval=settings.SMS_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.SMS_SEND_LEASE_SECONDS,
+)
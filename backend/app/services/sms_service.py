@@ -1,11 +1,14 @@
-"""SMS Service — Patch 5.5 (Textware integration)"""
+"""SMS Service — Patch 5.5 (Textware integration)
 
-import httpx
+Messages go through the sms_log outbox; see app/services/sms_dispatcher.py.
+"""
+
+from datetime import datetime
 from typing import Optional
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.sms_log import SmsLog
-from app.core.config import settings
+from app.services.sms_dispatcher import provider_configured, sms_dispatcher
 
 
 # SMS templates
@@ -16,6 +19,7 @@ SMS_TEMPLATES = {
     "schedule_change": "Dear {patient_name}, your appointment has been rescheduled to {new_date} at {new_time}. Contact us if this doesn't work.",
     "payment_receipt": "Payment of Rs.{amount} received. Invoice: {invoice}. Thank you, {hospital_name}.",
     "queue_notification": "Dear {patient_name}, your queue number is {queue_no}. Approx wait: {wait_time} mins.",
+    "appointment_reminder": "Dear {patient_name}, a reminder of your appointment with Dr. {doctor_name} tomorrow ({date}) at {time}. Ref: {ref}",
 }
 
 
@@ -38,49 +42,24 @@ class SmsService:
         message: str,
         template_type: Optional[str] = None,
     ) -> SmsLog:
-        """Send SMS via Textware provider and log the result."""
+        """Queue an SMS for the outbox dispatcher; returns its log row (status "pending")."""
         log = SmsLog(
             recipient=recipient,
             message=message,
             template_type=template_type,
             status="pending",
+            next_attempt_at=datetime.utcnow(),
         )
-
-        # Get credentials from environment
-        sms_user = getattr(settings, "SMS_USER", None) or ""
-        sms_password = getattr(settings, "SMS_PASSWORD", None) or ""
-        sms_url = getattr(settings, "SMS_URL", None) or "http://sms.textware.lk:5001/sms/send_sms.php"
-
-        if not sms_user or not sms_password:
+        if not provider_configured():
             log.status = "failed"
             log.provider_response = "SMS credentials not configured"
-            session.add(log)
-            await session.commit()
-            await session.refresh(log)
-            return log
-
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(
-                    sms_url,
-                    params={
-                        "username": sms_user,
-                        "password": sms_password,
-                        "src": getattr(settings, "SMS_SENDER_ID", "HMS"),
-                        "dst": recipient,
-                        "msg": message,
-                        "dr": "1",
-                    },
-                )
-                log.provider_response = resp.text[:500]
-                log.status = "sent" if resp.status_code == 200 else "failed"
-        except Exception as e:
-            log.status = "failed"
-            log.provider_response = str(e)[:500]
+            log.next_attempt_at = None
 
         session.add(log)
         await session.commit()
         await session.refresh(log)
+        if log.status == "pending":
+            sms_dispatcher.wake()
         return log
 
     @staticmethod
@@ -90,6 +69,6 @@ class SmsService:
         template_type: str,
         **kwargs,
     ) -> SmsLog:
-        """Render template and send."""
+        """Render template and queue."""
         message = SmsService.render_template(template_type, **kwargs)
         return await SmsService.send_sms(session, recipient, message, template_type)
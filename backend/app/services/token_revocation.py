@@ -0,0 +1,240 @@
+"""In-process token revocation filter.
+
+Every refresh used to look its jti up in ``token_blacklist`` and every
+rotation added a row that was never deleted.  Each worker now keeps a Bloom
+filter of the jtis that are revoked and not yet expired:
+
+* a jti the filter has never seen is not revoked, so the common refresh needs
+  no lookup; a filter hit (a real revocation or a ~1% false positive) is
+  confirmed against the table;
+* new rows are added to the filter on commit, here and, through the broadcast
+  backend, in every other worker;
+* every TOKEN_BLACKLIST_PURGE_INTERVAL_SECONDS the scheduler's
+  token-blacklist-purge job deletes the expired rows (``purge_expired``) and
+  each worker rebuilds its filter from the live ones, which keeps both bounded
+  by the token lifetimes rather than by the age of the deployment.
+
+Each worker loads its filter at startup; ``is_revoked`` loads it if that
+failed.
+
+A revocation that has not reached this worker yet is still caught: rotation
+inserts the presented jti, and the unique index on ``token_jti`` rejects the
+second insert (see ``TokenRevokedError``).
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Set
+
+from sqlalchemy import delete, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.broadcast import get_broadcast_backend
+from app.core.config import settings
+from app.models.token_blacklist import TokenBlacklist
+
+logger = logging.getLogger(__name__)
+
+REVOKED_CHANNEL = "_token-revoked"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives, tunable false positives)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        if key in self:
+            return  # keep ``count`` meaningful when the same key arrives twice
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] >> (pos & 7) & 1 for pos in self._positions(key))
+
+
+class TokenRevokedError(Exception):
+    """The jti being blacklisted already is; i.e. the token was used or revoked elsewhere."""
+
+
+async def commit_revocation(session: AsyncSession) -> None:
+    """Commit a pending ``TokenBlacklist`` insert, raising TokenRevokedError if the jti is taken."""
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise TokenRevokedError()
+
+
+class RevocationFilter:
+    def __init__(self, capacity: int, error_rate: float, refresh_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self._bloom: Optional[BloomFilter] = None
+        self._loaded_at = 0.0
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._added_during_load: Optional[List[str]] = None
+        self.lookups = 0
+        self.confirmed = 0
+
+    def add(self, jti: str) -> None:
+        if self._added_during_load is not None:
+            self._added_during_load.append(jti)
+        if self._bloom is None:
+            return
+        if self._bloom.count >= self._bloom.capacity:
+            # Over capacity the false-positive rate climbs; rebuild bigger now.
+            self._loaded_at = 0.0
+        self._bloom.add(jti)
+
+    async def load(self) -> None:
+        """Build the filter now if this worker has none yet (``app.main.lifespan`` calls this)."""
+        await self._ensure_loaded()
+
+    async def is_revoked(self, session: AsyncSession, jti: str) -> bool:
+        await self._ensure_loaded()
+        self.lookups += 1
+        if jti not in self._bloom:
+            return False
+        self.confirmed += 1
+        result = await session.exec(
+            select(TokenBlacklist.id).where(TokenBlacklist.token_jti == jti)
+        )
+        return result.first() is not None
+
+    def stats(self) -> dict:
+        bloom = self._bloom
+        return {
+            "loaded": bloom is not None,
+            "entries": bloom.count if bloom else 0,
+            "capacity": bloom.capacity if bloom else self.capacity,
+            "lookups": self.lookups,
+            "db_confirmations": self.confirmed,
+        }
+
+    async def _ensure_loaded(self) -> None:
+        if self._bloom is None:
+            if self._load_lock is None:
+                self._load_lock = asyncio.Lock()
+            async with self._load_lock:
+                if self._bloom is None:
+                    await join_bus()
+                    await self._rebuild_in_own_session()
+        elif time.monotonic() - self._loaded_at > self.refresh_interval and (
+            self._refresh_task is None or self._refresh_task.done()
+        ):
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        """Rebuild the filter from the blacklist rows that have not expired."""
+        self._added_during_load = []
+        try:
+            now = datetime.now(timezone.utc)
+            result = await session.exec(select(TokenBlacklist.token_jti).where(TokenBlacklist.expires_at >= now))
+            live = result.all()
+            bloom = BloomFilter(max(self.capacity, 2 * len(live)), self.error_rate)
+            for jti in live:
+                bloom.add(jti)
+            for jti in self._added_during_load:
+                bloom.add(jti)
+            self._bloom = bloom
+            self._loaded_at = time.monotonic()
+        finally:
+            self._added_during_load = None
+
+    async def _rebuild_in_own_session(self) -> None:
+        from app.core.database import async_session_factory
+
+        async with async_session_factory() as session:
+            await self.rebuild(session)
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self._rebuild_in_own_session()
+        except Exception:
+            logger.exception("Rebuilding the token revocation filter failed")
+            self._loaded_at = time.monotonic()  # retry after another interval
+
+
+async def purge_expired(session: AsyncSession) -> int:
+    """Delete blacklist rows whose token has expired anyway; returns rows deleted."""
+    result = await session.exec(
+        delete(TokenBlacklist).where(TokenBlacklist.expires_at < datetime.now(timezone.utc))
+    )
+    await session.commit()
+    if result.rowcount:
+        logger.info("Purged %d expired token_blacklist rows", result.rowcount)
+    return result.rowcount
+
+
+revocation_filter = RevocationFilter(
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    refresh_interval=settings.TOKEN_BLACKLIST_PURGE_INTERVAL_SECONDS,
+)
+
+
+async def _on_broadcast(channel: str, data: dict) -> None:
+    if channel == REVOKED_CHANNEL:
+        for jti in data.get("jtis", ()):
+            revocation_filter.add(jti)
+
+
+async def join_bus() -> None:
+    backend = get_broadcast_backend()
+    backend.add_handler(_on_broadcast)
+    await backend.start()
+
+
+async def _publish(jtis: Set[str]) -> None:
+    await join_bus()
+    await get_broadcast_backend().publish(REVOKED_CHANNEL, {"jtis": sorted(jtis)})
+
+
+# ---- ORM hooks ----
+
+@event.listens_for(Session, "after_flush")
+def _collect_revoked(session: Session, flush_context) -> None:
+    jtis = [obj.token_jti for obj in session.new if isinstance(obj, TokenBlacklist)]
+    if jtis:
+        session.info.setdefault("revoked_jtis", set()).update(jtis)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_revoked(session: Session) -> None:
+    jtis: Optional[Set[str]] = session.info.pop("revoked_jtis", None)
+    if not jtis:
+        return
+    for jti in jtis:
+        revocation_filter.add(jti)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    loop.create_task(_publish(jtis))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_revoked(session: Session) -> None:
+    session.info.pop("revoked_jtis", None)
@@ -0,0 +1,164 @@
+"""Per-user unread notification counts for the unread-count endpoints.
+
+Every client polls its unread count, which used to be a COUNT over the
+notification table.  ``notification_unread_counter`` now holds one row per
+user, bumped by NotificationService in the same transaction as the
+notifications it creates, reads or deletes, and each worker caches the counts
+it has served:
+
+* a commit that bumps a user's counter evicts that user here and, through the
+  broadcast backend, in every other worker, so polling is a cache hit until the
+  count actually changes;
+* a user without a counter row is counted on ix_notification_user_read_created
+  (an index-only COUNT);
+* every UNREAD_COUNT_RECONCILE_INTERVAL_SECONDS the scheduler's
+  unread-count-reconcile job (``reconcile``) recounts from the notification
+  table and repairs counters that drifted (writes that bypassed
+  NotificationService, a delete racing a mark-read, ...).
+"""
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.broadcast import get_broadcast_backend
+from app.core.config import settings
+from app.core.rollups import bump_rollups
+from app.core.ttl_cache import TTLCache
+from app.models.notification import Notification, NotificationUnreadCounter
+
+logger = logging.getLogger(__name__)
+
+CHANGED_CHANNEL = "_unread-changed"
+
+unread_cache = TTLCache(ttl_seconds=settings.UNREAD_COUNT_CACHE_TTL_SECONDS, max_entries=50000)
+
+# Bumped on every eviction so a count loaded before one is not cached.
+_generation = 0
+
+
+async def bump_unread(session: AsyncSession, deltas: Dict[str, int]) -> None:
+    """Add ``{user_id: delta}`` to the users' counters (caller commits)."""
+    deltas = {user_id: d for user_id, d in deltas.items() if d}
+    if not deltas:
+        return
+    await bump_rollups(session, NotificationUnreadCounter, [
+        ({"user_id": user_id}, {"unread": d}) for user_id, d in sorted(deltas.items())
+    ])
+    session.sync_session.info.setdefault("unread_changed", set()).update(deltas)
+
+
+async def get_unread_count(session: AsyncSession, user_id: str) -> int:
+    cached = unread_cache.get(user_id)
+    if cached is not None:
+        return cached
+    await join_bus()
+    loaded_at = _generation
+    result = await session.exec(
+        select(NotificationUnreadCounter.unread).where(NotificationUnreadCounter.user_id == user_id)
+    )
+    count = result.first()
+    if count is None:
+        result = await session.exec(
+            select(func.count(Notification.id))
+            .where(Notification.user_id == user_id, Notification.is_read == False)  # noqa
+        )
+        count = result.one() or 0
+    count = max(count, 0)
+    if loaded_at == _generation:
+        unread_cache.set(user_id, count)
+    return count
+
+
+async def reconcile(session: AsyncSession) -> int:
+    """Recount unread notifications and repair drifted counters; returns counters repaired.
+
+    Both counts are read in one transaction and a repair only applies while
+    the counter still holds the value it was compared with, so a bump
+    committed meanwhile (or a second reconcile in another worker) is never
+    overwritten; the next run picks up whatever was skipped.
+    """
+    actual = dict((await session.exec(
+        select(Notification.user_id, func.count(Notification.id))
+        .where(Notification.is_read == False)  # noqa
+        .group_by(Notification.user_id)
+    )).all())
+    stored = dict((await session.exec(
+        select(NotificationUnreadCounter.user_id, NotificationUnreadCounter.unread)
+    )).all())
+    drift = {
+        user_id: actual.get(user_id, 0) - stored.get(user_id, 0)
+        for user_id in actual.keys() | stored.keys()
+        if actual.get(user_id, 0) != stored.get(user_id, 0)
+    }
+    if not drift:
+        await session.commit()
+        return 0
+    missing = [user_id for user_id in drift if user_id not in stored]
+    await bump_rollups(session, NotificationUnreadCounter, [
+        ({"user_id": user_id}, {"unread": 0}) for user_id in sorted(missing)
+    ])
+    repaired = set()
+    for user_id, d in drift.items():
+        result = await session.exec(
+            update(NotificationUnreadCounter)
+            .where(
+                NotificationUnreadCounter.user_id == user_id,
+                NotificationUnreadCounter.unread == stored.get(user_id, 0),
+            )
+            .values(unread=NotificationUnreadCounter.unread + d)
+        )
+        if result.rowcount:
+            repaired.add(user_id)
+    session.sync_session.info.setdefault("unread_changed", set()).update(repaired)
+    await session.commit()
+    if repaired:
+        logger.warning("Repaired %d drifted unread notification counters", len(repaired))
+    return len(repaired)
+
+
+def evict(user_ids: Iterable[str]) -> None:
+    global _generation
+    _generation += 1
+    for user_id in user_ids:
+        unread_cache.invalidate(user_id)
+
+
+async def _on_broadcast(channel: str, data: dict) -> None:
+    if channel == CHANGED_CHANNEL:
+        evict(data.get("user_ids", ()))
+
+
+async def join_bus() -> None:
+    backend = get_broadcast_backend()
+    backend.add_handler(_on_broadcast)
+    await backend.start()
+
+
+async def _publish(user_ids: Set[str]) -> None:
+    await join_bus()
+    await get_broadcast_backend().publish(CHANGED_CHANNEL, {"user_ids": sorted(user_ids)})
+
+
+# ---- ORM hooks ----
+
+@event.listens_for(Session, "after_commit")
+def _publish_unread_changes(session: Session) -> None:
+    changed: Optional[Set[str]] = session.info.pop("unread_changed", None)
+    if not changed:
+        return
+    evict(changed)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    loop.create_task(_publish(changed))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_unread_changes(session: Session) -> None:
+    session.info.pop("unread_changed", None)
@@ -5,7 +5,7 @@ from typing import Optional
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import hash_password, check_password
 from app.models.user import User, UserCreate, UserUpdate
 
 
@@ -26,7 +26,7 @@ class UserService:
             raise ValueError("Email already registered")
 
         user = User.model_validate(user_in)
-        user.hashed_password = get_password_hash(user_in.password)
+        user.hashed_password = await hash_password(user_in.password)
         self.session.add(user)
         await self.session.commit()
         await self.session.refresh(user)
@@ -56,9 +56,9 @@ class UserService:
         user = await self.get_by_id(user_id)
         if not user:
             raise ValueError("User not found")
-        if not verify_password(current_password, user.hashed_password):
+        if not await check_password(current_password, user.hashed_password):
             raise ValueError("Current password is incorrect")
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = await hash_password(new_password)
         self.session.add(user)
         await self.session.commit()
 
@@ -0,0 +1,35 @@
+"""Rebuild patient_search_index from the user table.
+
+Usage:
+    python scripts/backfill_patient_search.py
+
+Run once after the patient search migration, and again after any bulk SQL
+edit of patient users that bypassed the ORM.
+"""
+import asyncio
+import os
+import sys
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+import app.models  # noqa: F401  (resolve foreign keys)
+from app.services.patient_search_service import PatientSearchService
+
+
+async def backfill():
+    engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        indexed = await PatientSearchService.rebuild(session)
+    await engine.dispose()
+    print(f"Indexed {indexed} patients.")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
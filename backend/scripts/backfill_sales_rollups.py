@@ -0,0 +1,60 @@
+"""Rebuild daily_sales_rollup / daily_product_rollup from billing transactions.
+
+Usage:
+    python scripts/backfill_sales_rollups.py                      # all history
+    python scripts/backfill_sales_rollups.py 2026-01-01 2026-03-31  # one range
+
+Run once after the rollup migration, and again for any range whose raw rows
+were edited outside POSService.  Rebuilds month by month so each transaction
+stays small.
+"""
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+import app.models  # noqa: F401  (resolve foreign keys)
+from app.models.pos import BillingTransaction
+from app.services.pos_service import POSService
+
+
+def _months(start: date, end: date):
+    while start <= end:
+        next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield start, min(end, next_month - timedelta(days=1))
+        start = next_month
+
+
+async def backfill(start: date | None, end: date | None):
+    engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        if start is None or end is None:
+            first, last = (await session.exec(
+                select(func.min(BillingTransaction.created_at), func.max(BillingTransaction.created_at))
+            )).one()
+            if first is None:
+                print("No billing transactions; nothing to backfill.")
+                await engine.dispose()
+                return
+            start = start or first.date()
+            end = end or last.date()
+        for month_start, month_end in _months(start, end):
+            counts = await POSService.rebuild_sales_rollups(session, month_start, month_end)
+            print(f"{month_start} .. {month_end}: {counts['sales_rows']} sales rows, "
+                  f"{counts['product_rows']} product rows")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [date.fromisoformat(a) for a in sys.argv[1:3]]
+    asyncio.run(backfill(*(args + [None] * (2 - len(args)))))
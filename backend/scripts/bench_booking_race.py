@@ -0,0 +1,118 @@
+"""Benchmark: a booking rush on a handful of slots.
+
+Usage:
+    python scripts/bench_booking_race.py [bookings] [slots] [in_flight]     # default 1000 at 20 slots, 10 in flight
+
+Seeds one doctor with a schedule of ``slots`` fifteen-minute slots tomorrow
+and fires ``bookings`` AppointmentService.book calls at them, each in its own
+session, ``in_flight`` at a time (the app's DB_POOL_SIZE bounds it the same
+way), as patients racing for the same few slots would.  A few
+of the slots are held beforehand by another user's unexpired slot lock.
+Reports throughput and outcomes, and checks that every free slot was booked
+exactly once, no held slot was booked, every loser got a 409 and each slot
+has a single lock row.  Run it against MySQL (BENCH_DATABASE_URL) to see the
+unique keys settle real concurrent inserts.  SQLite has a single writer and
+its file lock neither queues fairly nor upgrades a reader without deadlock,
+so there the bookings take turns (an in-process lock) and the run checks the
+insert-and-catch-conflict path rather than row locking.
+"""
+import asyncio
+import contextlib
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+from bench_utils import create_bench_engine
+
+from fastapi import HTTPException
+from sqlmodel import func, select
+
+from app.models.appointment import Appointment
+from app.models.branch import Branch
+from app.models.doctor import Doctor
+from app.models.doctor_schedule import DoctorSchedule, SlotLock
+from app.models.patient import Patient
+from app.models.user import User
+from app.services.appointment_service import AppointmentService
+
+HELD_EVERY = 10  # every tenth slot is held by someone else's lock
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    slot_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    in_flight = asyncio.Semaphore(int(sys.argv[3]) if len(sys.argv) > 3 else 10)
+    engine, session_factory, counter = await create_bench_engine()
+    one_writer = asyncio.Lock() if engine.dialect.name == "sqlite" else contextlib.nullcontext()
+
+    day = date.today() + timedelta(days=1)
+    slots = [(datetime.combine(day, dtime(8)) + timedelta(minutes=15 * i)).time() for i in range(slot_count)]
+    async with session_factory() as session:
+        branch = Branch(center_name="Race Branch")
+        doctor_user = User(email="race-doctor@example.com", username="race-doctor", hashed_password="x", role_as=2)
+        doctor = Doctor(first_name="Race", last_name="Doctor", specialization="General", qualification="MBBS",
+                        contact_number="0", experience_years=1, user_id=doctor_user.id)
+        holder = User(email="race-holder@example.com", username="race-holder", hashed_password="x", role_as=5)
+        session.add_all([branch, doctor_user, doctor, holder])
+        session.add(DoctorSchedule(
+            doctor_id=doctor.id, branch_id=branch.id, day_of_week=day.weekday(),
+            start_time=slots[0], end_time=(datetime.combine(day, slots[-1]) + timedelta(minutes=15)).time(),
+            slot_duration_minutes=15,
+        ))
+        patients = []
+        for i in range(100):
+            user = User(email=f"race-patient-{i}@example.com", username=f"race-patient-{i}",
+                        hashed_password="x", role_as=5)
+            patients.append((Patient(user_id=user.id), user))
+            session.add(user)
+        session.add_all([p for p, _ in patients])
+        held = set(slots[HELD_EVERY - 1::HELD_EVERY])
+        for slot in held:
+            session.add(SlotLock(doctor_id=doctor.id, slot_date=day, slot_time=slot, locked_by=holder.id,
+                                 expires_at=datetime.now(timezone.utc) + timedelta(minutes=10)))
+        await session.commit()
+
+    outcomes = Counter()
+
+    async def book(i: int):
+        patient, user = patients[i % len(patients)]
+        async with in_flight, one_writer, session_factory() as session:
+            try:
+                await AppointmentService.book(session, patient.id, doctor.id, branch.id, day,
+                                              slots[i % slot_count], user.id)
+                outcomes["booked"] += 1
+            except HTTPException as e:
+                outcomes[f"{e.status_code} {e.detail}"] += 1
+
+    statements = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(book(i) for i in range(n)))
+    elapsed = time.perf_counter() - started
+    print(f"{n} bookings for {slot_count} slots in {elapsed:.2f} s ({n / elapsed:.0f} attempts/s, "
+          f"{(counter.count - statements) / n:.1f} statements per attempt)")
+    for outcome, count in outcomes.most_common():
+        print(f"  {count:5d}  {outcome}")
+
+    async with session_factory() as session:
+        per_slot = dict((await session.exec(
+            select(Appointment.appointment_time, func.count(Appointment.id))
+            .where(Appointment.doctor_id == doctor.id, Appointment.status != "cancelled")
+            .group_by(Appointment.appointment_time)
+        )).all())
+        locks = dict((await session.exec(
+            select(SlotLock.slot_time, func.count(SlotLock.id)).where(SlotLock.doctor_id == doctor.id)
+            .group_by(SlotLock.slot_time)
+        )).all())
+    double = {t: c for t, c in per_slot.items() if c > 1}
+    assert not double, f"double-booked slots: {double}"
+    assert set(per_slot) == set(slots) - held, f"booked {sorted(per_slot)}, expected every slot not held"
+    assert outcomes["booked"] == slot_count - len(held)
+    assert sum(outcomes.values()) == n and all(o == "booked" or o.startswith("409") for o in outcomes)
+    assert all(c == 1 for c in locks.values()) and len(locks) == len(per_slot) + len(held)
+    print(f"OK: {len(per_slot)} slots booked once each, {len(held)} held slots untouched, no double bookings.")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
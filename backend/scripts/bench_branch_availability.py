@@ -0,0 +1,91 @@
+"""Benchmark: DoctorScheduleService.branch_availability query count vs. doctors and days.
+
+Usage:
+    python scripts/bench_branch_availability.py
+
+Seeds a branch with up to 80 doctors (one schedule per weekday each, a few
+booked slots) and checks that a cold slot-matrix load issues the same number
+of SQL statements whatever the number of doctors or days requested.
+"""
+import asyncio
+from datetime import date, time, timedelta
+
+from bench_utils import create_bench_engine
+
+from app.models.appointment import Appointment
+from app.models.branch import Branch
+from app.models.doctor import Doctor
+from app.models.doctor_schedule import DoctorSchedule
+from app.models.patient import Patient
+from app.models.user import User
+from app.services.availability_index import availability_index
+from app.services.doctor_schedule_service import DoctorScheduleService
+
+DOCTOR_COUNTS = [5, 20, 80]
+DAY_COUNTS = [1, 7, 28]
+
+
+async def seed(session_factory, n_doctors: int) -> str:
+    start = date.today()
+    async with session_factory() as session:
+        branch = Branch(center_name=f"Bench Branch {n_doctors}")
+        session.add(branch)
+        patient_user = User(
+            email=f"bench-patient-{n_doctors}@example.com", username=f"bench-patient-{n_doctors}",
+            hashed_password="x", role_as=5, first_name="Bench", last_name="Patient",
+        )
+        session.add(patient_user)
+        patient = Patient(user_id=patient_user.id)
+        session.add(patient)
+        for i in range(n_doctors):
+            user = User(
+                email=f"bench-doc-{n_doctors}-{i}@example.com", username=f"bench-doc-{n_doctors}-{i}",
+                hashed_password="x", role_as=2, first_name="Doctor", last_name=str(i),
+            )
+            session.add(user)
+            doctor = Doctor(
+                first_name="Doctor", last_name=str(i), specialization="General",
+                qualification="MBBS", contact_number="0000000000", experience_years=5, user_id=user.id,
+            )
+            session.add(doctor)
+            for weekday in range(7):
+                session.add(DoctorSchedule(
+                    doctor_id=doctor.id, branch_id=branch.id, day_of_week=weekday,
+                    start_time=time(9, 0), end_time=time(13, 0), slot_duration_minutes=15,
+                ))
+            for day_offset in range(0, 28, 3):
+                session.add(Appointment(
+                    patient_id=patient.id, doctor_id=doctor.id, branch_id=branch.id,
+                    appointment_date=start + timedelta(days=day_offset),
+                    appointment_time=time(9, 15), status="confirmed",
+                ))
+        await session.commit()
+        return branch.id
+
+
+async def main():
+    engine, session_factory, counter = await create_bench_engine()
+    print(f"{'doctors':>8} {'days':>5} {'cold q':>7} {'cold ms':>8} {'warm q':>7} {'warm ms':>8}")
+    cold_counts = set()
+    for n_doctors in DOCTOR_COUNTS:
+        branch_id = await seed(session_factory, n_doctors)
+        for n_days in DAY_COUNTS:
+            start = date.today()
+            end = start + timedelta(days=n_days - 1)
+            availability_index.clear()
+            async with session_factory() as session:
+                with counter.measure() as cold:
+                    matrix = await DoctorScheduleService.branch_availability(session, branch_id, start, end)
+                with counter.measure() as warm:
+                    await DoctorScheduleService.branch_availability(session, branch_id, start, end)
+            assert len(matrix) == n_doctors
+            cold_counts.add(cold["queries"])
+            print(f"{n_doctors:>8} {n_days:>5} {cold['queries']:>7} {cold['ms']:>8} {warm['queries']:>7} {warm['ms']:>8}")
+    await engine.dispose()
+
+    assert len(cold_counts) == 1, f"query count varies with input size: {sorted(cold_counts)}"
+    print(f"\nOK: every cold load issued {cold_counts.pop()} queries.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
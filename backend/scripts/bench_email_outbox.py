@@ -0,0 +1,149 @@
+"""Benchmark: email outbox delivery against a local stand-in SMTP server.
+
+Usage:
+    python scripts/bench_email_outbox.py [messages]     # default 200
+
+Starts a small aiosmtpd-style SMTP server (EHLO, AUTH PLAIN, MAIL/RCPT/DATA,
+RSET, NOOP, QUIT; 10 ms per accepted message) that answers 451 to the first
+attempt at every tenth message and 550 to recipients named bad-*, points the
+SMTP settings at it and queues a campaign through EmailService.  Reports
+throughput, SMTP sessions opened versus messages sent, and checks every
+deliverable message arrived exactly once and the bad recipients failed
+without retries.
+"""
+import asyncio
+import sys
+import time
+from collections import Counter
+
+from bench_utils import create_bench_engine
+
+from sqlmodel import func, select
+
+from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.email_dispatcher import email_dispatcher
+from app.services.email_service import EmailService
+
+BAD_EVERY = 25
+
+
+class SmtpStandIn:
+    def __init__(self):
+        self.connections = 0
+        self.logins = 0
+        self.received = Counter()
+        self.deferred = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 stand-in ESMTP")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode().strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb in ("EHLO", "HELO"):
+                    await reply("250-stand-in\r\n250-AUTH PLAIN\r\n250 SIZE 10485760")
+                elif verb == "AUTH":
+                    self.logins += 1
+                    await reply("235 2.7.0 Authentication successful")
+                elif verb == "MAIL":
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    if "<bad-" in command:
+                        await reply("550 5.1.1 No such user")
+                    else:
+                        await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    subject = None
+                    while True:
+                        data_line = await reader.readline()
+                        if data_line in (b".\r\n", b""):
+                            break
+                        if data_line.startswith(b"Subject: "):
+                            subject = data_line[9:].decode().strip()
+                    seq = int(subject.rsplit("#", 1)[1])
+                    if seq % 10 == 0 and subject not in self.deferred:
+                        self.deferred.add(subject)
+                        await reply("451 4.3.0 Try again later")
+                    else:
+                        await asyncio.sleep(0.01)
+                        self.received[subject] += 1
+                        await reply("250 OK queued")
+                elif verb in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    engine, session_factory, _ = await create_bench_engine()
+
+    stand_in = SmtpStandIn()
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+    settings.SMTP_HOST, settings.SMTP_PORT = "127.0.0.1", server.sockets[0].getsockname()[1]
+    settings.SMTP_USE_TLS = False
+    settings.SMTP_USER, settings.SMTP_PASSWORD = "bench", "bench"
+    settings.EMAIL_CAMPAIGN_RATE_PER_SECOND = 0  # no spreading; the dispatcher's own limit applies
+    email_dispatcher._limiter.interval = 0
+    email_dispatcher.retry_base_seconds = 0.05
+
+    recipients = [
+        {"to_email": f"{'bad-' if seq % BAD_EVERY == 1 else ''}patient{seq}@example.com",
+         "variables": {"patient_name": f"Patient {seq}", "seq": seq}}
+        for seq in range(n)
+    ]
+    bad = sum(1 for r in recipients if r["to_email"].startswith("bad-"))
+    started = time.perf_counter()
+    async with session_factory() as session:
+        campaign_id, queued = await EmailService.queue_campaign(
+            session, recipients, subject="Reminder #{seq}",
+            body="Dear {patient_name}, this is a reminder of your appointment tomorrow.",
+        )
+    print(f"queued a campaign of {queued} emails in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    while True:
+        async with session_factory() as session:
+            status = await EmailService.campaign_status(session, campaign_id)
+        if status.get("sent", 0) + status.get("failed", 0) == n:
+            break
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    print(f"delivered in {elapsed:.2f} s ({n / elapsed:.0f} msg/s), rows by status {status}")
+    print(f"dispatcher {email_dispatcher.stats()}")
+    print(f"SMTP connections {stand_in.connections}, logins {stand_in.logins} for {sum(stand_in.received.values())} "
+          f"messages (SMTP_POOL_SIZE={email_dispatcher.concurrency}; the old sender logged in once per message)")
+
+    async with session_factory() as session:
+        bad_attempts = (await session.exec(
+            select(func.max(EmailOutbox.attempts)).where(EmailOutbox.to_email.like("bad-%"))
+        )).one()
+    duplicates = [s for s, count in stand_in.received.items() if count > 1]
+    assert not duplicates, f"{len(duplicates)} messages delivered more than once"
+    assert len(stand_in.received) == n - bad, f"{len(stand_in.received)} of {n - bad} deliverable messages arrived"
+    assert status.get("failed", 0) == bad and bad_attempts == 1, "rejected recipients should fail without retry"
+    assert stand_in.logins <= email_dispatcher.concurrency
+    print(f"OK: {n - bad} delivered exactly once ({len(stand_in.deferred)} after a 451), {bad} rejected with 550.")
+
+    await email_dispatcher.close()
+    server.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
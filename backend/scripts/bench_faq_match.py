@@ -0,0 +1,108 @@
+"""Benchmark: ChatbotService.match_faq over the in-memory FAQ index.
+
+Usage:
+    python scripts/bench_faq_match.py [faqs]     # default 10,000
+
+Seeds synthetic FAQs from a small medical vocabulary, then times index
+building and matching a mix of chat questions, and checks that edits,
+deactivations and deletes are reflected without a rebuild.
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from bench_utils import create_bench_engine
+
+from sqlalchemy import insert
+
+from app.models.chatbot import ChatbotFAQ
+from app.services.chatbot_service import ChatbotService
+from app.services.faq_index import faq_index
+
+TOPICS = [
+    "appointment", "booking", "payment", "refund", "consultation", "prescription", "medicine",
+    "remedy", "dosage", "allergy", "asthma", "migraine", "eczema", "arthritis", "insomnia",
+    "anxiety", "diabetes", "pregnancy", "children", "vaccination", "parking", "insurance",
+    "report", "laboratory", "pharmacy", "delivery", "branch", "opening", "holiday", "feedback",
+]
+VERBS = ["cancel", "change", "book", "pay", "collect", "renew", "treat", "take", "visit", "contact"]
+EXTRA = [f"term{i}" for i in range(3000)]
+QUESTIONS = [
+    "How do I cancel my appointment?",
+    "Can homeopathy treat migraine in children?",
+    "what is the dosage for asthma remedy",
+    "Do you accept insurance for consultation payments",
+    "where can I collect my laboratory report",
+    "ඖෂධ ලබා ගන්නේ කෙසේද",
+]
+BATCH = 2000
+
+
+def _faq(i: int, rng: random.Random) -> dict:
+    words = rng.sample(TOPICS, 2) + [rng.choice(VERBS)] + rng.sample(EXTRA, 2)
+    return ChatbotFAQ(
+        id=f"faq-{i:06d}",
+        question=f"How can I {words[2]} {words[0]} {words[1]} {words[3]} {words[4]}?",
+        answer="Synthetic answer.",
+        question_si="ඖෂධ ලබා ගන්නේ කෙසේද" if i % 500 == 0 else None,
+        keywords=", ".join(rng.sample(TOPICS, 2)),
+        priority=rng.randint(0, 100),
+    ).model_dump()
+
+
+def _time_matches(timings: list) -> None:
+    for _ in range(10):
+        for question in QUESTIONS:
+            language = "si" if not question.isascii() else "en"
+            start = time.perf_counter()
+            faq_index.best_match(question, language)
+            timings.append((time.perf_counter() - start) * 1000)
+
+
+async def main(n: int):
+    rng = random.Random(7)
+    engine, session_factory, counter = await create_bench_engine()
+    async with session_factory() as session:
+        for start in range(0, n, BATCH):
+            await session.exec(insert(ChatbotFAQ), params=[_faq(i, rng) for i in range(start, min(n, start + BATCH))])
+        await session.commit()
+
+        faq_index.clear()
+        start = time.perf_counter()
+        await faq_index.ensure_current(session)
+        print(f"built index over {len(faq_index)} FAQs in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        timings = []
+        _time_matches(timings)
+
+        with counter.measure() as m:
+            faq = await ChatbotService.match_faq(session, QUESTIONS[0])
+        print(f"match_faq: {m['queries']} queries, {m['ms']} ms -> {faq.question if faq else None}")
+
+        target = ChatbotFAQ(question="Is there wheelchair access at the Kandy branch?", answer="Yes.",
+                            keywords="wheelchair, accessibility", priority=50)
+        session.add(target)
+        await session.commit()
+        found = await ChatbotService.match_faq(session, "wheelchair access kandy")
+        assert found is not None and found.id == target.id, "new FAQ not matched"
+        target.is_active = False
+        session.add(target)
+        await session.commit()
+        found = await ChatbotService.match_faq(session, "wheelchair access kandy")
+        assert found is None or found.id != target.id, "deactivated FAQ still matched"
+        # Edits re-score only their own terms, so matching stays warm after them.
+        _time_matches(timings)
+    await engine.dispose()
+
+    timings.sort()
+    p50 = statistics.median(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"best_match: p50 {p50:.3f} ms, p99 {p99:.3f} ms over {len(timings)} questions")
+    assert p99 < 2.0, f"p99 match took {p99:.3f} ms"
+    print(f"\nOK: p99 {p99:.3f} ms; create and deactivate applied incrementally.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000))
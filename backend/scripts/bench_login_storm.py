@@ -0,0 +1,88 @@
+"""Benchmark: latency of an unrelated endpoint during a login storm.
+
+Usage:
+    python scripts/bench_login_storm.py [logins]     # default 20 concurrent logins
+
+Drives the real app in-process (httpx ASGI transport) and probes GET /health
+every 10 ms while the logins run, once with bcrypt inline on the event loop
+(the old behaviour) and once through the password hashing pool.  With the
+pool the probe's p99 should stay close to its idle value.
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from bench_utils import create_bench_engine
+
+import httpx
+
+import app.core.security as security
+from app.main import app
+from app.models.user import User
+
+PASSWORD = "storm-password-1"
+
+
+async def _inline(fn, *args):
+    return fn(*args)
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event) -> list:
+    samples = []
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.01)
+    return samples
+
+
+async def storm(client: httpx.AsyncClient, n: int) -> float:
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(client, stop))
+    await asyncio.sleep(0.2)
+    t0 = time.perf_counter()
+    responses = await asyncio.gather(*[
+        client.post("/api/v1/auth/login/access-token", data={"username": "storm@example.com", "password": PASSWORD})
+        for _ in range(n)
+    ])
+    elapsed = time.perf_counter() - t0
+    await asyncio.sleep(0.2)
+    stop.set()
+    samples = await probe_task
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200][:1]
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {n} logins in {elapsed:.2f}s; /health p50 {statistics.median(samples):.1f} ms, "
+          f"p99 {p99:.1f} ms, max {samples[-1]:.1f} ms ({len(samples)} probes)")
+    return p99
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    engine, session_factory, _ = await create_bench_engine()
+    async with session_factory() as session:
+        session.add(User(email="storm@example.com", username="storm@example.com", role_as=5,
+                         hashed_password=security.get_password_hash(PASSWORD)))
+        await session.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await security.check_password("warm-up", security.get_password_hash("warm-up"))  # start pool workers
+
+        pooled = security._run_hashing
+        print(f"bcrypt rounds {security.settings.BCRYPT_ROUNDS}, pool workers {security.settings.PASSWORD_HASH_WORKERS}")
+        print("inline on the event loop:")
+        security._run_hashing = _inline
+        await storm(client, n)
+        print("process pool:")
+        security._run_hashing = pooled
+        await storm(client, n)
+
+    security.shutdown_password_hashing()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
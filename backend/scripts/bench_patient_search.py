@@ -0,0 +1,101 @@
+"""Benchmark: receptionist patient search, LIKE '%q%' vs. patient_search_index.
+
+Usage:
+    python scripts/bench_patient_search.py [patients]     # default 1,000,000
+
+Seeds synthetic patients (user rows plus their index rows) and times a mix of
+name, misspelt name, phone and NIC lookups both ways.  Seeding a million rows
+into the default SQLite file takes a few minutes.
+"""
+import asyncio
+import random
+import sys
+import time
+
+from bench_utils import create_bench_engine
+
+from sqlalchemy import insert, or_
+from sqlmodel import select
+
+from app.models.patient_search import PatientSearchEntry
+from app.models.user import User
+from app.services.patient_search_service import PatientSearchService, entry_values
+
+SYLLABLES = ["ka", "ma", "ra", "pe", "si", "la", "na", "wi", "de", "go", "ku", "ya", "th", "sa", "ri", "ne"]
+BATCH = 20000
+REPEAT = 5
+
+
+def _name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+async def seed(session_factory, n: int, rng: random.Random) -> list:
+    samples = []
+    async with session_factory() as session:
+        for start in range(0, n, BATCH):
+            users = []
+            for i in range(start, min(n, start + BATCH)):
+                users.append(User(
+                    id=f"bench-{i:08d}", email=f"patient{i}@example.com", username=f"patient{i}",
+                    hashed_password="x", role_as=5, first_name=_name(rng), last_name=_name(rng),
+                    contact_number_mobile=f"07{rng.randint(0, 99999999):08d}",
+                    nic_number=f"{rng.randint(100000000, 999999999)}V",
+                ))
+            # Core inserts skip the ORM flush listener, so index rows are written explicitly.
+            await session.exec(insert(User), params=[u.model_dump() for u in users])
+            await session.exec(insert(PatientSearchEntry), params=[entry_values(u) for u in users])
+            await session.commit()
+            samples.extend(rng.sample(users, 2))
+    return samples
+
+
+def _queries(samples: list) -> list:
+    out = []
+    for u in samples[:20]:
+        misspelt = u.last_name[:-1] + ("e" if u.last_name[-1] != "e" else "a")
+        out += [
+            ("name", f"{u.first_name} {u.last_name[:3]}"),
+            ("typo", misspelt),
+            ("phone", u.contact_number_mobile[:7]),
+            ("nic", u.nic_number[:6]),
+        ]
+    return out
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    engine, session_factory, _ = await create_bench_engine()
+    started = time.perf_counter()
+    samples = await seed(session_factory, n, random.Random(7))
+    print(f"seeded {n} patients in {time.perf_counter() - started:.1f}s\n")
+
+    timings: dict = {}
+    async with session_factory() as session:
+        for kind, q in _queries(samples):
+            like = select(User).where(
+                User.role_as == 5,
+                or_(User.email.contains(q), User.first_name.contains(q), User.last_name.contains(q),
+                    User.contact_number_mobile.contains(q), User.nic_number.contains(q)),
+            ).limit(20)
+            for label, run in (
+                ("like", lambda: session.exec(like)),
+                ("index", lambda: PatientSearchService.search_users(session, q)),
+            ):
+                t0 = time.perf_counter()
+                for _ in range(REPEAT):
+                    res = await run()
+                    if label == "like":
+                        res.all()
+                timings.setdefault((kind, label), []).append((time.perf_counter() - t0) * 1000 / REPEAT)
+    await engine.dispose()
+
+    print(f"{'query':>6} {'LIKE ms':>9} {'index ms':>9}")
+    for kind in ("name", "typo", "phone", "nic"):
+        like_ms = sum(timings[(kind, "like")]) / len(timings[(kind, "like")])
+        index_ms = sum(timings[(kind, "index")]) / len(timings[(kind, "index")])
+        print(f"{kind:>6} {like_ms:>9.2f} {index_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
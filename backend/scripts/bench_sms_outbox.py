@@ -0,0 +1,121 @@
+"""Benchmark: SMS outbox delivery against a local stand-in for the Textware endpoint.
+
+Usage:
+    python scripts/bench_sms_outbox.py [messages] [rate_per_second]     # default 300, 100/s
+
+Starts a small HTTP server that answers like send_sms.php (after 20 ms, and
+with a 503 for the first attempt at every tenth message), points SMS_URL at
+it and queues the messages through SmsService.send_sms.  Reports how long
+queueing took, delivery throughput, connections opened, the most requests in
+flight at once, and checks that every message arrived exactly once.
+"""
+import asyncio
+import sys
+import time
+from collections import Counter
+from urllib.parse import parse_qs, urlsplit
+
+from bench_utils import create_bench_engine
+
+from sqlmodel import func, select
+
+from app.core.config import settings
+from app.models.sms_log import SmsLog
+from app.services.sms_dispatcher import sms_dispatcher
+from app.services.sms_service import SmsService
+
+LATENCY = 0.02
+
+
+class TextwareStandIn:
+    def __init__(self):
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.received = Counter()
+        self.rejected = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b""):
+                    pass  # headers; GET has no body
+                target = request_line.split()[1].decode()
+                params = parse_qs(urlsplit(target).query)
+                msg = params["msg"][0]
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(LATENCY)
+                self.in_flight -= 1
+                seq = int(msg.rsplit("#", 1)[1])
+                if seq % 10 == 0 and msg not in self.rejected:
+                    self.rejected.add(msg)
+                    status, body = "503 Service Unavailable", b"busy"
+                else:
+                    self.received[msg] += 1
+                    status, body = "200 OK", b"Status: 1 Message Sent"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 100.0
+    engine, session_factory, _ = await create_bench_engine()
+
+    stand_in = TextwareStandIn()
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    settings.SMS_USER, settings.SMS_PASSWORD = "bench", "bench"
+    settings.SMS_URL = f"http://127.0.0.1:{port}/sms/send_sms.php"
+    sms_dispatcher._limiter.interval = 1 / rate
+    sms_dispatcher.retry_base_seconds = 0.05
+
+    started = time.perf_counter()
+    async with session_factory() as session:
+        for seq in range(n):
+            await SmsService.send_sms(session, f"0770000{seq:03d}", f"Reminder #{seq}")
+    queued = time.perf_counter()
+    print(f"queued {n} messages in {(queued - started) * 1000:.0f} ms "
+          f"({(queued - started) * 1000 / n:.2f} ms per send_sms call)")
+
+    while True:
+        async with session_factory() as session:
+            done = (await session.exec(
+                select(func.count(SmsLog.id)).where(SmsLog.status.in_(("sent", "failed")))
+            )).one()
+        if done == n:
+            break
+        await asyncio.sleep(0.05)
+    delivered = time.perf_counter()
+
+    async with session_factory() as session:
+        by_status = dict((await session.exec(
+            select(SmsLog.status, func.count(SmsLog.id)).group_by(SmsLog.status)
+        )).all())
+    print(f"delivered in {delivered - started:.2f} s ({n / (delivered - started):.0f} msg/s, limit {rate:.0f}/s)")
+    print(f"rows by status {by_status}, dispatcher {sms_dispatcher.stats()}")
+    print(f"connections opened {stand_in.connections}, max in flight {stand_in.max_in_flight} "
+          f"(SMS_SEND_CONCURRENCY={sms_dispatcher.concurrency})")
+
+    duplicates = [msg for msg, count in stand_in.received.items() if count > 1]
+    assert not duplicates, f"{len(duplicates)} messages delivered more than once"
+    assert len(stand_in.received) == n, f"only {len(stand_in.received)} of {n} messages arrived"
+    assert stand_in.max_in_flight <= sms_dispatcher.concurrency
+    print(f"OK: every message delivered exactly once; {len(stand_in.rejected)} were retried after a 503.")
+
+    await sms_dispatcher.close()
+    server.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""Shared helpers for the scripts/bench_*.py benchmarks.
+
+Each benchmark builds the full schema in a throwaway database, seeds its own
+data and counts the SQL statements issued, so it never touches a real
+deployment.  Point BENCH_DATABASE_URL at a scratch MySQL database to measure
+against the production engine; the default is a temporary SQLite file and
+needs `pip install aiosqlite`.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_default_url = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="hms-bench-"), "bench.db")
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL", _default_url)
+os.environ.setdefault("DATABASE_URL", BENCH_DATABASE_URL)
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import app.main  # noqa: F401  (registers every model on SQLModel.metadata)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    @contextmanager
+    def measure(self):
+        """Yield a dict that receives the query count and elapsed ms of the block."""
+        stats = {}
+        start_count = self.count
+        start = time.perf_counter()
+        yield stats
+        stats["queries"] = self.count - start_count
+        stats["ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+
+async def create_bench_engine():
+    """Return (engine, session_factory, counter) over a freshly created schema."""
+    engine = create_async_engine(BENCH_DATABASE_URL, echo=False, future=True)
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    return engine, session_factory, counter
+
+
+async def explain(conn, stmt) -> list[dict]:
+    """Return the query plan of *stmt* as a list of {"table", "index", "full_scan", "detail"} dicts.
+
+    Understands SQLite's EXPLAIN QUERY PLAN and MySQL's EXPLAIN.
+    """
+    dialect = conn.dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    steps = []
+    if dialect.name == "sqlite":
+        result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)
+        for row in result.all():
+            detail = row[-1]
+            words = detail.split()
+            index = None
+            if " INDEX " in detail:
+                index = words[words.index("INDEX") + 1]
+            steps.append({
+                "table": words[1] if len(words) > 1 else None,
+                "index": index,
+                "full_scan": words[0] == "SCAN",
+                "detail": detail,
+            })
+    else:
+        result = await conn.exec_driver_sql("EXPLAIN " + sql)
+        for row in result.mappings().all():
+            steps.append({
+                "table": row.get("table"),
+                "index": row.get("key"),
+                "full_scan": row.get("type") in ("ALL", "index"),
+                "detail": dict(row),
+            })
+    return steps
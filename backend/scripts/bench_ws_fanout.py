@@ -0,0 +1,74 @@
+"""Benchmark: one branch broadcast to 500 websocket subscribers, some of them stalled.
+
+Usage:
+    python scripts/bench_ws_fanout.py [sockets]     # default 500
+
+Uses in-memory sockets with the in-process backend.  Reports how long the
+broadcast call blocks the publisher and how long until every healthy socket
+has the message, with a few sockets that never complete a send and
+subscribers on other branches that must not receive it.
+"""
+import asyncio
+import os
+import sys
+import time
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///unused.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from app.api.websocket_alerts import ConnectionManager
+from app.core.broadcast import InProcessBackend
+
+STALLED = 5
+OTHER_BRANCH = 200
+
+
+class MemorySocket:
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_json(self, data: dict):
+        if self.stalled:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(0.001)  # network write
+        self.received.append(data)
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    manager = ConnectionManager(InProcessBackend())
+    healthy = [MemorySocket() for _ in range(n - STALLED)]
+    stalled = [MemorySocket(stalled=True) for _ in range(STALLED)]
+    others = [MemorySocket() for _ in range(OTHER_BRANCH)]
+    for ws in healthy + stalled:
+        await manager.connect(ws, "queue-updates", "branch-a")
+    for ws in others:
+        await manager.connect(ws, "queue-updates", "branch-b")
+
+    for round_no in range(3):
+        started = time.perf_counter()
+        await manager.broadcast("queue-updates", {
+            "type": "queue-update", "queue_number": round_no, "status": "waiting", "branch_id": "branch-a",
+        })
+        published = time.perf_counter()
+        while min(len(ws.received) for ws in healthy) <= round_no:
+            await asyncio.sleep(0.0005)
+        delivered = time.perf_counter()
+        print(f"round {round_no}: broadcast returned in {(published - started) * 1000:.2f} ms, "
+              f"{len(healthy)} healthy sockets served in {(delivered - started) * 1000:.2f} ms")
+
+    assert all(not ws.received for ws in others), "other branch received branch-a messages"
+    print(f"OK: {STALLED} stalled sockets did not delay delivery; {OTHER_BRANCH} branch-b sockets got nothing.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
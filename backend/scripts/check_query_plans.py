@@ -0,0 +1,247 @@
+"""Query-plan regression check for hot dashboard and appointment queries.
+
+Usage:
+    python scripts/check_query_plans.py
+
+Builds the schema in a scratch database (see scripts/bench_utils.py), seeds
+enough rows for the planner to prefer indexes, runs EXPLAIN on each query
+below and exits non-zero if one of them scans its table instead of using the
+expected index.  An ``ordered`` check reads in index order under a LIMIT: it
+may scan the expected index but must not sort.  Add a PlanCheck whenever a
+new hot query or index lands.
+"""
+import asyncio
+import random
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict
+
+from bench_utils import create_bench_engine, explain
+
+from sqlmodel import col, func, select
+
+from app.api.super_admin_pos import cashier_stats_query
+from app.core.date_filters import between_dates, on_date
+from app.models.appointment import Appointment
+from app.models.branch import Branch
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.patient_session import ScheduleSession
+from app.models.pos import BillingTransaction
+from app.models.user import User
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    table: str
+    index: str
+    build: Callable[[Dict[str, Any]], Any]
+    ordered: bool = False
+
+
+CHECKS = [
+    PlanCheck(
+        "pos dashboard: branch sales today",
+        "billing_transaction",
+        "ix_billing_transaction_branch_status_created",
+        lambda ctx: select(func.coalesce(func.sum(BillingTransaction.net_amount), 0)).where(
+            BillingTransaction.status == "completed",
+            BillingTransaction.branch_id == ctx["branch_id"],
+            on_date(BillingTransaction.created_at, ctx["today"]),
+        ),
+    ),
+    PlanCheck(
+        "pos dashboard: all-branch sales today",
+        "billing_transaction",
+        "ix_billing_transaction_status_created",
+        lambda ctx: select(func.coalesce(func.sum(BillingTransaction.net_amount), 0)).where(
+            BillingTransaction.status == "completed",
+            on_date(BillingTransaction.created_at, ctx["today"]),
+        ),
+    ),
+    PlanCheck(
+        "cashiers: today and week totals per cashier",
+        "billing_transaction",
+        "ix_billing_transaction_cashier_status_created",
+        lambda ctx: cashier_stats_query(ctx["cashier_ids"], ctx["today"]),
+    ),
+    PlanCheck(
+        "analytics: branch range",
+        "billing_transaction",
+        "ix_billing_transaction_branch_status_created",
+        lambda ctx: select(func.count(BillingTransaction.id)).where(
+            BillingTransaction.status == "completed",
+            BillingTransaction.branch_id == ctx["branch_id"],
+            between_dates(BillingTransaction.created_at, ctx["today"] - timedelta(days=29), ctx["today"]),
+        ),
+    ),
+    PlanCheck(
+        "booking: slot already taken",
+        "appointment",
+        "ix_appointment_doctor_date_time_status",
+        lambda ctx: select(Appointment.id).where(
+            Appointment.doctor_id == ctx["doctor_id"],
+            Appointment.appointment_date == ctx["today"],
+            Appointment.appointment_time == time(9, 30),
+            Appointment.status != "cancelled",
+        ),
+    ),
+    PlanCheck(
+        "availability: booked slots for doctors over a range",
+        "appointment",
+        "ix_appointment_doctor_date_time_status",
+        lambda ctx: select(Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time).where(
+            col(Appointment.doctor_id).in_(ctx["doctor_ids"]),
+            Appointment.appointment_date >= ctx["today"],
+            Appointment.appointment_date <= ctx["today"] + timedelta(days=13),
+            Appointment.status != "cancelled",
+        ),
+    ),
+    PlanCheck(
+        "sessions: queue in time order",
+        "appointment",
+        "ix_appointment_session_time",
+        lambda ctx: select(Appointment)
+        .where(Appointment.schedule_session_id == ctx["session_id"])
+        .order_by(col(Appointment.appointment_time)),
+    ),
+    PlanCheck(
+        "receptionist: completed today",
+        "appointment",
+        "ix_appointment_status_date",
+        lambda ctx: select(func.count(Appointment.id)).where(
+            Appointment.appointment_date == ctx["today"], Appointment.status == "completed",
+        ),
+    ),
+    PlanCheck(
+        "receptionist: walk-ins today",
+        "appointment",
+        "ix_appointment_date_walk_in",
+        lambda ctx: select(func.count(Appointment.id)).where(
+            Appointment.appointment_date == ctx["today"], Appointment.is_walk_in == True,  # noqa
+        ),
+    ),
+    PlanCheck(
+        "receptionist: pending",
+        "appointment",
+        "ix_appointment_status_date",
+        lambda ctx: select(func.count(Appointment.id)).where(Appointment.status == "pending"),
+    ),
+    PlanCheck(
+        "reports: no-shows over a range",
+        "appointment",
+        "ix_appointment_status_date",
+        lambda ctx: select(func.count(Appointment.id)).where(
+            Appointment.status == "no_show",
+            Appointment.appointment_date >= ctx["today"] - timedelta(days=29),
+            Appointment.appointment_date <= ctx["today"],
+        ),
+    ),
+    PlanCheck(
+        "super admin: latest appointments",
+        "appointment",
+        "ix_appointment_date_time",
+        lambda ctx: select(Appointment)
+        .order_by(col(Appointment.appointment_date).desc(), col(Appointment.appointment_time).desc())
+        .limit(500),
+        ordered=True,
+    ),
+]
+
+
+async def seed(session_factory, rows: int = 5000) -> Dict[str, Any]:
+    rng = random.Random(42)
+    async with session_factory() as session:
+        branches = [Branch(center_name=f"Plan Branch {i}") for i in range(5)]
+        cashiers = [
+            User(email=f"plan-cashier-{i}@example.com", username=f"plan-cashier-{i}",
+                 hashed_password="x", role_as=7, first_name="Cashier", last_name=str(i))
+            for i in range(20)
+        ]
+        session.add_all(branches + cashiers)
+        now = datetime.utcnow()
+        for i in range(rows):
+            session.add(BillingTransaction(
+                branch_id=rng.choice(branches).id,
+                cashier_id=rng.choice(cashiers).id,
+                transaction_type="pharmacy",
+                total_amount=100, net_amount=100,
+                payment_method="cash",
+                status=rng.choice(["completed"] * 8 + ["pending", "refunded"]),
+                created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+            ))
+        await session.commit()
+
+        today = date.today()
+        doctors, patients, sessions = [], [], []
+        for i in range(20):
+            user = User(email=f"plan-doctor-{i}@example.com", username=f"plan-doctor-{i}",
+                        hashed_password="x", role_as=2, first_name="Doctor", last_name=str(i))
+            doctors.append(Doctor(first_name="Doctor", last_name=str(i), specialization="General",
+                                  qualification="MBBS", contact_number="0", experience_years=1, user_id=user.id))
+            session.add(user)
+        for i in range(100):
+            user = User(email=f"plan-patient-{i}@example.com", username=f"plan-patient-{i}",
+                        hashed_password="x", role_as=5, first_name="Patient", last_name=str(i))
+            patients.append(Patient(user_id=user.id))
+            session.add(user)
+        session.add_all(doctors + patients)
+        for doctor in doctors:
+            for day in range(-60, 15):
+                d = today + timedelta(days=day)
+                sessions.append(ScheduleSession(
+                    doctor_id=doctor.id, branch_id=branches[0].id, session_date=d,
+                    start_time=time(9), end_time=time(12), session_key=f"{doctor.id}:{d}",
+                ))
+        session.add_all(sessions)
+        for s in sessions:
+            for slot in rng.sample(range(12), 4):
+                session.add(Appointment(
+                    patient_id=rng.choice(patients).id, doctor_id=s.doctor_id, branch_id=s.branch_id,
+                    schedule_session_id=s.id, appointment_date=s.session_date,
+                    appointment_time=time(9 + slot // 4, slot % 4 * 15),
+                    status=rng.choice(["confirmed"] * 4 + ["pending", "completed", "completed", "cancelled", "no_show"]),
+                    is_walk_in=rng.random() < 0.1,
+                ))
+        await session.commit()
+        return {
+            "branch_id": branches[0].id, "cashier_ids": [c.id for c in cashiers], "today": today,
+            "doctor_id": doctors[0].id, "doctor_ids": [d.id for d in doctors[:5]],
+            "session_id": sessions[len(sessions) // 2].id,
+        }
+
+
+def _sorts(plan) -> bool:
+    return any("TEMP B-TREE FOR ORDER BY" in str(s["detail"]) or "Using filesort" in str(s["detail"]) for s in plan)
+
+
+async def main() -> int:
+    engine, session_factory, _ = await create_bench_engine()
+    ctx = await seed(session_factory)
+    failures = 0
+    async with engine.connect() as conn:
+        if conn.dialect.name == "mysql":
+            await conn.exec_driver_sql("ANALYZE TABLE billing_transaction, appointment")
+        for check in CHECKS:
+            plan = await explain(conn, check.build(ctx))
+            steps = [s for s in plan if s["table"] == check.table]
+            if check.ordered:
+                ok = bool(steps) and all(s["index"] == check.index for s in steps) and not _sorts(plan)
+            else:
+                ok = bool(steps) and all(not s["full_scan"] for s in steps) and any(
+                    s["index"] == check.index for s in steps
+                )
+            failures += not ok
+            used = ", ".join(str(s["index"]) for s in steps) or "-"
+            print(f"{'OK  ' if ok else 'FAIL'} {check.name}: index={used} (expected {check.index})")
+            if not ok:
+                for s in plan:
+                    print(f"       {s['detail']}")
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
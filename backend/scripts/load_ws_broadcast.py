@@ -0,0 +1,113 @@
+"""Load test: websocket broadcasts across worker processes over the unix bus.
+
+Usage:
+    python scripts/load_ws_broadcast.py [workers] [sockets_per_worker] [messages]
+    # default: 4 workers x 1000 sockets, 200 messages
+
+Starts N worker processes, each with its own ConnectionManager on the "unix"
+broadcast backend and a set of in-memory sockets.  Every worker publishes its
+share of the messages at a steady rate; the test checks every socket in every worker received
+every message and reports end-to-end latency.  The HTTP/websocket layer is
+left out so the numbers isolate the bus and the fan-out.
+"""
+import asyncio
+import multiprocessing as mp
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///unused.db")
+os.environ.setdefault("SECRET_KEY", "load-test")
+
+CHANNEL = "queue-updates"
+PUBLISH_INTERVAL = 0.1  # per worker, i.e. 40 broadcasts/s across 4 workers
+
+
+class MemorySocket:
+    def __init__(self, latencies: list):
+        self.received = 0
+        self._latencies = latencies
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data: dict):
+        self.received += 1
+        if self.received == 1 or data["seq"] % 10 == 0:
+            self._latencies.append(time.time() - data["sent_at"])
+
+
+def worker(index: int, n_workers: int, n_sockets: int, n_messages: int, bus_dir: str, barrier, results):
+    from app.api.websocket_alerts import ConnectionManager
+    from app.core.broadcast import UnixSocketBus
+
+    async def run():
+        latencies: list = []
+        manager = ConnectionManager(UnixSocketBus(bus_dir))
+        sockets = [MemorySocket(latencies) for _ in range(n_sockets)]
+        for ws in sockets:
+            await manager.connect(ws, CHANNEL)
+        await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+        await asyncio.sleep(UnixSocketBus.PEER_REFRESH_SECONDS + 0.1)  # let every worker see its peers
+
+        for seq in range(index, n_messages, n_workers):
+            await manager.broadcast(CHANNEL, {"seq": seq, "sent_at": time.time(), "worker": index})
+            await asyncio.sleep(PUBLISH_INTERVAL)
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and min(ws.received for ws in sockets) < n_messages:
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.5)
+        await manager._backend.stop()
+        results.put({
+            "worker": index,
+            "complete": sum(ws.received == n_messages for ws in sockets),
+            "delivered": sum(ws.received for ws in sockets),
+            "dropped": manager._backend.dropped,
+            "latencies": latencies,
+        })
+
+    asyncio.run(run())
+
+
+def main():
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_sockets = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    n_messages = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    bus_dir = tempfile.mkdtemp(prefix="hms-ws-bus-")
+
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(i, n_workers, n_sockets, n_messages, bus_dir, barrier, results))
+        for i in range(n_workers)
+    ]
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+    reports = [results.get(timeout=120) for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    expected = n_sockets * n_messages
+    latencies = sorted(l for r in reports for l in r["latencies"])
+    print(f"{n_workers} workers x {n_sockets} sockets, {n_messages} messages ({elapsed:.1f}s wall)")
+    for r in sorted(reports, key=lambda r: r["worker"]):
+        print(f"  worker {r['worker']}: {r['delivered']}/{expected} deliveries, "
+              f"{r['complete']}/{n_sockets} sockets complete, {r['dropped']} datagrams dropped")
+    if latencies:
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"  latency p50 {statistics.median(latencies) * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms")
+    ok = all(r["delivered"] == expected for r in reports)
+    print("OK" if ok else "FAIL: some sockets missed messages")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()